@@ -0,0 +1,169 @@
+"""
+bench_entity_budgets.py
+
+Times entity × category budget evaluation over a synthetic fleet and
+checks its alerts against a plain per-entity loop.
+
+Run from the project root:
+
+    python -m benchmarks.bench_entity_budgets --rows 1000000 --entities 10000
+
+Pass ``--period`` to budget per month as well. The command exits with
+a non-zero status when the vectorized alerts differ from the loop, or
+when ``--max-seconds`` is given and evaluation is slower than that.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.budget import (
+    ALL_ENTITIES,
+    determine_severity,
+    entity_category_totals,
+    evaluate_entity_variances,
+    generate_entity_alerts
+)
+from src.schema import CENTS_PER_DOLLAR, amount_cents, to_cents
+
+CATEGORIES = ["Fuel", "Maintenance", "Insurance", "Food", "Other"]
+MEAN_AMOUNT = 240.0
+
+
+def make_transactions(rows: int, entities: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Build a synthetic, already-categorized frame with an entity column.
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array([f"truck-{i:05d}" for i in range(entities)], dtype=object)
+
+    return pd.DataFrame({
+        "date": np.datetime64("2025-01-01") + rng.integers(0, 90, rows).astype("timedelta64[D]"),
+        "entity": pd.Categorical(names[rng.integers(0, entities, rows)]),
+        "category": pd.Categorical(np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), rows)]),
+        "amount_cents": to_cents(rng.gamma(2.0, MEAN_AMOUNT / 2, rows).round(2)),
+    })
+
+
+def make_budgets(df: pd.DataFrame, period: bool, seed: int = 42) -> pd.DataFrame:
+    """
+    "*" budgets for every category plus entity-specific budgets for
+    about half of the entity × category pairs, each within ±30% of the
+    expected spend so that a share of them is exceeded.
+    """
+    rng = np.random.default_rng(seed)
+    periods = sorted(df["date"].dt.to_period("M").astype(str).unique()) if period else [None]
+    entities = df["entity"].cat.categories.to_numpy(dtype=object)
+    per_cell = len(df) / (len(entities) * len(CATEGORIES) * len(periods)) * MEAN_AMOUNT
+
+    frames = []
+    for month in periods:
+        shared = pd.DataFrame({"entity": ALL_ENTITIES, "category": CATEGORIES})
+        pairs = pd.DataFrame({
+            "entity": np.repeat(entities, len(CATEGORIES)),
+            "category": np.tile(CATEGORIES, len(entities)),
+        })
+        pairs = pairs[rng.random(len(pairs)) < 0.5]
+        for frame in (shared, pairs):
+            frame = frame.assign(budget=(per_cell * rng.uniform(0.7, 1.3, len(frame))).round(2))
+            frames.append(frame.assign(period=month) if period else frame)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def vectorized_alerts(df: pd.DataFrame, budgets: pd.DataFrame) -> dict:
+    period = "M" if "period" in budgets.columns else None
+    actuals = entity_category_totals(df, "entity", period)
+    alerts = generate_entity_alerts(evaluate_entity_variances(actuals, budgets))
+    keys = [c for c in ("entity", "category", "period") if c in alerts.columns]
+    return {
+        tuple(row[k] for k in keys): (row["actual"], row["severity"])
+        for row in alerts.to_dict("records")
+    }
+
+
+def loop_alerts(df: pd.DataFrame, budgets: pd.DataFrame) -> dict:
+    """
+    Reference: one entity at a time, with determine_severity per row.
+    """
+    period = "period" in budgets.columns
+    rows = budgets.to_dict("records")
+    specific = {
+        (r["entity"], r["category"]) + ((r["period"],) if period else ()): r["budget"]
+        for r in rows if r["entity"] != ALL_ENTITIES
+    }
+    shared = {
+        (r["category"],) + ((r["period"],) if period else ()): r["budget"]
+        for r in rows if r["entity"] == ALL_ENTITIES
+    }
+
+    alerts = {}
+    for entity, group in df.groupby("entity", observed=True):
+        keys = [group["category"].astype(str)]
+        if period:
+            keys.append(group["date"].dt.to_period("M").astype(str))
+        for key, cents in amount_cents(group).groupby(keys).sum().items():
+            key = key if isinstance(key, tuple) else (key,)
+            actual = cents / CENTS_PER_DOLLAR
+            budget = specific.get((entity,) + key, shared.get(key, 0.0))
+            if budget > 0 and actual > budget:
+                alerts[(entity,) + key] = (actual, determine_severity(actual, budget))
+    return alerts
+
+
+def compare(vectorized: dict, loop: dict) -> list:
+    problems = [f"only in loop: {key}" for key in loop.keys() - vectorized.keys()]
+    problems += [f"only in vectorized: {key}" for key in vectorized.keys() - loop.keys()]
+    for key in vectorized.keys() & loop.keys():
+        (actual, severity), (expected, expected_severity) = vectorized[key], loop[key]
+        if abs(actual - expected) > 0.005 or severity != expected_severity:
+            problems.append(f"{key}: {actual:.2f} {severity} != {expected:.2f} {expected_severity}")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark entity budget evaluation.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--entities", type=int, default=10_000)
+    parser.add_argument("--period", action="store_true", help="budget per month as well")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="fail if the best run is slower than this")
+    args = parser.parse_args(argv)
+
+    df = make_transactions(args.rows, args.entities)
+    budgets = make_budgets(df, args.period)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        vectorized = vectorized_alerts(df, budgets)
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    loop = loop_alerts(df, budgets)
+    loop_seconds = time.perf_counter() - start
+
+    best = min(timings)
+    print(f"rows={args.rows:,} entities={args.entities:,} budgets={len(budgets):,} "
+          f"alerts={len(vectorized):,} best={best:.3f}s loop={loop_seconds:.3f}s")
+
+    problems = compare(vectorized, loop)
+    if problems:
+        print(f"❌ {len(problems)} alert(s) differ from the per-entity loop, e.g.:")
+        for problem in problems[:10]:
+            print(f"  {problem}")
+        return 1
+
+    if args.max_seconds is not None and best > args.max_seconds:
+        print(f"❌ Entity budget evaluation took {best:.3f}s, limit is {args.max_seconds:.3f}s")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+bench_rules_engine.py
+
+Times predicate rule evaluation over a synthetic transaction frame.
+
+Run from the project root:
+
+    python -m benchmarks.bench_rules_engine --rows 1000000 --rules 50
+
+Pass ``--max-seconds`` to exit with a non-zero status when evaluation
+is slower than the given limit, so a rule set that regresses
+categorization speed can be caught in CI or before a config change.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.rules_engine import apply_predicate_rules, compile_predicate_rules
+
+VENDORS = [
+    "Pilot fuel", "Love's travel stop", "Shell station", "TA truck repair",
+    "Speedco oil change", "Progressive insurance", "Subway", "Denny's",
+    "Highway toll", "Truck wash", "Parking lot", "Tire shop"
+]
+
+CATEGORIES = ["Fuel", "Maintenance", "Insurance", "Food", "Other"]
+
+
+def make_transactions(rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Build a synthetic, already-categorized transaction frame.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2023-01-01")
+
+    return pd.DataFrame({
+        "date": start + rng.integers(0, 730, rows).astype("timedelta64[D]"),
+        "description": np.array(VENDORS, dtype=object)[rng.integers(0, len(VENDORS), rows)],
+        "amount": rng.gamma(2.0, 120.0, rows).round(2),
+        "category": np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), rows)]
+    })
+
+
+def make_rule_specs(count: int, seed: int = 42) -> list:
+    """
+    Build a mix of regex, amount, date and weekday rules.
+    """
+    rng = np.random.default_rng(seed)
+    specs = []
+
+    for i in range(count):
+        vendor = VENDORS[i % len(VENDORS)].split()[0]
+        low = float(rng.integers(0, 400))
+        spec = {
+            "name": f"rule_{i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "priority": int(rng.integers(0, 10)),
+            "description_regex": rf"\b{vendor}\b",
+            "min_amount": low,
+            "max_amount": low + 500
+        }
+        if i % 3 == 0:
+            spec["weekdays"] = ["sat", "sun"]
+        if i % 4 == 0:
+            spec["start_date"] = "2024-01-01"
+        specs.append(spec)
+
+    return specs
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark predicate rule evaluation.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--rules", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="fail if the best run is slower than this")
+    args = parser.parse_args(argv)
+
+    df = make_transactions(args.rows)
+
+    start = time.perf_counter()
+    rules = compile_predicate_rules(make_rule_specs(args.rules))
+    compile_seconds = time.perf_counter() - start
+
+    timings = []
+    for _ in range(args.repeat):
+        frame = df.copy()
+        start = time.perf_counter()
+        apply_predicate_rules(frame, rules)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"rows={args.rows:,} rules={len(rules)} "
+          f"compile={compile_seconds * 1000:.2f}ms "
+          f"best={best:.3f}s ({args.rows / best:,.0f} rows/s)")
+
+    if args.max_seconds is not None and best > args.max_seconds:
+        print(f"❌ Rule evaluation took {best:.3f}s, limit is {args.max_seconds:.3f}s")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
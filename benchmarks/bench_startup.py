@@ -0,0 +1,63 @@
+"""
+bench_startup.py
+
+Measures wall-clock startup of the batch CLI in fresh processes.
+
+Run from the project root:
+
+    python -m benchmarks.bench_startup --repeat 10
+
+`--help` and `report` should not import pandas; the script checks this
+and reports the best and median time of each command.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+COMMANDS = {
+    "python -c pass": [sys.executable, "-c", "pass"],
+    "main.py --help": [sys.executable, "main.py", "--help"],
+    "main.py report": [sys.executable, "main.py", "report"],
+}
+
+# Imports main/cli the same way `python main.py report` does, then
+# reports whether pandas ended up loaded.
+PANDAS_CHECK = (
+    "import sys, runpy; sys.argv = ['main.py', '-q', 'report']\n"
+    "try:\n"
+    "    runpy.run_path('main.py', run_name='__main__')\n"
+    "except SystemExit:\n"
+    "    pass\n"
+    "print('pandas' in sys.modules)"
+)
+
+
+def time_command(cmd, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup time.")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    for name, cmd in COMMANDS.items():
+        timings = time_command(cmd, args.repeat)
+        print(f"{name:<18} best={min(timings):7.1f} ms  median={statistics.median(timings):7.1f} ms")
+
+    check = subprocess.run([sys.executable, "-c", PANDAS_CHECK], capture_output=True, text=True)
+    loaded = check.stdout.strip().splitlines()[-1:] == ["True"]
+    print(f"pandas imported by `report`: {'yes ❌' if loaded else 'no ✅'}")
+    return 1 if loaded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
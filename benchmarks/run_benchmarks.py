@@ -0,0 +1,188 @@
+"""
+run_benchmarks.py
+
+Times every pipeline stage on synthetic data at several scales.
+
+Run from the project root:
+
+    python -m benchmarks.run_benchmarks --sizes 1e3 1e4 1e5 --out bench.json
+    python -m benchmarks.run_benchmarks --compare bench.json --tolerance 0.25
+
+Stages: ingest, validate_and_clean, auto_categorize, calculate_totals,
+budget (variances + alerts), anomalies, scoring and save_transactions.
+Sizes above --max-in-memory are run through the streaming pipeline
+instead of the in-memory stages. Results are written as JSON with the
+git commit and library versions, so runs from different commits can be
+compared; --compare exits non-zero when any stage is slower than the
+previous result by more than the tolerance.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generate_data import generate_file
+from src.analysis import calculate_totals
+from src.anomalies import detect_baseline_anomalies, detect_current_anomalies, monthly_category_totals
+from src.budget import evaluate_variances, generate_budget_alerts
+from src.categorize import auto_categorize
+from src.config_loader import load_budgets
+from src.ingest import load_transactions
+from src.preprocess import validate_and_clean
+from src.scoring import efficiency_score
+from src.storage import save_transactions
+from src.streaming import stream_cube
+
+DEFAULT_SIZES = [1e3, 1e4, 1e5]
+DEFAULT_MAX_IN_MEMORY = 2e7
+
+
+def _timed(fn, *args, **kwargs):
+    """
+    Run fn silently and return (result, seconds).
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        seconds = time.perf_counter() - start
+    return result, seconds
+
+
+def run_in_memory(path: str, workdir: str) -> dict:
+    """
+    Time each in-memory stage once.
+    """
+    stages = {}
+    budgets = load_budgets()
+
+    df, stages["ingest"] = _timed(load_transactions, path)
+    df, stages["validate_and_clean"] = _timed(validate_and_clean, df)
+    df, stages["auto_categorize"] = _timed(auto_categorize, df)
+    (total_spend, category_totals), stages["calculate_totals"] = _timed(calculate_totals, df)
+
+    def budget_stage():
+        return (evaluate_variances(category_totals, budgets),
+                generate_budget_alerts(category_totals, budgets))
+
+    (variances, _), stages["budget"] = _timed(budget_stage)
+
+    def anomaly_stage():
+        detect_baseline_anomalies(monthly_category_totals(df))
+        return detect_current_anomalies(df, os.path.join(workdir, "baselines.json"))
+
+    _, stages["anomalies"] = _timed(anomaly_stage)
+    _, stages["scoring"] = _timed(efficiency_score, total_spend, float(sum(budgets.values())), variances)
+    _, stages["save_transactions"] = _timed(save_transactions, df, os.path.join(workdir, "saved.csv"))
+
+    return stages
+
+
+def run_streaming(path: str) -> dict:
+    """
+    Time the chunked pipeline end to end.
+    """
+    _, seconds = _timed(stream_cube, path)
+    return {"stream_pipeline": seconds}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, previous: dict, tolerance: float) -> list:
+    """
+    Return (rows, stage, old, new) for stages slower than tolerance allows.
+    """
+    old = {(r["rows"], r["stage"]): r["seconds"] for r in previous.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        key = (result["rows"], result["stage"])
+        if key in old and result["seconds"] > old[key] * (1 + tolerance):
+            regressions.append((*key, old[key], result["seconds"]))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage.")
+    parser.add_argument("--sizes", type=float, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=1, help="best of N runs per stage")
+    parser.add_argument("--max-in-memory", type=float, default=DEFAULT_MAX_IN_MEMORY,
+                        help="larger sizes use the streaming pipeline")
+    parser.add_argument("--data-dir", default=None,
+                        help="reuse generated files here (default: a temp dir)")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", default=None, help="previous results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="expense_bench_")
+    os.makedirs(data_dir, exist_ok=True)
+
+    results = []
+    for size in args.sizes:
+        rows = int(size)
+        path = os.path.join(data_dir, f"transactions_{rows}_{args.seed}.csv")
+        if not os.path.exists(path):
+            generate_file(path, rows, seed=args.seed)
+
+        best = {}
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as workdir:
+                stages = run_in_memory(path, workdir) if rows <= args.max_in_memory else run_streaming(path)
+            for stage, seconds in stages.items():
+                best[stage] = min(seconds, best.get(stage, np.inf))
+
+        for stage, seconds in best.items():
+            results.append({
+                "rows": rows,
+                "stage": stage,
+                "seconds": round(seconds, 6),
+                "rows_per_second": round(rows / seconds) if seconds > 0 else None,
+            })
+            print(f"{rows:>12,}  {stage:<20} {seconds * 1000:>10.2f} ms")
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for rows, stage, old, new in regressions:
+            print(f"❌ {stage} at {rows:,} rows: {old * 1000:.2f} ms → {new * 1000:.2f} ms")
+        if regressions:
+            return 1
+        print("✅ No regressions beyond tolerance")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
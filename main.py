@@ -1,45 +1,110 @@
-from src.ingest import load_transactions
-from src.preprocess import validate_and_clean
-from src.categorize import auto_categorize
-from src.analysis import calculate_totals, rank_cost_drivers
-from src.budget import evaluate_variances, generate_budget_alerts, log_budget_alerts
-from src.scoring import efficiency_score
-from src.reporting import generate_summary, print_rankings
-from src.config_loader import load_budgets
-from src.audit_logger import log_run   # 🔹 STEP 7 import
-from src.anomalies import detect_spending_anomalies   # 🔹 NEW (Unusual patterns)
-from src.storage import save_transactions
-
-
-# 🔹 NEW (Interactive CLI features)
-from src.interactive import (
-    show_menu,
-    add_transaction,
-    edit_transaction,
-    delete_transaction
-)
-
-
 import os
+import sys
+
+# Heavy modules (pandas, yaml and the src pipeline) are imported inside
+# main() so that batch commands such as `python main.py --help` or
+# `python main.py report` start without loading them.
+
+
+def main(debug=False, data_path="data/transactions.csv", use_cache=True, instrument=False, profile_stage=None):
+    from src.ingest import load_transactions
+    from src.preprocess import validate_and_clean
+    from src.categorize import auto_categorize
+    from src.analysis import RunningTotals
+    from src.budget import log_budget_alerts
+    from src.pipeline import analyze_totals
+    from src.reporting import print_analysis, print_live_status
+    from src.config_loader import load_budgets
+    from src.audit_logger import flush_all, log_run   # 🔹 STEP 7 import
+    from src.storage import is_sqlite_path, open_store
+    from src.dedup import FingerprintIndex
+    from src.schema import live_rows
+    from src.instrumentation import StageProfiler
+    from src.result_cache import ResultCache
+    from src.anomalies import source_state_path
+    from src.heavy_hitters import DEFAULT_TOP_N, VendorRanking
+
+    # 🔹 NEW (Interactive CLI features)
+    from src.interactive import (
+        show_menu,
+        add_transaction,
+        bulk_add_transactions,
+        edit_transaction,
+        delete_transaction
+    )
+
+    # Per-stage timing/memory (near-zero cost when disabled)
+    profiler = StageProfiler(enabled=instrument or bool(profile_stage), profile_stage=profile_stage)
 
-def main():
     # -----------------------------
     # DEBUG: Verify working directory and file existence
     # -----------------------------
-    print("DEBUG: Current working directory =", os.getcwd())
-    print("DEBUG: Absolute path being used:", os.path.abspath("data/transactions.csv"))
-    print("DEBUG: Does file exist?",
-          os.path.exists("data/transactions.csv"))
+    if debug:
+        print("DEBUG: Current working directory =", os.getcwd())
+        print("DEBUG: Absolute path being used:", os.path.abspath(data_path))
+        print("DEBUG: Does file exist?",
+              os.path.exists(data_path))
     # -----------------------------
     # Load and process transactions
-    df = load_transactions("data/transactions.csv")
-
-    print("DEBUG: Rows loaded =", len(df))
-    print("DEBUG: Last 10 rows:")
-    print(df.tail(10)) # Show last 10 rows
+    store = open_store(data_path)
+
+    # Cleaned CSV data (and, when nothing is edited, the analysis) is
+    # reused from output/cache while the input files are unchanged.
+    cache = ResultCache(enabled=use_cache and not is_sqlite_path(data_path))
+    frame_key = cache.key([data_path, "config/rules.yml"], "frame") if cache.enabled else None
+    data_digest = cache.file_digest(data_path) if cache.enabled else None
+
+    with profiler.stage("load") as stage:
+        # SQLite rows are stored already cleaned and categorized.
+        if is_sqlite_path(data_path):
+            df, prepared = store.load(), True
+        else:
+            df = cache.get_frame(frame_key) if frame_key else None
+            prepared = df is not None
+            if prepared:
+                print(f"♻ Reused cleaned transactions from cache ({len(df)} rows)")
+            else:
+                df = load_transactions(data_path)
+        stage.rows_out = len(df)
+
+    if debug:
+        print("DEBUG: Rows loaded =", len(df))
+        print("DEBUG: Last 10 rows:")
+        print(df.tail(10)) # Show last 10 rows
+
+    if not prepared:
+        with profiler.stage("clean", rows_in=len(df)) as stage:
+            df = validate_and_clean(df, rejects_path="output/rejects/rejected_transactions.csv")
+            stage.rows_out = len(df)
+
+        with profiler.stage("categorize", rows_in=len(df)) as stage:
+            df = auto_categorize(df)
+            stage.rows_out = len(df)
+
+        if frame_key:
+            cache.put_frame(frame_key, df)
+
+    # CSV edits are appended to a journal instead of rewriting the file,
+    # and changes left by an interrupted session are replayed here.
+    # SQLite commits each change as it is made.
+    journal = store.journal()
+    df = live_rows(journal.replay(df))
+
+    # Fingerprints of recorded transactions, so re-entered receipts are
+    # caught. Rebuilt after edits and deletes, which change or drop rows.
+    dedup_index = FingerprintIndex.from_frame(df)
+
+    # Totals are kept live through the menu instead of re-aggregating.
+    budgets = load_budgets()
+    live_totals = RunningTotals.from_frame(df)
 
-    df = validate_and_clean(df)
-    df = auto_categorize(df)
+    def after_change(df):
+        journal.maybe_compact(df)
+        print_live_status(live_totals, budgets)
+        # DEBUG: confirm the running totals against a full recomputation.
+        if debug:
+            ok = live_totals.matches(live_rows(df))
+            print(f"DEBUG: Running totals match full recomputation = {ok}")
 
     # =============================
     # 🔹 INTERACTIVE TRANSACTION MENU
@@ -48,103 +113,87 @@ def main():
         choice = show_menu()
 
         if choice == "1":
-            df = add_transaction(df)
-            save_transactions(df)
+            df = add_transaction(df, journal, live_totals, dedup_index)
+            after_change(df)
 
         elif choice == "2":
-            df = edit_transaction(df)
-            save_transactions(df)
+            df = edit_transaction(df, journal, live_totals)
+            dedup_index = FingerprintIndex.from_frame(live_rows(df))
+            after_change(df)
 
         elif choice == "3":
-            df = delete_transaction(df)
-            save_transactions(df)
+            df = delete_transaction(df, journal, live_totals)
+            dedup_index = FingerprintIndex.from_frame(live_rows(df))
+            after_change(df)
 
         elif choice == "4":
+            journal.compact(df)
             print("Proceeding to analysis...\n")
             break  # exits menu loop, continues program
 
         elif choice == "5":
+            df = bulk_add_transactions(df, journal, live_totals, index=dedup_index)
+            after_change(df)
+
+        elif choice == "6":
+            journal.compact(df)
             print("👋 Exiting Expense Tracker. Goodbye!")
             return  # exits main() entirely
 
         else:
-            print("❌ Invalid selection. Please choose 1–5.")
+            print("❌ Invalid selection. Please choose 1–6.")
 
 
 
-    # Load budgets
-    budgets = load_budgets()
+    # Deletes only tombstoned rows; drop them once before analysis.
+    df = live_rows(df)
 
     # Financial analysis
-    total_spend, category_totals = calculate_totals(df)# Calculate budget variances
-
-    # 🔹 STEP: Detect unusual spending patterns
-    anomalies = detect_spending_anomalies(
-        current_totals=category_totals,
-        historical_averages={
-            "Fuel": 1400,
-            "Maintenance": 570,
-            "Insurance": 560
-        }
-    )
-
-    variances = evaluate_variances(category_totals, budgets)
-    alerts = generate_budget_alerts(category_totals, budgets)
-
-
-
-    print("\n📉 Budget Variance Report")
-    print("------------------------")
-    for category, diff in variances.items():
-        status = "OVER budget" if diff > 0 else "UNDER budget"
-        print(f"{category:<15} ${diff:>8.2f} ({status})")
+    with profiler.stage("totals", rows_in=len(df)) as stage:
+        total_spend, category_totals = live_totals.totals()
+        stage.rows_out = len(category_totals)
+
+    # Budget variances, alerts, unusual spending and scoring.
+    # Anomaly baselines (rolling mean, EWMA, std) come from the
+    # transaction history and are stored so each run only folds in new months.
+    def results_key():
+        # The stored baselines and quantile sketches feed the results too.
+        states = [source_state_path(path, data_path) for path in ("output/baselines.json", "output/quantiles.json")]
+        return cache.key([data_path, "config/rules.yml", "config/budgets.csv", *states], "analyze", DEFAULT_TOP_N)
+
+    # Only reusable when the session left the data file untouched.
+    reusable = cache.enabled and cache.file_digest(data_path) == data_digest
+    cached = cache.get_results(results_key()) if reusable else None
+
+    if cached is not None:
+        print("♻ Inputs unchanged; reusing cached analysis")
+        results = cached["results"]
+    else:
+        results = analyze_totals(total_spend, category_totals, budgets, history=df, profiler=profiler, source=data_path)
+        results["top_vendors"] = VendorRanking.from_frame(df).top(DEFAULT_TOP_N)
+        if reusable:
+            cache.put_results(results_key(), {"results": results, "transactions": len(df)})
 
     # Log alerts to audit file
     log_budget_alerts(category_totals, budgets)
 
-    if alerts:
-        print("\n🚨 Budget Alerts")
-        print("----------------")
-        for alert in alerts:
-            print(alert)
-            print()  # blank line between alerts
-    else:
-        print("\n✅ No budget overruns detected")
-
-    if anomalies:
-        print("\n🚨 Unusual Spending Alerts")
-        print("--------------------------")
-        for alert in anomalies:
-            print(alert)
-            print()  # blank line for readability
-
-    total_budget = sum(budgets.values())
-    ranked_costs = rank_cost_drivers(category_totals)
-
-    # Scoring
-    score, score_reason = efficiency_score(
-        total_spend=total_spend,
-        total_budget=total_budget,
-        category_variances=variances
-    )
-
-    print("\n📊 Efficiency Score")
-    print("-------------------")
-    print(f"Overall Efficiency Score: {score}/100")
-    print(f"Reason: {score_reason}")
-
     # Reporting
-    print(generate_summary(total_spend, score, alerts))
-    print_rankings(ranked_costs)
+    with profiler.stage("reporting"):
+        print_analysis(results)
 
     # 🔹 STEP 7 — Audit Logging
     log_run(
         transactions_count=len(df),
         total_spend=total_spend,
-        efficiency_score=score
+        efficiency_score=results["score"]
     )
+    profiler.log()
+    if profiler.enabled:
+        print("\n" + profiler.summary())
+    flush_all()
 
 
 if __name__ == "__main__":
-    main()
-
+    # No arguments: interactive menu. Otherwise: batch CLI (see --help).
+    from src.cli import run
+    sys.exit(run(sys.argv[1:], interactive=main))
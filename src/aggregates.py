@@ -0,0 +1,201 @@
+"""
+aggregates.py
+
+Mergeable partial aggregates for sharded analysis.
+
+A PartialAggregate holds, for every (period, category) cell, the sum,
+count, minimum and maximum of amounts in integer cents. Shards (one per
+region, file, process or machine) are aggregated independently, written
+to JSON and merged afterwards. Merging is associative and commutative
+and works on integers only, so any grouping of shards yields exactly the
+totals of a single pass over all rows.
+"""
+
+import json
+import os
+from functools import reduce
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.cube import RollupCube
+from src.schema import CENTS_PER_DOLLAR, amount_cents
+
+FORMAT_VERSION = 1
+
+# Cell layout: [sum_cents, count, min_cents, max_cents]
+SUM, COUNT, MIN, MAX = range(4)
+
+
+def _merge_cells(a: List[int], b: List[int]) -> List[int]:
+    return [a[SUM] + b[SUM], a[COUNT] + b[COUNT], min(a[MIN], b[MIN]), max(a[MAX], b[MAX])]
+
+
+class PartialAggregate:
+    """
+    Per-period, per-category sums, counts, minimums and maximums.
+
+    Attributes
+    ----------
+    freq : str
+        Period granularity of the cells ("D", "W", "M", "Q" or "Y").
+    cells : Dict[Tuple[str, str], List[int]]
+        (period, category) → [sum, count, min, max] in cents.
+    """
+
+    def __init__(self, freq: str = "M", cells: Dict[Tuple[str, str], List[int]] = None):
+        self.freq = freq
+        self.cells = cells or {}
+
+    # -----------------------------
+    # Building
+    # -----------------------------
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, freq: str = "M") -> "PartialAggregate":
+        """
+        Aggregate cleaned, categorized transactions.
+        """
+        if df.empty:
+            return cls(freq)
+
+        periods = pd.Series(pd.PeriodIndex(df["date"], freq=freq).astype(str), index=df.index)
+        categories = df["category"].astype(str)
+        grouped = amount_cents(df).groupby([periods, categories]).agg(["sum", "count", "min", "max"])
+        return cls._from_grouped(grouped, freq)
+
+    @classmethod
+    def from_cube(cls, cube: RollupCube, freq: str = "M") -> "PartialAggregate":
+        """
+        Aggregate a RollupCube (e.g. from streaming or SQLite).
+        """
+        day_index, cat_index = np.nonzero(cube.counts)
+        if not len(day_index):
+            return cls(freq)
+
+        periods = cube.days[day_index].to_period(freq).astype(str)
+        cells = pd.DataFrame({
+            "period": periods,
+            "category": np.asarray(cube.categories, dtype=object)[cat_index],
+            "sum": cube.sums[day_index, cat_index],
+            "count": cube.counts[day_index, cat_index],
+            "min": cube.mins[day_index, cat_index],
+            "max": cube.maxs[day_index, cat_index],
+        })
+        grouped = cells.groupby(["period", "category"]).agg(
+            {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+        )
+        return cls._from_grouped(grouped, freq)
+
+    @classmethod
+    def _from_grouped(cls, grouped: pd.DataFrame, freq: str) -> "PartialAggregate":
+        values = grouped[["sum", "count", "min", "max"]].to_numpy(dtype=np.int64).tolist()
+        return cls(freq, dict(zip(grouped.index.tolist(), values)))
+
+    # -----------------------------
+    # Combining
+    # -----------------------------
+    def merge(self, other: "PartialAggregate") -> "PartialAggregate":
+        """
+        Combine two aggregates into a new one. Associative and
+        commutative; neither input is modified.
+        """
+        if other.freq != self.freq:
+            raise ValueError(f"Cannot merge aggregates with periods {self.freq} and {other.freq}")
+
+        cells = dict(self.cells)
+        for key, cell in other.cells.items():
+            cells[key] = _merge_cells(cells[key], cell) if key in cells else list(cell)
+        return PartialAggregate(self.freq, cells)
+
+    @classmethod
+    def merge_all(cls, aggregates: Iterable["PartialAggregate"], freq: str = "M") -> "PartialAggregate":
+        return reduce(lambda a, b: a.merge(b), aggregates, cls(freq))
+
+    # -----------------------------
+    # Results
+    # -----------------------------
+    @property
+    def rows(self) -> int:
+        return sum(cell[COUNT] for cell in self.cells.values())
+
+    def by_category(self) -> Dict[str, List[int]]:
+        """
+        Category → [sum, count, min, max] in cents, across all periods.
+        """
+        out: Dict[str, List[int]] = {}
+        for (_, category), cell in self.cells.items():
+            out[category] = _merge_cells(out[category], cell) if category in out else list(cell)
+        return dict(sorted(out.items()))
+
+    def category_totals(self) -> Dict[str, float]:
+        return {c: cell[SUM] / CENTS_PER_DOLLAR for c, cell in self.by_category().items()}
+
+    def totals(self) -> Tuple[float, Dict[str, float]]:
+        """
+        Same result shape as analysis.calculate_totals.
+        """
+        total_cents = sum(cell[SUM] for cell in self.cells.values())
+        return total_cents / CENTS_PER_DOLLAR, self.category_totals()
+
+    def period_table(self, stat: str = "sum") -> pd.DataFrame:
+        """
+        Period × category table over every period from the first to the
+        last, like RollupCube.rollup. Sums, minimums and maximums are in
+        dollars; counts are transaction counts.
+        """
+        position = {"sum": SUM, "count": COUNT, "min": MIN, "max": MAX}[stat]
+        if not self.cells:
+            return pd.DataFrame()
+
+        series = pd.Series({key: cell[position] for key, cell in self.cells.items()})
+        table = series.unstack(fill_value=0 if stat in ("sum", "count") else np.nan)
+        table.index = pd.PeriodIndex(table.index, freq=self.freq)
+        table = table.reindex(pd.period_range(table.index.min(), table.index.max(), freq=self.freq))
+        if stat in ("sum", "count"):
+            table = table.fillna(0).astype(np.int64)
+        table = table.reindex(columns=sorted(table.columns))
+        return table if stat == "count" else table / CENTS_PER_DOLLAR
+
+    # -----------------------------
+    # Serialization
+    # -----------------------------
+    def to_dict(self) -> dict:
+        periods: Dict[str, Dict[str, List[int]]] = {}
+        for (period, category), cell in sorted(self.cells.items()):
+            periods.setdefault(period, {})[category] = [int(v) for v in cell]
+        return {"version": FORMAT_VERSION, "freq": self.freq, "periods": periods}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PartialAggregate":
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported aggregate format version: {data.get('version')}")
+        cells = {
+            (period, category): [int(v) for v in cell]
+            for period, categories in data.get("periods", {}).items()
+            for category, cell in categories.items()
+        }
+        return cls(data.get("freq", "M"), cells)
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PartialAggregate":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def as_category_totals(category_totals) -> Dict[str, float]:
+    """
+    Category → dollars from a dict or a PartialAggregate.
+    """
+    if isinstance(category_totals, PartialAggregate):
+        return category_totals.category_totals()
+    return category_totals
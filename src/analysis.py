@@ -7,52 +7,168 @@ Performs core financial analysis and aggregation.
 import pandas as pd
 from typing import Dict, Tuple, List, cast
 
+from src.aggregates import PartialAggregate, as_category_totals
+from src.cube import RollupCube
+from src.heavy_hitters import top_k
+from src.schema import CENTS_PER_DOLLAR, amount_cents, to_cents
+from src.storage import TransactionStore
 
 
-def calculate_totals(df: pd.DataFrame) -> Tuple[float, Dict[str, float]]:
+def calculate_totals(df) -> Tuple[float, Dict[str, float]]:
     """
     Calculate total spending and spending by category.
 
+    Amounts are summed as integer cents, so totals carry no float drift.
+    When given a RollupCube, totals are read from the cube instead of
+    scanning rows; a TransactionStore aggregates in the backend (SQL
+    for SQLite), and a PartialAggregate (e.g. merged shards) is read
+    directly.
+
     Parameters
     ----------
-    df : pd.DataFrame
-        Transaction data with 'amount' and 'category' columns.
+    df : pd.DataFrame, RollupCube, TransactionStore or PartialAggregate
+        Transaction data with 'amount_cents' (or 'amount') and
+        'category' columns, or a cube, store or aggregate holding it.
 
     Returns
     -------
     Tuple[float, Dict[str, float]]
         (total_spend, category_totals)
     """
+    if isinstance(df, RollupCube):
+        return df.totals()
+    if isinstance(df, TransactionStore):
+        return df.category_totals()
+    if isinstance(df, PartialAggregate):
+        return df.totals()
+
     if df.empty:
         return 0.0, {}
 
-    total_spend = float(df["amount"].sum())
+    cents = amount_cents(df)
+    total_spend = int(cents.sum()) / CENTS_PER_DOLLAR
 
+    # Categorical groups come out in category order; sort by name like
+    # the cube, SQLite and aggregate paths.
     category_totals = cast(
         Dict[str, float],
-        df.groupby("category")["amount"]
-        .sum()
-        .to_dict()
+        dict(sorted(
+            (cents.groupby(df["category"], observed=True).sum() / CENTS_PER_DOLLAR)
+            .to_dict().items()
+        ))
     )
 
     return total_spend, category_totals
 
 
-def rank_cost_drivers(category_totals: Dict[str, float]) -> List[Tuple[str, float]]:
+def rank_cost_drivers(category_totals: Dict[str, float], k: int = None) -> List[Tuple[str, float]]:
     """
     Rank categories by total spending (highest to lowest).
 
     Parameters
     ----------
-    category_totals : Dict[str, float]
+    category_totals : Dict[str, float] or PartialAggregate
+    k : int, optional
+        Only return the top ``k`` categories, selected with a bounded
+        heap instead of a full sort.
 
     Returns
     -------
     List[Tuple[str, float]]
         Sorted list of (category, amount) tuples.
     """
+    category_totals = as_category_totals(category_totals)
+    if k is not None:
+        return top_k(category_totals, k)
     return sorted(
         category_totals.items(),
         key=lambda item: item[1],
         reverse=True
-    )
\ No newline at end of file
+    )
+
+
+class RunningTotals:
+    """
+    Category totals kept up to date as transactions change.
+
+    Built once from a DataFrame, then adjusted by the amount and category
+    of each added, edited or deleted row, so totals, variances and alerts
+    are available at any point without re-scanning the frame. Amounts are
+    held in integer cents so repeated adjustments do not drift.
+    """
+
+    def __init__(self):
+        self._cents: Dict[str, int] = {}
+        self._counts: Dict[str, int] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "RunningTotals":
+        totals = cls()
+        if df.empty:
+            return totals
+
+        grouped = amount_cents(df).groupby(df["category"], observed=True).agg(["sum", "count"])
+        totals._cents = {cat: int(v) for cat, v in grouped["sum"].items()}
+        totals._counts = {cat: int(v) for cat, v in grouped["count"].items()}
+        return totals
+
+    def add(self, category: str, amount: float):
+        self._cents[category] = self._cents.get(category, 0) + int(to_cents([amount])[0])
+        self._counts[category] = self._counts.get(category, 0) + 1
+
+    def add_frame(self, df: pd.DataFrame):
+        """
+        Add a batch of transactions with one groupby.
+        """
+        if df.empty:
+            return
+        grouped = amount_cents(df).groupby(df["category"], observed=True).agg(["sum", "count"])
+        for category, row in grouped.iterrows():
+            self._cents[category] = self._cents.get(category, 0) + int(row["sum"])
+            self._counts[category] = self._counts.get(category, 0) + int(row["count"])
+
+    def remove(self, category: str, amount: float):
+        self._cents[category] = self._cents.get(category, 0) - int(to_cents([amount])[0])
+        self._counts[category] = self._counts.get(category, 0) - 1
+
+        # A category with no rows left disappears, as it would from a groupby.
+        if self._counts[category] <= 0:
+            del self._cents[category]
+            del self._counts[category]
+
+    def update(self, old_category: str, old_amount: float, new_category: str, new_amount: float):
+        self.remove(old_category, old_amount)
+        self.add(new_category, new_amount)
+
+    def totals(self) -> Tuple[float, Dict[str, float]]:
+        """
+        Same result shape as calculate_totals.
+        """
+        category_totals = {
+            cat: cents / CENTS_PER_DOLLAR for cat, cents in sorted(self._cents.items())
+        }
+        return sum(self._cents.values()) / CENTS_PER_DOLLAR, category_totals
+
+    def variances(self, budgets: Dict[str, float]) -> Dict[str, float]:
+        from src.budget import evaluate_variances
+        return evaluate_variances(self.totals()[1], budgets)
+
+    def alerts(self, budgets: Dict[str, float]) -> List[str]:
+        from src.budget import generate_budget_alerts
+        return generate_budget_alerts(self.totals()[1], budgets)
+
+    def matches(self, df: pd.DataFrame, tolerance: float = 0.005) -> bool:
+        """
+        Check the running totals against a full recomputation.
+        """
+        total_spend, category_totals = calculate_totals(df)
+        live_total, live_categories = self.totals()
+
+        if set(category_totals) != set(live_categories):
+            return False
+        if abs(total_spend - live_total) > tolerance:
+            return False
+        return all(
+            abs(category_totals[cat] - live_categories[cat]) <= tolerance
+            for cat in category_totals
+        )
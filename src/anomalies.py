@@ -3,9 +3,63 @@ anomalies.py
 
 Detects unusual spending patterns by comparing current totals
 against historical averages.
+
+Baselines are computed from the transaction history itself: monthly
+spend per category, with a rolling mean and standard deviation and an
+exponentially weighted mean (EWMA). BaselineState keeps them up to date
+one month at a time so later runs do not recompute the full history.
+
+Individual transactions are checked against per-category quantile
+sketches of past amounts (QuantileState), so one unusually large
+payment stands out even when the category total looks normal.
+
+Both states are stored per data source (see source_state_path) along
+with a digest of the months they have folded in; when those months
+change (backfilled or edited rows), the state is rebuilt.
 """
 
-from typing import Dict, List
+import hashlib
+import json
+import os
+import re
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.aggregates import PartialAggregate
+from src.cube import RollupCube, build_cube
+from src.quantiles import DEFAULT_COMPRESSION, QuantileSketches
+from src.schema import CENTS_PER_DOLLAR, amount_cents
+
+DEFAULT_WINDOW = 3
+DEFAULT_SPAN = 3
+MIN_HISTORY = 2
+
+DEFAULT_QUANTILE = 0.99
+# Fewer amounts than this cannot say what a p99 looks like.
+MIN_OBSERVATIONS = 100
+
+
+def source_state_path(path: Optional[str], source=None) -> Optional[str]:
+    """
+    Per-data-source variant of a state file path, e.g.
+    output/baselines.json → output/baselines-transactions.csv-1a2b3c4d.json
+    (the file name plus a hash of its absolute path), so runs over
+    different data do not share history.
+
+    ``source`` is a data path or a list of them (combined shards).
+    """
+    if not path or not source:
+        return path
+    sources = [source] if isinstance(source, str) else sorted(source)
+    key = "\0".join(os.path.abspath(s) for s in sources)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+    name = os.path.basename(sources[0]) if len(sources) == 1 else "combined"
+    name = re.sub(r"[^\w.-]+", "_", name)
+    root, ext = os.path.splitext(path)
+    return f"{root}-{name}-{digest}{ext}"
 
 
 def detect_spending_anomalies(
@@ -40,4 +94,538 @@ def detect_spending_anomalies(
             )
             alerts.append(alert)
 
-    return alerts
\ No newline at end of file
+    return alerts
+
+
+def monthly_category_totals(data) -> pd.DataFrame:
+    """
+    Month × category spend (dollars) from a DataFrame, RollupCube or
+    monthly PartialAggregate.
+
+    Months without activity in a category are 0.
+    """
+    if isinstance(data, PartialAggregate) and data.freq == "M":
+        return data.period_table("sum")
+    cube = data if isinstance(data, RollupCube) else build_cube(data)
+    if not len(cube.sums):
+        return pd.DataFrame()
+    return cube.rollup("M")
+
+
+def compute_baselines(
+    monthly: pd.DataFrame,
+    window: int = DEFAULT_WINDOW,
+    span: int = DEFAULT_SPAN
+) -> Dict[str, pd.DataFrame]:
+    """
+    Per-category baselines for every month, from prior months only.
+
+    Returns
+    -------
+    dict
+        "mean", "std" (rolling over ``window`` months) and "ewma"
+        (span ``span``), each a month × category DataFrame aligned with
+        ``monthly``. Months without enough history are NaN.
+    """
+    prior = monthly.shift(1)
+    history = monthly.notna().cumsum().shift(1).fillna(0)
+
+    baselines = {
+        "mean": prior.rolling(window, min_periods=MIN_HISTORY).mean(),
+        "std": prior.rolling(window, min_periods=MIN_HISTORY).std(),
+        "ewma": monthly.ewm(span=span, adjust=False).mean().shift(1),
+    }
+    baselines["ewma"] = baselines["ewma"].where(history >= MIN_HISTORY)
+    return baselines
+
+
+def _flag(spend, ewma, std, z_threshold, threshold_pct) -> pd.DataFrame:
+    """
+    Vectorized z-score / percentage test against a baseline.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_score = (spend - ewma) / std.where(std > 0)
+        increase_pct = (spend - ewma) / ewma.where(ewma > 0)
+
+    flagged = (z_score >= z_threshold) | (increase_pct >= threshold_pct)
+    return pd.DataFrame({
+        "spend": spend,
+        "baseline": ewma,
+        "std": std,
+        "z_score": z_score,
+        "increase_pct": increase_pct,
+        "flagged": flagged.fillna(False).astype(bool),
+    })
+
+
+def detect_baseline_anomalies(
+    monthly: pd.DataFrame,
+    z_threshold: float = 2.0,
+    threshold_pct: float = 0.30,
+    window: int = DEFAULT_WINDOW,
+    span: int = DEFAULT_SPAN
+) -> pd.DataFrame:
+    """
+    Flag every category and month whose spend is far above its baseline.
+
+    A month is flagged when its z-score against the rolling standard
+    deviation reaches ``z_threshold`` or its increase over the EWMA
+    reaches ``threshold_pct``.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per flagged (period, category).
+    """
+    if monthly.empty:
+        return pd.DataFrame()
+
+    baselines = compute_baselines(monthly, window, span)
+    stacked = _flag(
+        monthly.stack(future_stack=True),
+        baselines["ewma"].stack(future_stack=True),
+        baselines["std"].stack(future_stack=True),
+        z_threshold,
+        threshold_pct
+    )
+    stacked.index.names = ["period", "category"]
+    return stacked[stacked["flagged"]].drop(columns="flagged")
+
+
+def format_anomaly_alerts(flags: pd.DataFrame) -> List[str]:
+    """
+    Render flagged anomalies as human-readable alerts.
+    """
+    alerts: List[str] = []
+
+    for (period, category), row in flags.iterrows():
+        alert = (
+            "🚨 Unusual Spending Detected:\n"
+            f"Category: {category}\n"
+            f"Period: {period}\n"
+            f"Current Spend: ${row['spend']:,.2f}\n"
+            f"Baseline (EWMA): ${row['baseline']:,.2f}\n"
+        )
+        if pd.notna(row["z_score"]):
+            alert += f"Z-Score: {row['z_score']:.1f}\n"
+        alert += f"This month's spend is {row['increase_pct']:.0%} higher than baseline."
+        alerts.append(alert)
+
+    return alerts
+
+
+class BaselineState:
+    """
+    Per-category monthly baselines maintained incrementally.
+
+    For each category it keeps the EWMA and the last ``window`` monthly
+    totals, so folding in a new month costs O(categories) regardless of
+    how much history has been seen.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, span: int = DEFAULT_SPAN):
+        self.window = window
+        self.span = span
+        self.last_period: Optional[str] = None
+        # monthly_digest of the months up to last_period.
+        self.history_digest: Optional[str] = None
+        self.ewma: Dict[str, float] = {}
+        self.recent: Dict[str, deque] = {}
+        self.months_seen: Dict[str, int] = {}
+
+    def update(self, period, totals: Dict[str, float]):
+        """
+        Fold one completed month of category totals into the baselines.
+        """
+        alpha = 2.0 / (self.span + 1)
+
+        # Known categories without spend this month count as zero.
+        for category in set(self.ewma) | set(totals):
+            value = float(totals.get(category, 0.0))
+            previous = self.ewma.get(category)
+            self.ewma[category] = value if previous is None else alpha * value + (1 - alpha) * previous
+            self.recent.setdefault(category, deque(maxlen=self.window)).append(value)
+            self.months_seen[category] = self.months_seen.get(category, 0) + 1
+
+        self.last_period = str(period)
+
+    def update_from_monthly(self, monthly: pd.DataFrame, before=None):
+        """
+        Fold in every month after last_period (and before ``before``).
+        """
+        for period, row in monthly.iterrows():
+            if self.last_period is not None and str(period) <= self.last_period:
+                continue
+            if before is not None and str(period) >= str(before):
+                continue
+            self.update(period, row.dropna().to_dict())
+
+    def baselines(self) -> pd.DataFrame:
+        """
+        Current EWMA and rolling mean/std per category.
+        """
+        rows = {}
+        for category, values in self.recent.items():
+            if self.months_seen.get(category, 0) < MIN_HISTORY:
+                continue
+            recent = np.array(values, dtype=float)
+            rows[category] = {
+                "ewma": self.ewma[category],
+                "mean": recent.mean(),
+                "std": recent.std(ddof=1) if len(recent) > 1 else np.nan,
+            }
+        return pd.DataFrame.from_dict(rows, orient="index", columns=["ewma", "mean", "std"])
+
+    def detect(
+        self,
+        current_totals: Dict[str, float],
+        period=None,
+        z_threshold: float = 2.0,
+        threshold_pct: float = 0.30
+    ) -> pd.DataFrame:
+        """
+        Flag categories in ``current_totals`` far above their baseline.
+        """
+        base = self.baselines()
+        if base.empty:
+            return pd.DataFrame()
+
+        spend = pd.Series(current_totals, dtype=float).reindex(base.index)
+        flags = _flag(spend, base["ewma"], base["std"], z_threshold, threshold_pct)
+        flags.index = pd.MultiIndex.from_product([[str(period)], flags.index], names=["period", "category"])
+        return flags[flags["flagged"]].drop(columns="flagged")
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def to_dict(self) -> dict:
+        return {
+            "window": self.window,
+            "span": self.span,
+            "last_period": self.last_period,
+            "history_digest": self.history_digest,
+            "ewma": self.ewma,
+            "recent": {cat: list(values) for cat, values in self.recent.items()},
+            "months_seen": self.months_seen,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BaselineState":
+        state = cls(data.get("window", DEFAULT_WINDOW), data.get("span", DEFAULT_SPAN))
+        state.last_period = data.get("last_period")
+        state.history_digest = data.get("history_digest")
+        state.ewma = dict(data.get("ewma", {}))
+        state.recent = {
+            cat: deque(values, maxlen=state.window)
+            for cat, values in data.get("recent", {}).items()
+        }
+        state.months_seen = dict(data.get("months_seen", {}))
+        return state
+
+
+def monthly_digest(monthly: pd.DataFrame, through: Optional[str]) -> Optional[str]:
+    """
+    Digest of the monthly totals (in cents) up to and including period
+    ``through``; categories without spend in those months are left out.
+    """
+    if through is None:
+        return None
+    folded = monthly[[str(period) <= through for period in monthly.index]].fillna(0)
+    folded = folded.loc[:, (folded != 0).any()].sort_index(axis=1)
+    cents = np.round(folded.to_numpy(dtype=float) * CENTS_PER_DOLLAR).astype(np.int64)
+
+    digest = hashlib.sha1()
+    digest.update("\0".join(map(str, folded.index)).encode("utf-8"))
+    digest.update(b"\1" + "\0".join(map(str, folded.columns)).encode("utf-8"))
+    digest.update(cents.tobytes())
+    return digest.hexdigest()
+
+
+def load_baseline_state(path: str = "output/baselines.json") -> BaselineState:
+    """
+    Load stored baselines, or start fresh if none exist.
+    """
+    if not os.path.exists(path):
+        return BaselineState()
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return BaselineState.from_dict(json.load(f))
+    except (OSError, ValueError) as e:
+        print(f"⚠ Error loading baselines: {e}. Rebuilding from history.")
+        return BaselineState()
+
+
+def save_baseline_state(state: BaselineState, path: str = "output/baselines.json"):
+    """
+    Persist baselines for the next run.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state.to_dict(), f, indent=2)
+
+
+def detect_current_anomalies(
+    data,
+    state_path: Optional[str] = "output/baselines.json",
+    z_threshold: float = 2.0,
+    threshold_pct: float = 0.30
+) -> List[str]:
+    """
+    Check the latest month against stored baselines and update them.
+
+    Completed months not yet folded into the stored baselines are added
+    first; the latest (current) month is only compared, not stored.
+    If months already folded in have changed since, or the history
+    no longer extends past them, the baselines are rebuilt from it. With ``state_path=None`` baselines
+    are built from the full history and not saved.
+    """
+    monthly = monthly_category_totals(data)
+    if monthly.empty:
+        return []
+
+    state = load_baseline_state(state_path) if state_path else BaselineState()
+    current_period = monthly.index[-1]
+    last = state.last_period
+    if last is not None and (last >= str(current_period) or state.history_digest != monthly_digest(monthly, last)):
+        print("🔄 Stored baselines no longer match the transaction history; rebuilding them")
+        state = BaselineState(state.window, state.span)
+
+    state.update_from_monthly(monthly, before=current_period)
+    state.history_digest = monthly_digest(monthly, state.last_period)
+    if state_path:
+        save_baseline_state(state, state_path)
+
+    flags = state.detect(
+        monthly.iloc[-1].to_dict(),
+        current_period,
+        z_threshold=z_threshold,
+        threshold_pct=threshold_pct
+    )
+    return format_anomaly_alerts(flags)
+
+
+class QuantileState:
+    """
+    Per-category amount sketches over completed months.
+
+    Like BaselineState, months up to ``last_period`` have been folded
+    in, together with a digest of their rows (see RowDigest) that tells
+    later runs whether those months are unchanged.
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.last_period: Optional[str] = None
+        self.history_digest: Optional[str] = None
+        self.sketches = QuantileSketches(compression)
+
+    def to_dict(self) -> dict:
+        return {
+            "last_period": self.last_period,
+            "history_digest": self.history_digest,
+            "sketches": self.sketches.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileState":
+        state = cls()
+        state.last_period = data.get("last_period")
+        state.history_digest = data.get("history_digest")
+        state.sketches = QuantileSketches.from_dict(data.get("sketches", {}))
+        return state
+
+
+class RowDigest:
+    """
+    Order-independent digest of (month, category, cents) rows: a row
+    count and the wrapping sum of per-row hashes, so chunks can be
+    added in any order and split at any row.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.total = np.uint64(0)
+
+    def add(self, df: pd.DataFrame, months: np.ndarray):
+        if df.empty:
+            return
+        hashes = pd.util.hash_pandas_object(pd.DataFrame({
+            "month": months.astype(np.int64),
+            "category": df["category"].astype(str).to_numpy(),
+            "cents": amount_cents(df).to_numpy(dtype=np.int64),
+        }), index=False).to_numpy()
+        self.rows += len(df)
+        self.total = np.add(self.total, hashes.sum(dtype=np.uint64), dtype=np.uint64)
+
+    def merge(self, other: "RowDigest") -> "RowDigest":
+        merged = RowDigest()
+        merged.rows = self.rows + other.rows
+        merged.total = np.add(self.total, other.total, dtype=np.uint64)
+        return merged
+
+    def hexdigest(self) -> str:
+        return f"{self.rows}:{int(self.total):016x}"
+
+
+def load_quantile_state(path: str = "output/quantiles.json") -> QuantileState:
+    """
+    Load stored quantile sketches, or start fresh if none exist.
+    """
+    if not os.path.exists(path):
+        return QuantileState()
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return QuantileState.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠ Error loading quantile sketches: {e}. Rebuilding from history.")
+        return QuantileState()
+
+
+def save_quantile_state(state: QuantileState, path: str = "output/quantiles.json"):
+    """
+    Persist quantile sketches for the next run.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state.to_dict(), f)
+
+
+class OutlierScan:
+    """
+    One-pass search for transactions above a per-category quantile.
+
+    Chunks are fed to ``update`` as they are read. Rows are sketched
+    and digested per month, and rows from the latest month are kept as
+    candidates. ``finish`` compares the months already in the stored
+    state with its digest (rebuilding the state from this pass's
+    sketches if they changed or reach the latest month), folds completed months into it and flags
+    the candidates above the quantile of history plus the latest month.
+    """
+
+    def __init__(
+        self,
+        state: QuantileState,
+        quantile: float = DEFAULT_QUANTILE,
+        min_count: int = MIN_OBSERVATIONS
+    ):
+        self.state = state
+        self.quantile = quantile
+        self.min_count = min_count
+        self.pending: Dict[str, QuantileSketches] = {}
+        self.pending_digests: Dict[str, RowDigest] = {}
+        self.latest: Optional[str] = None
+        self.candidates: List[pd.DataFrame] = []
+
+    def update(self, df: pd.DataFrame):
+        if df.empty:
+            return
+
+        months = df["date"].to_numpy().astype("datetime64[M]")
+        for month in np.unique(months):
+            period, in_month = str(month), months == month
+            self.pending.setdefault(period, QuantileSketches(self.state.sketches.compression)).update_frame(df[in_month])
+            self.pending_digests.setdefault(period, RowDigest()).add(df[in_month], months[in_month])
+
+        latest = str(months.max())
+        if self.latest is None or latest > self.latest:
+            self.latest, self.candidates = latest, []
+        elif latest < self.latest:
+            return
+
+        # Thresholds are only known once every chunk is in (and the
+        # state may be rebuilt), so the whole latest month is kept.
+        self.candidates.append(df[months == np.datetime64(self.latest, "M")])
+
+    def _digest(self, through: Optional[str]) -> Optional[str]:
+        """
+        RowDigest of the months seen up to and including ``through``.
+        """
+        if through is None:
+            return None
+        digest = RowDigest()
+        for period, month_digest in self.pending_digests.items():
+            if period <= through:
+                digest = digest.merge(month_digest)
+        return digest.hexdigest()
+
+    def finish(self, state_path: Optional[str] = "output/quantiles.json") -> pd.DataFrame:
+        """
+        Fold completed months into the state, save it, and return the
+        flagged transactions of the latest month, largest first.
+        """
+        if self.latest is None:
+            return pd.DataFrame()
+
+        # The stored state must cover only months before the latest one,
+        # exactly as they are now (e.g. not after the latest month was
+        # deleted or an older file is read).
+        last = self.state.last_period
+        if last is not None and (last >= self.latest or self.state.history_digest != self._digest(last)):
+            print("🔄 Stored quantile sketches no longer match the data; rebuilding them")
+            self.state = QuantileState(self.state.sketches.compression)
+
+        for period in sorted(self.pending):
+            if period < self.latest and (self.state.last_period is None or period > self.state.last_period):
+                self.state.sketches = self.state.sketches.merge(self.pending[period])
+                self.state.last_period = period
+        self.state.history_digest = self._digest(self.state.last_period)
+        if state_path:
+            save_quantile_state(self.state, state_path)
+
+        reference = self.state.sketches.merge(self.pending[self.latest])
+        thresholds = reference.thresholds(self.quantile, self.min_count)
+        candidates = pd.concat(self.candidates) if self.candidates else pd.DataFrame()
+        if candidates.empty or not thresholds:
+            return pd.DataFrame()
+
+        limit = candidates["category"].astype(object).map(thresholds).astype(float).to_numpy()
+        cents = amount_cents(candidates).to_numpy()
+        flagged = ~np.isnan(limit) & (cents > np.nan_to_num(limit))
+        return pd.DataFrame({
+            "period": self.latest,
+            "date": candidates["date"].to_numpy(),
+            "description": candidates["description"].astype(object).to_numpy(),
+            "category": candidates["category"].astype(object).to_numpy(),
+            "amount": cents / CENTS_PER_DOLLAR,
+            "threshold": limit / CENTS_PER_DOLLAR,
+        }, index=candidates.index)[flagged].sort_values("amount", ascending=False)
+
+
+def format_outlier_alerts(flags: pd.DataFrame, quantile: float = DEFAULT_QUANTILE) -> List[str]:
+    """
+    Render flagged transactions as human-readable alerts.
+    """
+    label = f"p{quantile * 100:g}"
+    alerts: List[str] = []
+
+    for _, row in flags.iterrows():
+        alerts.append(
+            "🚨 Unusually Large Transaction:\n"
+            f"Date: {pd.Timestamp(row['date']).date()}\n"
+            f"Category: {row['category']}\n"
+            f"Description: {row['description']}\n"
+            f"Amount: ${row['amount']:,.2f} ({label} for {row['category']}: ${row['threshold']:,.2f})"
+        )
+
+    return alerts
+
+
+def detect_outlier_transactions(
+    df: pd.DataFrame,
+    state_path: str = "output/quantiles.json",
+    quantile: float = DEFAULT_QUANTILE
+) -> List[str]:
+    """
+    Flag the latest month's transactions above the per-category
+    quantile, updating the stored sketches with completed months.
+    """
+    scan = OutlierScan(load_quantile_state(state_path), quantile)
+    scan.update(df)
+    return format_outlier_alerts(scan.finish(state_path), quantile)
@@ -1,12 +1,219 @@
-from datetime import datetime
+"""
+audit_logger.py
+
+Buffered, structured audit logging.
+
+AuditSink collects records in memory and writes them in batches (on a
+size threshold, from an optional background thread, or at exit), so
+audit I/O does not grow with the number of records. Files can be CSV,
+JSONL or plain text, and are rotated by size or by date. Records are
+stamped with the time they are logged (one clock read per batch).
+"""
+
+import atexit
+import csv
+import json
 import os
+import threading
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+_RUN_TIMESTAMP: Optional[datetime] = None
+_SINKS: Dict[str, "AuditSink"] = {}
+
+
+def run_timestamp() -> datetime:
+    """
+    Start of the current run (fixed at first use), for grouping files
+    written by one run; records carry the time they are logged.
+    """
+    global _RUN_TIMESTAMP
+    if _RUN_TIMESTAMP is None:
+        _RUN_TIMESTAMP = datetime.now()
+    return _RUN_TIMESTAMP
+
+
+class AuditSink:
+    """
+    Batching writer for one audit file.
+
+    Args:
+        path (str): Audit file path
+        fmt (str): "csv", "jsonl" or "text"
+        fieldnames (list): CSV columns (default: keys of the first record)
+        formatter (callable): Record → line, for the "text" format
+        batch_size (int): Flush once this many records are buffered
+        flush_interval (float): Seconds between background flushes (None: no thread)
+        max_bytes (int): Rotate once the file would exceed this size
+        rotate_daily (bool): Rotate when the file was last written on an earlier day
+        backups (int): Rotated files to keep
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fmt: str = "csv",
+        fieldnames: Optional[List[str]] = None,
+        formatter: Optional[Callable[[dict], str]] = None,
+        batch_size: int = 1000,
+        flush_interval: Optional[float] = None,
+        max_bytes: Optional[int] = 10 * 1024 * 1024,
+        rotate_daily: bool = False,
+        backups: int = 5
+    ):
+        if fmt not in ("csv", "jsonl", "text"):
+            raise ValueError(f"Unsupported audit format: {fmt}")
+
+        self.path = path
+        self.fmt = fmt
+        self.fieldnames = fieldnames
+        self.formatter = formatter or (lambda record: json.dumps(record, default=str))
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.backups = backups
+
+        self._buffer: List[dict] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        if flush_interval:
+            self._thread = threading.Thread(
+                target=self._flush_periodically, args=(flush_interval,), daemon=True
+            )
+            self._thread.start()
+
+        atexit.register(self.close)
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+    def write(self, record: dict):
+        self.write_many([record])
+
+    def write_many(self, records: List[dict]):
+        with self._lock:
+            self._buffer.extend(records)
+            should_flush = len(self._buffer) >= self.batch_size
+
+        if should_flush:
+            self.flush()
+
+    def _serialize(self, records: List[dict]) -> str:
+        if self.fmt == "jsonl":
+            return "".join(json.dumps(r, default=str) + "\n" for r in records)
+        return "".join(self.formatter(r) + "\n" for r in records)
+
+    def flush(self):
+        """
+        Write all buffered records with a single open/append.
+        """
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            if not records:
+                return
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            if self.fmt == "csv":
+                self._flush_csv(records)
+            else:
+                payload = self._serialize(records)
+                self._rotate_if_needed(len(payload.encode("utf-8")))
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(payload)
+
+    def _flush_csv(self, records: List[dict]):
+        if self.fieldnames is None:
+            self.fieldnames = list(records[0].keys())
+
+        # Rough size estimate; exact CSV size is only known after writing.
+        estimate = sum(len(",".join(str(v) for v in r.values())) + 1 for r in records)
+        self._rotate_if_needed(estimate)
+
+        write_header = not os.path.isfile(self.path)
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames, extrasaction="ignore")
+            if write_header:
+                writer.writeheader()
+            writer.writerows(records)
+
+    # -----------------------------
+    # Rotation
+    # -----------------------------
+    def _rotate_if_needed(self, incoming_bytes: int):
+        if not os.path.isfile(self.path):
+            return
+
+        stat = os.stat(self.path)
+        if self.rotate_daily:
+            written = datetime.fromtimestamp(stat.st_mtime).date()
+            if written < date.today():
+                self._rotate(f"{self.path}.{written.isoformat()}")
+                return
+
+        if self.max_bytes and stat.st_size + incoming_bytes > self.max_bytes:
+            for i in range(self.backups - 1, 0, -1):
+                older = f"{self.path}.{i}"
+                if os.path.exists(older):
+                    os.replace(older, f"{self.path}.{i + 1}")
+            self._rotate(f"{self.path}.1")
+
+    def _rotate(self, target: str):
+        os.replace(self.path, target)
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def _flush_periodically(self, interval: float):
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.flush()
+
+
+def get_sink(path: str, **options) -> AuditSink:
+    """
+    Return the shared sink for ``path``, creating it on first use.
+    """
+    sink = _SINKS.get(path)
+    if sink is None:
+        sink = AuditSink(path, **options)
+        _SINKS[path] = sink
+    return sink
+
+
+def flush_all():
+    """
+    Flush every open sink (also happens automatically at exit).
+    """
+    for sink in _SINKS.values():
+        sink.flush()
+
+
+def _format_run_line(record: dict) -> str:
+    return (
+        f"[{record['timestamp']}] "
+        f"Transactions={record['transactions']}, "
+        f"TotalSpend=${record['total_spend']:,.2f}, "
+        f"EfficiencyScore={record['efficiency_score']}"
+    )
 
 
 def log_run(
     transactions_count: int,
     total_spend: float,
     efficiency_score: int,
-    log_path: str = "output/audit_logs/audit.log"
+    log_path: str = "output/audit_logs/audit.log",
+    fmt: str = "text"
 ):
     """
     Append a run summary to the audit log.
@@ -16,18 +223,12 @@ def log_run(
         total_spend (float): Total spending amount
         efficiency_score (int): Efficiency score (0–100)
         log_path (str): Path to audit log file
+        fmt (str): "text" (default) or "jsonl"
     """
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    log_entry = (
-        f"[{timestamp}] "
-        f"Transactions={transactions_count}, "
-        f"TotalSpend=${total_spend:,.2f}, "
-        f"EfficiencyScore={efficiency_score}\n"
-    )
-
-    with open(log_path, "a") as f:
-        f.write(log_entry)
-
+    sink = get_sink(log_path, fmt=fmt, formatter=_format_run_line)
+    sink.write({
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "transactions": transactions_count,
+        "total_spend": total_spend,
+        "efficiency_score": efficiency_score
+    })
@@ -1,15 +1,30 @@
-import csv
 import os
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 """
 budget.py
 
 Handles budget variance evaluation and alert generation.
+
+Single-entity budgets are a flat category → budget dict. For fleets,
+entity × category (optionally × period) budgets are evaluated for every
+entity in one vectorized join/compare pass.
 """
 
-from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+from src.aggregates import as_category_totals
+from src.audit_logger import get_sink
+from src.schema import CENTS_PER_DOLLAR, amount_cents
+
+# Overspend ratios at which severity steps up (see determine_severity).
+LOW_SEVERITY_MAX = 0.10
+MEDIUM_SEVERITY_MAX = 0.25
+
+# Entity value in a budget file that applies to every entity.
+ALL_ENTITIES = "*"
 
 
 def evaluate_variances(
@@ -21,11 +36,14 @@ def evaluate_variances(
 
     Variance = actual spend - budget
 
+    ``category_totals`` may also be a (merged) PartialAggregate.
+
     Returns
     -------
     dict
         Category → variance
     """
+    category_totals = as_category_totals(category_totals)
     variances = {}
 
     for category, actual in category_totals.items():
@@ -47,7 +65,10 @@ def generate_budget_alerts(
 
     Positive variance indicates overspending.
     Negative variance indicates underspending.
+
+    ``category_totals`` may also be a (merged) PartialAggregate.
     """
+    category_totals = as_category_totals(category_totals)
     alerts = []
 
     for category, actual in category_totals.items():
@@ -77,38 +98,57 @@ def log_budget_alerts(
     category_totals: dict,
     budgets: dict,
     log_dir: str = "output/audit_logs",
-    log_file: str = "budget_alerts.csv"
+    log_file: str = "budget_alerts.csv",
+    fmt: str = "csv"
 ):
     """
-    Log budget overruns with severity to a CSV audit log.
-    """
-    import csv
-    import os
-    from datetime import datetime
-
-    os.makedirs(log_dir, exist_ok=True)
-    path = os.path.join(log_dir, log_file)
+    Log budget overruns with severity to the audit log.
 
-    file_exists = os.path.isfile(path)
-
-    with open(path, mode="a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
+    Alerts are handed to a buffered audit sink in one batch, stamped
+    with the time they are logged. Use ``fmt="jsonl"`` for structured JSON lines.
+    """
+    timestamp = datetime.now().isoformat()
+    records = []
 
-        if not file_exists:
-            writer.writerow(["timestamp", "category", "variance", "severity"])
+    for category, actual in category_totals.items():
+        budget = budgets.get(category, 0)
+        diff = actual - budget
+
+        if diff > 0:
+            records.append({
+                "timestamp": timestamp,
+                "category": category,
+                "variance": round(diff, 2),
+                "severity": determine_severity(actual, budget)
+            })
+
+    if records:
+        get_sink(
+            os.path.join(log_dir, log_file),
+            fmt=fmt,
+            fieldnames=["timestamp", "category", "variance", "severity"]
+        ).write_many(records)
+
+
+def log_entity_alerts(
+    alerts: pd.DataFrame,
+    log_dir: str = "output/audit_logs",
+    log_file: str = "entity_budget_alerts.csv",
+    fmt: str = "csv"
+):
+    """
+    Log entity-level budget alerts (from generate_entity_alerts) in one batch.
+    """
+    if alerts.empty:
+        return
 
-        for category, actual in category_totals.items():
-            budget = budgets.get(category, 0)
-            diff = actual - budget
+    columns = [c for c in ("entity", "category", "period", "variance", "severity") if c in alerts.columns]
+    records = alerts[columns].assign(
+        timestamp=datetime.now().isoformat(),
+        variance=alerts["variance"].round(2)
+    )[["timestamp"] + columns].to_dict("records")
 
-            if diff > 0:
-                severity = determine_severity(actual, budget)
-                writer.writerow([
-                    datetime.now().isoformat(),
-                    category,
-                    round(diff, 2),
-                    severity
-                ])
+    get_sink(os.path.join(log_dir, log_file), fmt=fmt, fieldnames=["timestamp"] + columns).write_many(records)
 
 
 
@@ -121,9 +161,131 @@ def determine_severity(actual: float, budget: float) -> str:
 
     overspend_pct = (actual - budget) / budget
 
-    if overspend_pct <= 0.10:
+    if overspend_pct <= LOW_SEVERITY_MAX:
         return "LOW"
-    elif overspend_pct <= 0.25:
+    elif overspend_pct <= MEDIUM_SEVERITY_MAX:
         return "MEDIUM"
     else:
         return "HIGH"
+
+
+def severity_levels(actual: np.ndarray, budget: np.ndarray) -> np.ndarray:
+    """
+    Vectorized determine_severity over arrays of actuals and budgets.
+    """
+    actual = np.asarray(actual, dtype=float)
+    budget = np.asarray(budget, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overspend_pct = np.where(budget > 0, (actual - budget) / budget, np.inf)
+
+    return np.select(
+        [overspend_pct <= LOW_SEVERITY_MAX, overspend_pct <= MEDIUM_SEVERITY_MAX],
+        ["LOW", "MEDIUM"],
+        default="HIGH"
+    )
+
+
+def entity_category_totals(
+    df: pd.DataFrame,
+    entity_col: str = "entity",
+    period: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Actual spend per entity × category (× period).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Cleaned, categorized transactions with an entity column
+        (e.g. a truck ID, or 'source_file' for per-truck exports).
+    entity_col : str
+        Column identifying the entity.
+    period : str, optional
+        Pandas period alias (e.g. "M") to also split by period.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns: entity, category, [period,] actual.
+    """
+    keys = [df[entity_col].rename("entity"), df["category"].rename("category")]
+    if period is not None:
+        keys.append(df["date"].dt.to_period(period).astype(str).rename("period"))
+
+    cents = amount_cents(df).groupby(keys, observed=True).sum()
+    totals = (cents / CENTS_PER_DOLLAR).rename("actual").reset_index()
+    totals["entity"] = totals["entity"].astype(str)
+    totals["category"] = totals["category"].astype(str)
+    return totals
+
+
+def evaluate_entity_variances(
+    actuals: pd.DataFrame,
+    budgets: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Compute variances and severities for every entity in one pass.
+
+    Budgets are matched on entity and category (and period, when both
+    frames have one). Budget rows whose entity is "*" apply to any
+    entity without its own budget for that category; repeated rows
+    for the same key are summed. Budgeted categories with no spend
+    appear with an actual of 0.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns: entity, category, [period,] actual, budget, variance,
+        overspend_pct, severity, over_budget.
+    """
+    keys = ["entity", "category"]
+    if "period" in actuals.columns and "period" in budgets.columns:
+        keys.append("period")
+
+    # Repeated budget rows for the same key add up.
+    budgets = budgets.astype({"entity": str, "category": str}).groupby(
+        keys, as_index=False, sort=False, dropna=False
+    )["budget"].sum()
+    specific = budgets[budgets["entity"] != ALL_ENTITIES]
+    shared = budgets[budgets["entity"] == ALL_ENTITIES].drop(columns="entity")
+
+    merged = actuals.merge(specific, on=keys, how="outer", validate="many_to_one")
+
+    # Fill gaps from "*" budgets by category (and period).
+    if not shared.empty:
+        shared_keys = [k for k in keys if k != "entity"]
+        merged = merged.merge(
+            shared.rename(columns={"budget": "shared_budget"}),
+            on=shared_keys, how="left", validate="many_to_one"
+        )
+        merged["budget"] = merged["budget"].fillna(merged.pop("shared_budget"))
+
+    merged["actual"] = merged["actual"].fillna(0.0)
+    merged["budget"] = merged["budget"].fillna(0.0)
+    merged["variance"] = merged["actual"] - merged["budget"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        merged["overspend_pct"] = np.where(
+            merged["budget"] > 0, merged["variance"] / merged["budget"], np.nan
+        )
+
+    merged["over_budget"] = merged["variance"] > 0
+    merged["severity"] = np.where(
+        merged["over_budget"],
+        severity_levels(merged["actual"], merged["budget"]),
+        ""
+    )
+
+    return merged.sort_values(keys, ignore_index=True)
+
+
+def generate_entity_alerts(variances: pd.DataFrame) -> pd.DataFrame:
+    """
+    Over-budget rows with a defined budget, most severe first.
+    """
+    alerts = variances[variances["over_budget"] & (variances["budget"] > 0)]
+    rank = alerts["severity"].map({"HIGH": 0, "MEDIUM": 1, "LOW": 2})
+    return alerts.assign(_rank=rank).sort_values(
+        ["_rank", "variance"], ascending=[True, False]
+    ).drop(columns="_rank").reset_index(drop=True)
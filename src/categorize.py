@@ -1,6 +1,14 @@
+import re
+import numpy as np
 import pandas as pd
-import yaml
-import os
+
+from src.config_cache import get_config, read_yaml
+from src.rules_engine import (
+    apply_predicate_rules,
+    compile_predicate_rules
+)
+
+DEFAULT_CATEGORY = "Other"
 
 
 def load_rules(path="config/rules.yml"):
@@ -17,20 +25,136 @@ def load_rules(path="config/rules.yml"):
     dict
         Dictionary mapping categories to keyword lists.
     """
-    if not os.path.exists(path):
+    try:
+        return get_config(path, _read_keyword_rules)
+    except FileNotFoundError:
         print("⚠ Rules file not found. Using default empty rules.")
         return {}
+    except Exception as e:
+        print(f"⚠ Error loading rules: {e}")
+        return {}
+
+
+def _read_keyword_rules(path):
+    return read_yaml(path).get("rules") or {}
+
+
+def _compile_rules_file(path):
+    config = read_yaml(path)
+    return (
+        compile_rules(config.get("rules") or {}),
+        compile_predicate_rules(config.get("predicate_rules") or [])
+    )
 
+
+def load_compiled_rules(path="config/rules.yml"):
+    """
+    Return (KeywordMatcher, predicate rules) compiled from a rules file.
+
+    The compiled result is cached until the file changes, so repeated
+    auto_categorize calls do not re-read or re-compile the rules.
+    """
     try:
-        with open(path, "r") as file:
-            rules = yaml.safe_load(file)
-            return rules.get("rules", {})
+        return get_config(path, _compile_rules_file)
+    except FileNotFoundError:
+        print("⚠ Rules file not found. Using default empty rules.")
+        return compile_rules({}), []
     except Exception as e:
         print(f"⚠ Error loading rules: {e}")
-        return {}
+        return compile_rules({}), []
+
 
+class KeywordMatcher:
+    """
+    Categorizer compiled once from the keyword rules.
 
-def auto_categorize(df: pd.DataFrame, rules_path="config/rules.yml") -> pd.DataFrame:
+    All keywords are folded into a single regex wrapped in a lookahead,
+    so one scan of a description reports, at every position, the
+    highest-priority keyword starting there. The winning category is the
+    one declared first in rules.yml among all keywords found, which is
+    exactly what the nested keyword loop used to return.
+    """
+
+    def __init__(self, rules: dict):
+        self.categories = list(rules.keys())
+        self._priority = {}
+
+        keywords = []
+        for rank, (category, info) in enumerate(rules.items()):
+            for keyword in (info or {}).get("keywords", []):
+                keyword = str(keyword).lower()
+                if keyword not in self._priority:
+                    self._priority[keyword] = rank
+                    keywords.append(keyword)
+
+        # Alternatives are ordered by category rank so the regex prefers
+        # the earliest category whenever two keywords start at one position.
+        keywords.sort(key=lambda kw: self._priority[kw])
+        if keywords:
+            alternation = "|".join(re.escape(kw) for kw in keywords)
+            self._pattern = re.compile(f"(?=({alternation}))")
+        else:
+            self._pattern = None
+
+    def _rank(self, desc) -> int:
+        """
+        Index into self.categories of the winning category, or -1.
+        """
+        if self._pattern is None:
+            return -1
+
+        best = -1
+        for found in self._pattern.finditer(str(desc).lower()):
+            rank = self._priority[found.group(1)]
+            if best < 0 or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        return best
+
+    def match(self, desc) -> str:
+        """
+        Return the category for a single description.
+        """
+        rank = self._rank(desc)
+        return DEFAULT_CATEGORY if rank < 0 else self.categories[rank]
+
+    def categorize(self, descriptions: pd.Series) -> pd.Series:
+        """
+        Categorize a column of descriptions.
+
+        Each distinct description is matched once and the result is
+        broadcast back to every row that shares it. The result uses the
+        pandas 'category' dtype.
+        """
+        names = list(dict.fromkeys(self.categories + [DEFAULT_CATEGORY]))
+        fallback = names.index(DEFAULT_CATEGORY)
+
+        codes, uniques = pd.factorize(descriptions, use_na_sentinel=False)
+        ranks = np.array([self._rank(desc) for desc in uniques], dtype=np.int64)
+        labels = np.where(ranks < 0, fallback, ranks)
+
+        # Category names can repeat "Other"; map ranks onto unique names.
+        name_codes = np.array([names.index(name) for name in self.categories] + [fallback])
+        label_codes = name_codes[labels] if len(labels) else labels
+
+        categorical = pd.Categorical.from_codes(label_codes[codes], categories=names)
+        return pd.Series(categorical, index=descriptions.index)
+
+
+def compile_rules(rules: dict) -> KeywordMatcher:
+    """
+    Build a KeywordMatcher from the dictionary returned by load_rules.
+    """
+    return KeywordMatcher(rules)
+
+
+def auto_categorize(
+    df: pd.DataFrame,
+    rules_path="config/rules.yml",
+    matcher: KeywordMatcher = None,
+    predicate_rules: list = None
+) -> pd.DataFrame:
     """
     Auto-assign categories to transactions based on rules keywords.
 
@@ -40,6 +164,12 @@ def auto_categorize(df: pd.DataFrame, rules_path="config/rules.yml") -> pd.DataF
         DataFrame with transactions. Must contain 'description' column.
     rules_path : str
         Path to YAML rules file.
+    matcher : KeywordMatcher, optional
+        Pre-compiled matcher. Taken from the cached compilation of
+        ``rules_path`` when omitted.
+    predicate_rules : list, optional
+        Compiled predicate rules (see rules_engine). Taken from
+        ``rules_path`` when omitted; matches override keyword results.
 
     Returns
     -------
@@ -49,17 +179,10 @@ def auto_categorize(df: pd.DataFrame, rules_path="config/rules.yml") -> pd.DataF
     if df.empty:
         return df
 
-    rules = load_rules(rules_path)
-
-    def assign_category(desc: str) -> str:
-        desc_lower = str(desc).lower()
-        for category, info in rules.items():
-            for keyword in info.get("keywords", []):
-                if keyword.lower() in desc_lower:
-                    return category
-        return "Other"  # default if no match
-
-    df["category"] = df["description"].apply(assign_category)
-    return df
-
+    if matcher is None or predicate_rules is None:
+        cached_matcher, cached_predicates = load_compiled_rules(rules_path)
+        matcher = cached_matcher if matcher is None else matcher
+        predicate_rules = cached_predicates if predicate_rules is None else predicate_rules
 
+    df["category"] = matcher.categorize(df["description"])
+    return apply_predicate_rules(df, predicate_rules)
@@ -0,0 +1,586 @@
+"""
+cli.py
+
+Headless batch entry point for scripts and cron.
+
+    python main.py                      # interactive menu (default)
+    python main.py analyze [options]    # full pipeline, no prompts
+    python main.py report               # print the last analysis summary
+    python main.py import SOURCE        # merge new exports into the data file
+    python main.py export OUTPUT        # write the data file (CSV or SQLite) to CSV
+    python main.py serve                # local analytics daemon (JSON over HTTP)
+    python main.py aggregate SOURCE     # shard → mergeable partial aggregate (JSON)
+    python main.py combine A.json ...   # merge shard aggregates and analyze them
+
+Only the standard library is imported at module level; pandas and the
+pipeline modules are imported inside the commands that need them, so
+`--help` and `report` (which reads the cached summary JSON) return
+without loading them.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+DEFAULT_DATA = "data/transactions.csv"
+DEFAULT_RULES = "config/rules.yml"
+DEFAULT_BUDGETS = "config/budgets.csv"
+DEFAULT_SUMMARY = "output/reports/summary.json"
+DEFAULT_REJECTS = "output/rejects/rejected_transactions.csv"
+DEFAULT_TOP_VENDORS = 3
+DEFAULT_OUTLIER_QUANTILE = 0.99
+
+_STARTED = time.perf_counter()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Expense Tracker. Runs the interactive menu when no command is given."
+    )
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="suppress progress and report output (--json output is still printed)")
+    parser.add_argument("--timing", action="store_true",
+                        help="print elapsed time to stderr")
+    parser.add_argument("--instrument", action="store_true",
+                        help="record per-stage time, rows and memory to the audit log")
+    parser.add_argument("--profile", metavar="STAGE", default=None,
+                        help="also capture cProfile/tracemalloc for one stage (implies --instrument)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="recompute everything instead of reusing output/cache")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    interactive = commands.add_parser("interactive", help="interactive add/edit/delete menu (default)")
+    interactive.add_argument("--debug", action="store_true", help="print path and data checks")
+    interactive.add_argument("--data", default=DEFAULT_DATA,
+                             help="transaction CSV or SQLite database (default: %(default)s)")
+
+    analyze = commands.add_parser("analyze", help="run the full analysis without prompts")
+    analyze.add_argument("--data", default=DEFAULT_DATA,
+                         help="transaction CSV, SQLite database, directory of CSVs, or glob "
+                              "(default: %(default)s)")
+    analyze.add_argument("--rules", default=DEFAULT_RULES)
+    analyze.add_argument("--budgets", default=DEFAULT_BUDGETS)
+    analyze.add_argument("--summary", default=DEFAULT_SUMMARY,
+                         help="where to write the JSON summary (default: %(default)s)")
+    analyze.add_argument("--rejects", default=DEFAULT_REJECTS,
+                         help="side file for rejected rows (default: %(default)s)")
+    analyze.add_argument("--stream", action="store_true",
+                         help="process a single large file in bounded chunks")
+    analyze.add_argument("--chunk-rows", type=int, default=None)
+    analyze.add_argument("--memory-mb", type=float, default=None,
+                         help="approximate memory per chunk in streaming mode")
+    analyze.add_argument("--workers", type=int, default=None,
+                         help="worker processes for directory/glob input")
+    analyze.add_argument("--top-vendors", type=int, default=DEFAULT_TOP_VENDORS, metavar="N",
+                         help="top vendors shown per category (0 to skip)")
+    analyze.add_argument("--outlier-quantile", type=float, default=DEFAULT_OUTLIER_QUANTILE, metavar="Q",
+                         help="flag transactions above this per-category quantile (default 0.99)")
+    analyze.add_argument("--entity-budgets", default=None, metavar="CSV",
+                         help="also check entity × category (× period) budgets, e.g. per truck")
+    analyze.add_argument("--entity-column", default=None, metavar="COLUMN",
+                         help="column naming the entity (default: 'entity', else the source file)")
+    analyze.add_argument("--json", action="store_true", help="print the summary as JSON")
+    analyze.add_argument("--fail-on-alerts", action="store_true",
+                         help="exit with status 2 when any budget (or entity budget) alert fires")
+
+    report = commands.add_parser("report", help="print the last analysis summary")
+    report.add_argument("--summary", default=DEFAULT_SUMMARY)
+    report.add_argument("--json", action="store_true", help="print the summary as JSON")
+
+    importer = commands.add_parser("import", help="merge exported CSVs into the data file")
+    importer.add_argument("source", help="CSV file, directory of CSVs, or glob")
+    importer.add_argument("--into", default=DEFAULT_DATA,
+                          help="CSV file or SQLite database (.db/.sqlite) to merge into")
+    importer.add_argument("--rules", default=DEFAULT_RULES)
+    importer.add_argument("--workers", type=int, default=None)
+    importer.add_argument("--dedup-window", type=int, default=0, metavar="DAYS",
+                          help="also treat same amount and description within DAYS days as duplicates")
+    importer.add_argument("--no-dedup", action="store_true",
+                          help="import every row, even ones already in the data file")
+
+    exporter = commands.add_parser("export", help="write stored transactions to CSV")
+    exporter.add_argument("output", help="CSV file to write")
+    exporter.add_argument("--data", default=DEFAULT_DATA,
+                          help="CSV file or SQLite database (default: %(default)s)")
+    exporter.add_argument("--rules", default=DEFAULT_RULES)
+
+    server = commands.add_parser("serve", help="serve analytics from memory over local HTTP")
+    server.add_argument("--data", default=DEFAULT_DATA,
+                        help="transaction CSV or SQLite database (default: %(default)s)")
+    server.add_argument("--rules", default=DEFAULT_RULES)
+    server.add_argument("--budgets", default=DEFAULT_BUDGETS)
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=8765)
+    server.add_argument("--socket", default=None, help="listen on a Unix socket instead of TCP")
+    server.add_argument("--poll", type=float, default=2.0,
+                        help="seconds between checks for data changes (default: %(default)s)")
+
+    aggregate = commands.add_parser("aggregate", help="write a mergeable partial aggregate for one shard")
+    aggregate.add_argument("source", help="CSV file, SQLite database, directory of CSVs, or glob")
+    aggregate.add_argument("--out", required=True, help="aggregate JSON file to write")
+    aggregate.add_argument("--freq", default="M", choices=["D", "W", "M", "Q", "Y"],
+                           help="period granularity (default: %(default)s)")
+    aggregate.add_argument("--rules", default=DEFAULT_RULES)
+    aggregate.add_argument("--rejects", default=DEFAULT_REJECTS)
+    aggregate.add_argument("--workers", type=int, default=None)
+
+    combine = commands.add_parser("combine", help="merge shard aggregates and run the analysis")
+    combine.add_argument("aggregates", nargs="+", help="aggregate JSON files from `aggregate`")
+    combine.add_argument("--budgets", default=DEFAULT_BUDGETS)
+    combine.add_argument("--summary", default=DEFAULT_SUMMARY)
+    combine.add_argument("--out", default=None, help="also write the merged aggregate here")
+    combine.add_argument("--json", action="store_true", help="print the summary as JSON")
+
+    return parser
+
+
+# -----------------------------
+# Commands
+# -----------------------------
+def _profiler(args):
+    from src.instrumentation import StageProfiler
+
+    return StageProfiler(enabled=args.instrument or bool(args.profile), profile_stage=args.profile)
+
+
+def _load_frame(source: str, rules_path: str, rejects_path: str, workers=None, profiler=None, cache=None):
+    """
+    Load, clean and categorize a file, directory or glob.
+
+    For a single file, the cleaned frame is reused from ``cache`` while
+    the file and the rules are unchanged.
+    """
+    from src.categorize import auto_categorize
+    from src.ingest import load_transaction_files, load_transactions
+    from src.instrumentation import StageProfiler
+    from src.preprocess import validate_and_clean
+
+    profiler = profiler or StageProfiler()
+
+    if os.path.isfile(source):
+        frame_key = cache.key([source, rules_path], "frame") if cache else None
+        if frame_key:
+            with profiler.stage("cache") as stage:
+                df = cache.get_frame(frame_key)
+                stage.rows_out = None if df is None else len(df)
+            if df is not None:
+                print(f"♻ Reused cleaned transactions from cache ({len(df)} rows)")
+                return df
+
+        with profiler.stage("load") as stage:
+            df = load_transactions(source)
+            stage.rows_out = len(df)
+        if df.empty:
+            return df
+        with profiler.stage("clean", rows_in=len(df)) as stage:
+            df = validate_and_clean(df, rejects_path=rejects_path)
+            stage.rows_out = len(df)
+        with profiler.stage("categorize", rows_in=len(df)) as stage:
+            df = auto_categorize(df, rules_path)
+            stage.rows_out = len(df)
+        if frame_key:
+            cache.put_frame(frame_key, df)
+        return df
+
+    rejects_dir = os.path.dirname(rejects_path) if rejects_path else None
+    with profiler.stage("load") as stage:
+        df = load_transaction_files(source, rules_path, workers=workers, rejects_dir=rejects_dir)
+        stage.rows_out = len(df)
+    return df
+
+
+def _print_json(args, data):
+    """
+    Print ``data`` as JSON to the stdout run() was called with, which
+    stays free of progress messages (and is not silenced by -q).
+    """
+    print(json.dumps(data, indent=2), file=getattr(args, "stdout", None) or sys.stdout)
+
+
+def _results_key(cache, args) -> str:
+    """
+    Cache key for the analysis of a single CSV: its inputs, the stored
+    anomaly baselines and quantile sketches, and the options.
+    """
+    from src.anomalies import source_state_path
+
+    states = [source_state_path(path, args.data) for path in ("output/baselines.json", "output/quantiles.json")]
+    entity_budgets = [args.entity_budgets] if args.entity_budgets else []
+    return cache.key(
+        [args.data, args.rules, args.budgets, *states, *entity_budgets],
+        "analyze", args.top_vendors, args.outlier_quantile, args.entity_column
+    )
+
+
+def _entity_alerts(args, history, profiler) -> list:
+    """
+    Entity budget alerts for ``args.entity_budgets``, grouped by
+    ``args.entity_column`` (default 'entity', else 'source_file'; a
+    single file without either is one entity named after the file).
+    """
+    import pandas as pd
+
+    from src.config_loader import load_entity_budgets
+    from src.pipeline import analyze_entities
+
+    if not isinstance(history, pd.DataFrame):
+        print("⚠ Entity budgets need individual transactions; skipped for SQLite and --stream")
+        return []
+
+    column = args.entity_column or ("entity" if "entity" in history.columns else "source_file")
+    if column == "source_file" and column not in history.columns:
+        history = history.assign(source_file=args.data)
+    if column not in history.columns:
+        print(f"⚠ No '{column}' column to group entity budgets by; skipped")
+        return []
+
+    entity_budgets = load_entity_budgets(args.entity_budgets)
+    if entity_budgets.empty:
+        return []
+    return analyze_entities(history, entity_budgets, column, profiler)
+
+
+def cmd_analyze(args) -> int:
+    import pandas as pd
+
+    from src.audit_logger import flush_all, log_run
+    from src.budget import log_budget_alerts, log_entity_alerts
+    from src.config_loader import load_budgets
+    from src.heavy_hitters import VendorRanking
+    from src.pipeline import analyze_totals
+    from src.reporting import print_analysis
+    from src.result_cache import ResultCache
+
+    profiler = _profiler(args)
+    cache = ResultCache(enabled=not args.no_cache)
+    # Per-category vendor sketches, filled by whichever path loads the data.
+    vendors = VendorRanking() if args.top_vendors else None
+    outliers = None
+
+    # A single CSV with unchanged data, rules and budgets reuses the
+    # previous results outright.
+    results_key = None
+    if os.path.isfile(args.data) and not _is_sqlite(args.data) and not args.stream:
+        results_key = _results_key(cache, args)
+    cached = cache.get_results(results_key) if results_key else None
+
+    if cached is not None:
+        print(f"♻ Inputs unchanged; reusing cached analysis of {cached['transactions']} transaction(s)")
+        results, row_count = cached["results"], cached["transactions"]
+        total_spend, category_totals = results["total_spend"], results["category_totals"]
+        budgets = load_budgets(args.budgets)
+    elif _is_sqlite(args.data):
+        from src.storage import open_store
+
+        # Totals and the day × category history are aggregated in SQL;
+        # individual rows are never loaded.
+        store = open_store(args.data)
+        with profiler.stage("totals") as stage:
+            row_count = store.count()
+            total_spend, category_totals = store.category_totals()
+            history = store.cube()
+            stage.rows_out = len(category_totals)
+        if args.top_vendors:
+            vendors = VendorRanking()
+            vendors.update_totals(store.vendor_totals())
+    elif args.stream:
+        from src.anomalies import OutlierScan, load_quantile_state, source_state_path
+        from src.streaming import stream_cube
+
+        state = load_quantile_state(source_state_path("output/quantiles.json", args.data))
+        outliers = OutlierScan(state, args.outlier_quantile)
+        with profiler.stage("stream") as stage:
+            history, row_count = stream_cube(
+                args.data, args.rules,
+                chunk_rows=args.chunk_rows,
+                memory_limit_mb=args.memory_mb,
+                rejects_path=args.rejects,
+                vendors=vendors,
+                outliers=outliers
+            )
+            stage.rows_out = row_count
+        total_spend, category_totals = history.totals()
+    else:
+        from src.analysis import calculate_totals
+
+        history = _load_frame(args.data, args.rules, args.rejects, args.workers, profiler, cache)
+        row_count = len(history)
+        with profiler.stage("totals", rows_in=row_count) as stage:
+            total_spend, category_totals = calculate_totals(history)
+            stage.rows_out = len(category_totals)
+        if args.top_vendors:
+            with profiler.stage("vendors", rows_in=row_count) as stage:
+                vendors = VendorRanking.from_frame(history)
+                stage.rows_out = len(vendors.sketches)
+
+    if row_count == 0:
+        print(f"❌ No valid transactions found in {args.data}", file=sys.stderr)
+        return 1
+
+    if cached is None:
+        budgets = load_budgets(args.budgets)
+        results = analyze_totals(
+            total_spend, category_totals, budgets,
+            history=history,
+            profiler=profiler,
+            outliers=outliers,
+            outlier_quantile=args.outlier_quantile,
+            source=args.data
+        )
+        if vendors is not None:
+            results["top_vendors"] = vendors.top(args.top_vendors)
+        if args.entity_budgets:
+            results["entity_alerts"] = _entity_alerts(args, history, profiler)
+        if results_key:
+            # Keyed by the state files as this run left them, which is
+            # what the next run with the same inputs will find.
+            cache.put_results(_results_key(cache, args), {"results": results, "transactions": row_count})
+
+    log_budget_alerts(category_totals, budgets)
+    log_entity_alerts(pd.DataFrame(results.get("entity_alerts", [])))
+    log_run(
+        transactions_count=row_count,
+        total_spend=total_spend,
+        efficiency_score=results["score"]
+    )
+
+    summary = dict(
+        results,
+        generated_at=datetime.now().isoformat(timespec="seconds"),
+        data=args.data,
+        transactions=row_count
+    )
+    write_summary(summary, args.summary)
+
+    with profiler.stage("reporting"):
+        if args.json:
+            _print_json(args, summary)
+        else:
+            print_analysis(summary)
+
+    profiler.log()
+    if profiler.enabled:
+        print(profiler.summary(), file=sys.stderr)
+    flush_all()
+
+    if args.fail_on_alerts and (results["alerts"] or results.get("entity_alerts")):
+        return 2
+    return 0
+
+
+def cmd_report(args) -> int:
+    from src.reporting import print_analysis
+
+    try:
+        with open(args.summary, "r", encoding="utf-8") as f:
+            summary = json.load(f)
+    except (OSError, ValueError) as error:
+        print(f"❌ No analysis summary available ({error}). Run `analyze` first.", file=sys.stderr)
+        return 1
+
+    if args.json:
+        _print_json(args, summary)
+    else:
+        print(f"📄 Analysis of {summary.get('data')} generated {summary.get('generated_at')}")
+        print_analysis(summary)
+    return 0
+
+
+def cmd_import(args) -> int:
+    from src.ingest import load_transaction_files
+    from src.storage import open_store
+
+    new = load_transaction_files(args.source, args.rules, workers=args.workers)
+    if new.empty:
+        print(f"❌ Nothing imported from {args.source}", file=sys.stderr)
+        return 1
+
+    from src.dedup import data_signature, drop_duplicates, index_path, open_index
+
+    signature = data_signature(args.into)
+    store = open_store(args.into, args.rules)
+    index = None
+    if not args.no_dedup:
+        # Rows already in the data file, or in an earlier file of this
+        # import, are skipped; the index is updated as files are checked.
+        index = open_index(store, args.into, signature)
+        new, skipped = drop_duplicates(index, new, args.dedup_window)
+        if skipped:
+            print(f"♻ Skipped {skipped} duplicate transaction(s)")
+
+    # Provenance columns are not part of the stored file layout.
+    if not new.empty:
+        store.import_frame(new.drop(columns=["source_file", "source_row"], errors="ignore"))
+    store.close()
+    if index is not None:
+        index.signature = data_signature(args.into)
+        index.save(index_path(args.into))
+    print(f"📥 Imported {len(new)} transaction(s) into {args.into}")
+    return 0
+
+
+def cmd_export(args) -> int:
+    from src.storage import open_store
+
+    if not os.path.exists(args.data):
+        print(f"❌ No transaction data at {args.data}", file=sys.stderr)
+        return 1
+
+    open_store(args.data, args.rules).export_csv(args.output)
+    print(f"📤 Exported {args.data} to {args.output}")
+    return 0
+
+
+def cmd_serve(args) -> int:
+    from src.daemon import AnalyticsService, serve
+
+    service = AnalyticsService(args.data, args.rules, args.budgets)
+    serve(service, args.host, args.port, args.socket, args.poll)
+    return 0
+
+
+def cmd_aggregate(args) -> int:
+    from src.aggregates import PartialAggregate
+
+    if _is_sqlite(args.source):
+        from src.storage import open_store
+
+        aggregate = PartialAggregate.from_cube(open_store(args.source).cube(), args.freq)
+    else:
+        df = _load_frame(args.source, args.rules, args.rejects, args.workers)
+        aggregate = PartialAggregate.from_frame(df, args.freq)
+
+    aggregate.save(args.out)
+    print(f"🧮 Aggregated {aggregate.rows} transaction(s) from {args.source} into {args.out}")
+    return 0
+
+
+def cmd_combine(args) -> int:
+    from src.aggregates import PartialAggregate
+    from src.audit_logger import flush_all, log_run
+    from src.budget import log_budget_alerts
+    from src.config_loader import load_budgets
+    from src.pipeline import analyze_aggregate
+    from src.reporting import print_analysis
+
+    try:
+        shards = [PartialAggregate.load(path) for path in args.aggregates]
+        merged = PartialAggregate.merge_all(shards, freq=shards[0].freq)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"❌ Could not combine aggregates: {error}", file=sys.stderr)
+        return 1
+
+    if args.out:
+        merged.save(args.out)
+    if merged.rows == 0:
+        print("❌ The aggregates contain no transactions", file=sys.stderr)
+        return 1
+
+    budgets = load_budgets(args.budgets)
+    results = analyze_aggregate(merged, budgets, source=args.aggregates)
+
+    log_budget_alerts(merged.category_totals(), budgets)
+    log_run(
+        transactions_count=merged.rows,
+        total_spend=results["total_spend"],
+        efficiency_score=results["score"]
+    )
+
+    summary = dict(
+        results,
+        generated_at=datetime.now().isoformat(timespec="seconds"),
+        data=", ".join(args.aggregates),
+        transactions=merged.rows
+    )
+    write_summary(summary, args.summary)
+
+    if args.json:
+        _print_json(args, summary)
+    else:
+        print(f"🧮 Combined {len(shards)} aggregate(s), {merged.rows} transaction(s)")
+        print_analysis(summary)
+    flush_all()
+    return 0
+
+
+def _is_sqlite(path: str) -> bool:
+    # Same rule as storage.is_sqlite_path, without importing pandas.
+    return path.lower().endswith((".db", ".sqlite", ".sqlite3"))
+
+
+def write_summary(summary: dict, path: str):
+    """
+    Write the analysis summary used by `report`.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+COMMANDS = {
+    "analyze": cmd_analyze,
+    "report": cmd_report,
+    "import": cmd_import,
+    "export": cmd_export,
+    "serve": cmd_serve,
+    "aggregate": cmd_aggregate,
+    "combine": cmd_combine,
+}
+
+
+def run(argv=None, interactive=None) -> int:
+    """
+    Parse arguments and run a command.
+
+    Args:
+        argv (list): Command-line arguments (without the program name)
+        interactive (callable): Interactive entry point, called with
+            ``debug``, ``data_path``, ``use_cache``, ``instrument`` and
+            ``profile_stage`` when no command (or `interactive`) is given
+
+    Returns:
+        int: Process exit status
+    """
+    args = build_parser().parse_args(argv)
+
+    if args.command in (None, "interactive"):
+        if interactive is None:
+            build_parser().print_help()
+            return 1
+        interactive(
+            debug=getattr(args, "debug", False),
+            data_path=getattr(args, "data", DEFAULT_DATA),
+            use_cache=not args.no_cache,
+            instrument=args.instrument,
+            profile_stage=args.profile
+        )
+        return 0
+
+    command = COMMANDS[args.command]
+    # With --json, stdout carries only the JSON document (see _print_json):
+    # progress messages go to stderr, or nowhere under -q.
+    args.stdout = sys.stdout
+    quiet = open(os.devnull, "w") if args.quiet else None
+    output = quiet or (sys.stderr if getattr(args, "json", False) else None)
+    try:
+        with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+            status = command(args)
+    finally:
+        if quiet:
+            quiet.close()
+
+    if args.timing:
+        elapsed = (time.perf_counter() - _STARTED) * 1000
+        print(f"⏱ {args.command} finished in {elapsed:.1f} ms", file=sys.stderr)
+
+    return status
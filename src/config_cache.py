@@ -0,0 +1,111 @@
+"""
+config_cache.py
+
+mtime-aware cache for parsed configuration files.
+
+Config files (rules.yml, budgets.csv) are parsed, and optionally
+compiled, once and reused until the file's modification time or size
+changes, so a long-running session picks up edits without a restart.
+If an edited file fails to parse, the last good version is kept and a
+warning is printed.
+"""
+
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import yaml
+
+
+class ConfigCache:
+    """
+    Parsed config values keyed by (path, parser) and file signature.
+    """
+
+    def __init__(self):
+        # key -> (signature, value) of the last successful parse
+        self._good: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = {}
+        # key -> signature of the last failed parse, to avoid re-parsing it
+        self._failed: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path: str, parser: Callable[[str], Any], name: Optional[str] = None) -> Any:
+        """
+        Return the parsed value of ``path``, re-parsing only if it changed.
+
+        Raises
+        ------
+        FileNotFoundError, or the parser's exception
+            Only when there is no last good version to fall back on.
+        """
+        key = (os.path.abspath(path), name or parser.__qualname__)
+        cached = self._good.get(key)
+
+        try:
+            signature = self._signature(path)
+        except FileNotFoundError:
+            if cached is None:
+                raise
+            print(f"⚠ {path} is missing; keeping last valid version.")
+            return cached[1]
+
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        if cached is not None and self._failed.get(key) == signature:
+            return cached[1]
+
+        try:
+            value = parser(path)
+        except Exception as e:
+            if cached is None:
+                raise
+            self._failed[key] = signature
+            print(f"⚠ Invalid config {path}: {e}. Keeping last valid version.")
+            return cached[1]
+
+        self._good[key] = (signature, value)
+        self._failed.pop(key, None)
+        return value
+
+    def reload(self, path: Optional[str] = None):
+        """
+        Force the next get() to re-parse ``path`` (or every file).
+
+        Last good values are kept as a fallback.
+        """
+        target = os.path.abspath(path) if path else None
+        for key, (_, value) in list(self._good.items()):
+            if target is None or key[0] == target:
+                self._good[key] = ((-1, -1), value)
+                self._failed.pop(key, None)
+
+
+_CACHE = ConfigCache()
+
+
+def get_config(path: str, parser: Callable[[str], Any], name: Optional[str] = None) -> Any:
+    """
+    Parse ``path`` with ``parser`` through the shared cache.
+    """
+    return _CACHE.get(path, parser, name)
+
+
+def reload_config(path: Optional[str] = None):
+    """
+    Hot-reload hook: re-read ``path`` (or all config files) on next use.
+    """
+    _CACHE.reload(path)
+
+
+def read_yaml(path: str) -> dict:
+    """
+    Read a YAML mapping (an empty file yields {}).
+    """
+    with open(path, "r") as file:
+        data = yaml.safe_load(file) or {}
+    if not isinstance(data, dict):
+        raise ValueError("top level must be a mapping")
+    return data
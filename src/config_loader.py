@@ -1,7 +1,8 @@
 import pandas as pd
-import yaml
 import os
 
+from src.config_cache import get_config
+
 
 DEFAULT_BUDGETS = {
     "Fuel": 1000,
@@ -12,26 +13,73 @@ DEFAULT_BUDGETS = {
 }
 
 
+def _read_budgets(path):
+    df = pd.read_csv(path)
+
+    required_cols = {"category", "budget"}
+    if not required_cols.issubset(df.columns):
+        raise ValueError("CSV must contain 'category' and 'budget' columns")
+
+    return dict(zip(df["category"], pd.to_numeric(df["budget"], errors="raise")))
+
+
 def load_budgets(path="config/budgets.csv"):
     """
     Load budget limits by category.
-    Falls back to default budgets if file is missing or invalid.
+
+    Parsed budgets are cached until the file changes. If an edited file
+    is invalid, the last valid budgets are kept; default budgets are
+    only used (with a warning) when no valid version was ever loaded.
     """
-    if not os.path.exists(path):
+    try:
+        return get_config(path, _read_budgets)
+
+    except FileNotFoundError:
         print("⚠ Budget file not found. Using default budgets.")
         return DEFAULT_BUDGETS
 
+    except Exception as e:
+        print(f"⚠ Error loading budgets: {e}")
+        print("⚠ Using default budgets.")
+        return DEFAULT_BUDGETS
+
+
+
+def load_entity_budgets(path="config/entity_budgets.csv"):
+    """
+    Load budgets keyed by entity × category (optionally × period).
+
+    The CSV needs 'entity', 'category' and 'budget' columns and may add
+    a 'period' column (e.g. 2025-01). An entity of "*" applies to every
+    entity without its own row. A file with only 'category' and
+    'budget' is treated as "*" budgets. Rows repeating the same
+    entity, category and period are summed.
+
+    Returns an empty DataFrame if the file is missing or invalid.
+    """
+    columns = ["entity", "category", "budget"]
+
+    if not os.path.exists(path):
+        print("⚠ Entity budget file not found.")
+        return pd.DataFrame(columns=columns)
+
     try:
-        df = pd.read_csv(path)
+        df = pd.read_csv(path, dtype={"entity": str, "category": str, "period": str})
 
-        required_cols = {"category", "budget"}
-        if not required_cols.issubset(df.columns):
+        if not {"category", "budget"}.issubset(df.columns):
             raise ValueError("CSV must contain 'category' and 'budget' columns")
+        if "entity" not in df.columns:
+            df["entity"] = "*"
 
-        return dict(zip(df["category"], df["budget"]))
+        df["budget"] = pd.to_numeric(df["budget"], errors="raise")
 
-    except Exception as e:
-        print(f"⚠ Error loading budgets: {e}")
-        print("⚠ Using default budgets.")
-        return DEFAULT_BUDGETS
+        keys = [c for c in ("entity", "category", "period") if c in df.columns]
+        duplicated = df.duplicated(keys, keep=False)
+        if duplicated.any():
+            print(f"⚠ {duplicated.sum()} entity budget rows share an entity/category/period; summing them")
+            df = df.groupby(keys, as_index=False, sort=False, dropna=False)["budget"].sum()
+        return df
 
+    except Exception as e:
+        print(f"⚠ Error loading entity budgets: {e}")
+        return pd.DataFrame(columns=columns)
@@ -0,0 +1,254 @@
+"""
+cube.py
+
+Day × category rollup cube for time-based analysis.
+
+The cube is built once from cleaned, categorized transactions and holds
+per-day, per-category sums, counts, minimums and maximums (in integer
+cents) as dense NumPy arrays. Monthly, weekly, quarter-to-date or any
+other date-range view is answered from the cube without touching the
+raw rows.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.schema import CENTS_PER_DOLLAR, amount_cents
+
+STATS = ("sum", "count", "min", "max")
+
+# pandas period aliases accepted by RollupCube.rollup.
+FREQUENCIES = {"D": "D", "W": "W", "M": "M", "Q": "Q", "Y": "Y"}
+
+
+class RollupCube:
+    """
+    Dense day × category aggregates.
+
+    Attributes
+    ----------
+    start : np.datetime64
+        First day covered (day resolution).
+    categories : List[str]
+        Column labels of the arrays.
+    sums, counts, mins, maxs : np.ndarray
+        Arrays of shape (days, categories). Amounts are in cents; mins
+        and maxs are only meaningful where counts > 0.
+    """
+
+    def __init__(self, start, categories, sums, counts, mins, maxs):
+        self.start = np.datetime64(start, "D")
+        self.categories: List[str] = list(categories)
+        self.sums = sums
+        self.counts = counts
+        self.mins = mins
+        self.maxs = maxs
+
+    @property
+    def days(self) -> pd.DatetimeIndex:
+        return pd.date_range(pd.Timestamp(self.start), periods=len(self.sums), freq="D")
+
+    @classmethod
+    def empty(cls) -> "RollupCube":
+        shape = (0, 0)
+        return cls(
+            np.datetime64("1970-01-01"), [],
+            np.zeros(shape, np.int64), np.zeros(shape, np.int64),
+            np.zeros(shape, np.int64), np.zeros(shape, np.int64)
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "RollupCube":
+        """
+        Build the cube from cleaned, categorized transactions.
+        """
+        if df.empty:
+            return cls.empty()
+
+        days = df["date"].to_numpy().astype("datetime64[D]")
+        start = days.min()
+        day_index = (days - start).astype(np.int64)
+        n_days = int(day_index.max()) + 1
+
+        cat_codes, categories = pd.factorize(df["category"], sort=True)
+        n_cats = len(categories)
+
+        # Aggregate once per occupied cell, then scatter into dense arrays.
+        cell = day_index * n_cats + cat_codes
+        grouped = pd.Series(amount_cents(df).to_numpy(), index=cell).groupby(level=0).agg(list(STATS))
+
+        arrays = {}
+        for stat in STATS:
+            dense = np.zeros(n_days * n_cats, dtype=np.int64)
+            dense[grouped.index.to_numpy()] = grouped[stat].to_numpy(dtype=np.int64)
+            arrays[stat] = dense.reshape(n_days, n_cats)
+
+        # Categorical columns factorize in category order; keep names sorted.
+        names = [str(c) for c in categories]
+        order = sorted(range(n_cats), key=names.__getitem__)
+        return cls(start, [names[i] for i in order],
+                   *(arrays[stat][:, order] for stat in STATS))
+
+    @classmethod
+    def from_cells(cls, days, categories, sums, counts, mins, maxs) -> "RollupCube":
+        """
+        Build the cube from pre-aggregated (day, category) cells, e.g.
+        the result of a SQL GROUP BY. Cells may come in any order.
+        """
+        days = np.asarray(days, dtype="datetime64[D]")
+        if not len(days):
+            return cls.empty()
+
+        start = days.min()
+        day_index = (days - start).astype(np.int64)
+        n_days = int(day_index.max()) + 1
+
+        names = sorted({str(c) for c in categories})
+        positions = {name: i for i, name in enumerate(names)}
+        cat_index = np.array([positions[str(c)] for c in categories], dtype=np.int64)
+
+        arrays = []
+        for values in (sums, counts, mins, maxs):
+            dense = np.zeros((n_days, len(names)), dtype=np.int64)
+            dense[day_index, cat_index] = np.asarray(values, dtype=np.int64)
+            arrays.append(dense)
+        return cls(start, names, *arrays)
+
+    # -----------------------------
+    # Combining cubes
+    # -----------------------------
+    def _aligned(self, start, n_days, categories):
+        """
+        Return this cube's arrays re-indexed to a wider day/category grid.
+        """
+        offset = int((self.start - start).astype(np.int64))
+        positions = [categories.index(c) for c in self.categories]
+
+        out = {}
+        for stat in STATS:
+            grid = np.zeros((n_days, len(categories)), dtype=np.int64)
+            if len(self.sums):
+                grid[offset:offset + len(self.sums), positions] = self._array(stat)
+            out[stat] = grid
+        return out
+
+    def _array(self, stat: str) -> np.ndarray:
+        return {"sum": self.sums, "count": self.counts, "min": self.mins, "max": self.maxs}[stat]
+
+    def merge(self, other: "RollupCube") -> "RollupCube":
+        """
+        Combine two cubes (e.g. from separate chunks or files).
+        """
+        if not len(other.sums):
+            return self
+        if not len(self.sums):
+            return other
+
+        start = min(self.start, other.start)
+        end = max(self.start + len(self.sums), other.start + len(other.sums))
+        n_days = int((end - start).astype(np.int64))
+        categories = sorted(set(self.categories) | set(other.categories))
+
+        a = self._aligned(start, n_days, categories)
+        b = other._aligned(start, n_days, categories)
+
+        counts = a["count"] + b["count"]
+        big = np.iinfo(np.int64).max
+        mins = np.minimum(np.where(a["count"] > 0, a["min"], big), np.where(b["count"] > 0, b["min"], big))
+        maxs = np.maximum(np.where(a["count"] > 0, a["max"], -big), np.where(b["count"] > 0, b["max"], -big))
+        mins[counts == 0] = 0
+        maxs[counts == 0] = 0
+
+        return RollupCube(start, categories, a["sum"] + b["sum"], counts, mins, maxs)
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _day_slice(self, start=None, end=None) -> slice:
+        lo = 0 if start is None else int((np.datetime64(pd.Timestamp(start), "D") - self.start).astype(np.int64))
+        hi = len(self.sums) if end is None else int((np.datetime64(pd.Timestamp(end), "D") - self.start).astype(np.int64)) + 1
+        return slice(max(lo, 0), max(min(hi, len(self.sums)), 0))
+
+    def rollup(
+        self,
+        freq: str = "M",
+        start=None,
+        end=None,
+        stat: str = "sum"
+    ) -> pd.DataFrame:
+        """
+        Aggregate the cube to a period granularity.
+
+        Parameters
+        ----------
+        freq : str
+            "D", "W", "M", "Q" or "Y".
+        start, end : date-like, optional
+            Inclusive date range.
+        stat : str
+            "sum" and "min"/"max" are returned in dollars, "count" as
+            transaction counts.
+
+        Returns
+        -------
+        pd.DataFrame
+            Period × category table.
+        """
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unsupported frequency: {freq}")
+        if stat not in STATS:
+            raise ValueError(f"Unsupported statistic: {stat}")
+
+        window = self._day_slice(start, end)
+        periods = self.days[window].to_period(FREQUENCIES[freq])
+        counts = pd.DataFrame(self.counts[window], index=periods, columns=self.categories)
+
+        if stat in ("sum", "count"):
+            table = pd.DataFrame(self._array(stat)[window], index=periods, columns=self.categories)
+            table = table.groupby(level=0).sum()
+        else:
+            values = pd.DataFrame(self._array(stat)[window], index=periods, columns=self.categories)
+            table = values.where(counts > 0).groupby(level=0).agg(stat)
+
+        if stat != "count":
+            table = table / CENTS_PER_DOLLAR
+
+        # Drop categories with no activity in the window.
+        active = counts.sum(axis=0) > 0
+        return table.loc[:, active.to_numpy()]
+
+    def totals(self, start=None, end=None) -> Tuple[float, Dict[str, float]]:
+        """
+        Total and per-category spend over an inclusive date range.
+
+        Same result shape as analysis.calculate_totals.
+        """
+        window = self._day_slice(start, end)
+        sums = self.sums[window].sum(axis=0)
+        counts = self.counts[window].sum(axis=0)
+
+        category_totals = {
+            category: int(total) / CENTS_PER_DOLLAR
+            for category, total, count in zip(self.categories, sums, counts)
+            if count > 0
+        }
+        return int(sums.sum()) / CENTS_PER_DOLLAR, category_totals
+
+    def period_to_date(self, freq: str = "Q", as_of=None) -> Tuple[float, Dict[str, float]]:
+        """
+        Totals from the start of the current period up to ``as_of``
+        (default: the last day in the cube), e.g. quarter-to-date.
+        """
+        if as_of is None:
+            as_of = self.days[-1] if len(self.sums) else pd.Timestamp.today()
+        period_start = pd.Timestamp(as_of).to_period(FREQUENCIES[freq]).start_time
+        return self.totals(period_start, as_of)
+
+
+def build_cube(df: pd.DataFrame) -> RollupCube:
+    """
+    Build a RollupCube from cleaned, categorized transactions.
+    """
+    return RollupCube.from_frame(df)
@@ -0,0 +1,461 @@
+"""
+daemon.py
+
+Long-running local analytics server.
+
+`python main.py serve` loads, cleans and categorizes the transactions
+once, keeps a day × category cube and the analysis results in memory,
+and answers JSON queries over HTTP on localhost (or a Unix socket):
+
+    GET /health     status, row count and last refresh time
+    GET /summary    all of the results below in one response
+    GET /totals     total and per-category spend (?start=&end= dates)
+    GET /variances  budget variances by category
+    GET /alerts     budget alerts and spending anomalies
+    GET /score      efficiency score and reason
+    GET /rankings   categories ranked by spend, with top vendors (?n=)
+
+The data file is polled for changes. Rows appended to a CSV are parsed,
+cleaned and merged into the cube on their own. A file is only treated
+as appended to when it is the same file (inode) and the bytes already
+read still hash the same; a rewritten file (for example after a
+journal compaction) or edited rules trigger a full rebuild, and budget edits only re-run the budget stages. Refreshes run
+in a worker thread and swap in a new snapshot, so clients keep getting
+answers from the previous one meanwhile. Changes still sitting in an
+interactive session's journal are picked up once it compacts.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import signal
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from src.analysis import rank_cost_drivers
+from src.categorize import auto_categorize
+from src.config_loader import load_budgets
+from src.cube import RollupCube, build_cube
+from src.heavy_hitters import DEFAULT_TOP_N, VendorRanking
+from src.ingest import REQUIRED_COLUMNS
+from src.pipeline import analyze_totals
+from src.preprocess import detect_date_format, validate_and_clean
+from src.schema import READ_DTYPES
+from src.storage import is_sqlite_path, open_store
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_POLL_SECONDS = 2.0
+
+# Read size when re-hashing the consumed part of the CSV.
+HASH_CHUNK_BYTES = 1 << 20
+
+# Serialized responses kept per snapshot (distinct query strings).
+MAX_CACHED_RESPONSES = 256
+
+ENDPOINTS = ("/health", "/summary", "/totals", "/variances", "/alerts", "/score", "/rankings")
+
+
+@dataclass
+class Snapshot:
+    """
+    Immutable view served to clients; replaced wholesale on refresh.
+    """
+    cube: RollupCube
+    vendors: VendorRanking
+    rows: int
+    budgets: Dict[str, float]
+    results: dict
+    version: int
+    refreshed_at: str
+    responses: Dict[str, bytes] = field(default_factory=dict)
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    # The inode changes when a file is replaced (os.replace), even if
+    # size and modification time happen to line up.
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def _prefix_digest(f, length: int):
+    """
+    SHA-1 of the first ``length`` bytes of an open file, or None if the
+    file is shorter.
+    """
+    digest = hashlib.sha1()
+    f.seek(0)
+    remaining = length
+    while remaining:
+        chunk = f.read(min(HASH_CHUNK_BYTES, remaining))
+        if not chunk:
+            return None
+        digest.update(chunk)
+        remaining -= len(chunk)
+    return digest
+
+
+def _same_file(signature, previous) -> Optional[bool]:
+    """
+    Whether two signatures belong to the same inode (None if unknown).
+    """
+    if signature is None or previous is None:
+        return None
+    return signature[2] == previous[2]
+
+
+class AnalyticsService:
+    """
+    In-memory dataset, aggregates and analysis results for one data
+    file, refreshed incrementally as the file changes.
+    """
+
+    def __init__(
+        self,
+        data_path: str = "data/transactions.csv",
+        rules_path: str = "config/rules.yml",
+        budgets_path: str = "config/budgets.csv",
+        baselines_path: Optional[str] = "output/baselines.json"
+    ):
+        self.data_path = data_path
+        self.rules_path = rules_path
+        self.budgets_path = budgets_path
+        self.baselines_path = baselines_path
+
+        self.snapshot: Optional[Snapshot] = None
+        self._refresh_lock = threading.Lock()
+
+        # CSV append tracking
+        self._offset = 0
+        self._digest = hashlib.sha1()
+        self._columns = None
+        self._date_format = None
+        self._signatures = {}
+
+    # -----------------------------
+    # Loading
+    # -----------------------------
+    def _watched_signatures(self) -> dict:
+        paths = [self.data_path, self.rules_path]
+        if is_sqlite_path(self.data_path):
+            paths.append(f"{self.data_path}-wal")
+        return {path: _file_signature(path) for path in paths}
+
+    def _clean(self, raw: pd.DataFrame) -> pd.DataFrame:
+        if raw.empty:
+            return raw
+        df = validate_and_clean(raw, verbose=False, date_format=self._date_format)
+        return auto_categorize(df, self.rules_path)
+
+    def _rebuild(self) -> Tuple[RollupCube, VendorRanking, int]:
+        """
+        Read the whole data file and rebuild the cube and vendor sketches.
+        """
+        vendors = VendorRanking()
+        if is_sqlite_path(self.data_path):
+            store = open_store(self.data_path)
+            try:
+                vendors.update_totals(store.vendor_totals())
+                return store.cube(), vendors, store.count()
+            finally:
+                store.close()
+
+        self._offset, self._digest, self._columns = 0, hashlib.sha1(), None
+        if not os.path.exists(self.data_path):
+            print(f"⚠ Transaction file not found: {self.data_path}")
+            return RollupCube.empty(), vendors, 0
+
+        with open(self.data_path, "rb") as f:
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+
+        raw = pd.read_csv(io.BytesIO(data[:end]), dtype=READ_DTYPES) if end else pd.DataFrame()
+        missing = REQUIRED_COLUMNS - set(raw.columns)
+        if missing:
+            print(f"⚠ Missing required columns: {', '.join(sorted(missing))}")
+            return RollupCube.empty(), vendors, 0
+
+        self._columns = list(raw.columns)
+        self._date_format = detect_date_format(raw["date"])
+        self._offset, self._digest = end, hashlib.sha1(data[:end])
+
+        df = self._clean(raw)
+        vendors.update_frame(df)
+        return build_cube(df), vendors, len(df)
+
+    def _read_appended(self) -> Optional[pd.DataFrame]:
+        """
+        New complete rows appended to the CSV since the last read, or
+        None when the file was rewritten rather than appended to.
+
+        Every byte already read must hash the same as before: an edit
+        to an earlier row is a rewrite even when rows were also added.
+        """
+        if self._columns is None:
+            return None
+
+        with open(self.data_path, "rb") as f:
+            prefix = _prefix_digest(f, self._offset)
+            if prefix is None or prefix.digest() != self._digest.digest():
+                return None
+            data = f.read()
+
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return pd.DataFrame(columns=self._columns)
+
+        raw = pd.read_csv(io.BytesIO(data[:end]), header=None, names=self._columns, dtype=READ_DTYPES)
+        self._offset += end
+        self._digest.update(data[:end])
+        return raw
+
+    def _analyze(
+        self,
+        cube: RollupCube,
+        vendors: VendorRanking,
+        rows: int,
+        budgets: Dict[str, float]
+    ) -> Snapshot:
+        total_spend, category_totals = cube.totals()
+        results = analyze_totals(
+            total_spend, category_totals, budgets,
+            history=cube if rows else None,
+            baselines_path=self.baselines_path,
+            source=self.data_path
+        )
+        version = self.snapshot.version + 1 if self.snapshot else 1
+        return Snapshot(
+            cube=cube,
+            vendors=vendors,
+            rows=rows,
+            budgets=dict(budgets),
+            results=results,
+            version=version,
+            refreshed_at=datetime.now().isoformat(timespec="seconds")
+        )
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Bring the snapshot up to date with the files on disk.
+
+        Returns True when a new snapshot was published.
+        """
+        with self._refresh_lock:
+            signatures = self._watched_signatures()
+            budgets = load_budgets(self.budgets_path)
+            current = self.snapshot
+
+            data_changed = force or current is None or signatures != self._signatures
+            if not data_changed:
+                if budgets == current.budgets:
+                    return False
+                self.snapshot = self._analyze(current.cube, current.vendors, current.rows, budgets)
+                print(f"🔄 Budgets changed; re-evaluated (v{self.snapshot.version})")
+                return True
+
+            rules_changed = signatures.get(self.rules_path) != self._signatures.get(self.rules_path)
+            replaced = _same_file(signatures.get(self.data_path), self._signatures.get(self.data_path)) is False
+            appended = None
+            if current is not None and not (rules_changed or replaced) and not is_sqlite_path(self.data_path):
+                appended = self._read_appended()
+
+            if appended is not None:
+                new = self._clean(appended)
+                cube = current.cube.merge(build_cube(new)) if len(new) else current.cube
+                vendors = current.vendors.merge(VendorRanking.from_frame(new)) if len(new) else current.vendors
+                rows = current.rows + len(new)
+                how = f"appended {len(new)} row(s)"
+            else:
+                cube, vendors, rows = self._rebuild()
+                how = f"loaded {rows} row(s)"
+
+            self._signatures = signatures
+            self.snapshot = self._analyze(cube, vendors, rows, budgets)
+            print(f"🔄 {how} (v{self.snapshot.version})")
+            return True
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def query(self, path: str, params: Dict[str, str]) -> Tuple[int, object]:
+        """
+        Answer one request from the current snapshot.
+
+        Returns (HTTP status, JSON-serializable body).
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            return 503, {"error": "still loading"}
+
+        results = snapshot.results
+        if path == "/health":
+            return 200, {
+                "status": "ok",
+                "data": self.data_path,
+                "transactions": snapshot.rows,
+                "version": snapshot.version,
+                "refreshed_at": snapshot.refreshed_at,
+            }
+        if path == "/summary":
+            return 200, dict(results, transactions=snapshot.rows, refreshed_at=snapshot.refreshed_at)
+        if path == "/totals":
+            start, end = params.get("start"), params.get("end")
+            if start or end:
+                try:
+                    total_spend, category_totals = snapshot.cube.totals(start or None, end or None)
+                except ValueError as error:
+                    return 400, {"error": f"invalid date: {error}"}
+                return 200, {"total_spend": total_spend, "category_totals": category_totals,
+                             "start": start, "end": end}
+            return 200, {"total_spend": results["total_spend"], "category_totals": results["category_totals"]}
+        if path == "/variances":
+            return 200, {"variances": results["variances"], "total_budget": results["total_budget"]}
+        if path == "/alerts":
+            return 200, {"alerts": results["alerts"], "anomalies": results["anomalies"]}
+        if path == "/score":
+            return 200, {"score": results["score"], "score_reason": results["score_reason"]}
+        if path == "/rankings":
+            try:
+                n = int(params.get("n", DEFAULT_TOP_N))
+            except ValueError:
+                return 400, {"error": "n must be an integer"}
+            return 200, {"ranked_costs": rank_cost_drivers(results["category_totals"]),
+                         "top_vendors": snapshot.vendors.top(n)}
+        return 404, {"error": f"unknown endpoint {path}", "endpoints": list(ENDPOINTS)}
+
+    def respond(self, target: str) -> Tuple[int, bytes]:
+        """
+        Serialized response for a request target, cached per snapshot.
+        """
+        snapshot = self.snapshot
+        if snapshot is not None and target in snapshot.responses:
+            return 200, snapshot.responses[target]
+
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        status, body = self.query(url.path.rstrip("/") or "/health", params)
+        payload = json.dumps(body).encode("utf-8")
+
+        if status == 200 and snapshot is not None and len(snapshot.responses) < MAX_CACHED_RESPONSES:
+            snapshot.responses[target] = payload
+        return status, payload
+
+
+# -----------------------------
+# HTTP front end
+# -----------------------------
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+async def _handle_client(service: AnalyticsService, reader, writer):
+    """
+    Minimal HTTP/1.1 handling: GET only, keep-alive supported.
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) != 3:
+                break
+            method, target, version = parts
+
+            if method != "GET":
+                status, payload = 405, json.dumps({"error": "only GET is supported"}).encode("utf-8")
+            else:
+                status, payload = service.respond(target)
+
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                + payload
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _watch(service: AnalyticsService, interval: float):
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await loop.run_in_executor(None, service.refresh)
+        except Exception as error:
+            print(f"⚠ Refresh failed, still serving the previous results: {error}")
+
+
+async def _serve(service, host, port, socket_path, poll_interval):
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, service.refresh)
+
+    # SIGTERM (e.g. from a service manager) stops the server cleanly.
+    stopped = asyncio.Event()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, stopped.set)
+    except (NotImplementedError, RuntimeError):
+        pass
+
+    def handler(reader, writer):
+        return _handle_client(service, reader, writer)
+
+    if socket_path:
+        server = await asyncio.start_unix_server(handler, path=socket_path)
+        print(f"🚀 Serving analytics on unix:{socket_path}")
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        print(f"🚀 Serving analytics on http://{host}:{port}")
+
+    watcher = asyncio.create_task(_watch(service, poll_interval))
+    try:
+        async with server:
+            await stopped.wait()
+    finally:
+        watcher.cancel()
+    print("👋 Analytics daemon stopped.")
+
+
+def serve(
+    service: AnalyticsService,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+    poll_interval: float = DEFAULT_POLL_SECONDS
+):
+    """
+    Run the daemon until interrupted.
+    """
+    try:
+        asyncio.run(_serve(service, host, port, socket_path, poll_interval))
+    except KeyboardInterrupt:
+        print("👋 Analytics daemon stopped.")
+    finally:
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,272 @@
+"""
+dedup.py
+
+Duplicate detection for transactions entering the store.
+
+A transaction's fingerprint is a 64-bit hash of its day, amount in
+cents and normalized description (case-folded, punctuation and extra
+spaces removed). FingerprintIndex holds the fingerprints of stored
+transactions as a sorted array behind a Bloom filter, so most new rows
+are ruled out without a lookup, and checking a batch costs O(new rows).
+With a tolerance window of N days, a row also matches the same amount
+and description up to N days earlier or later (e.g. posting vs.
+transaction date).
+
+Imports keep the index under output/dedup, tied to the data file's size
+and modification time; if the file was changed some other way, the
+index is rebuilt from the store once.
+"""
+
+import hashlib
+import json
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.schema import amount_cents
+
+DEFAULT_INDEX_DIR = "output/dedup"
+INDEX_VERSION = 1
+
+BLOOM_BITS_PER_KEY = 10   # ~1% false positives with 7 hashes
+BLOOM_HASHES = 7
+MIN_BLOOM_BITS = 1 << 16
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """
+    splitmix64 finalizer: spreads every input bit over the output.
+    """
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def normalize_description(text: pd.Index) -> pd.Index:
+    return text.astype(str).str.casefold().str.replace(r"[\W_]+", " ", regex=True).str.strip()
+
+
+def _base_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hash of (normalized description, cents) per row, without the date.
+    """
+    descriptions = df["description"].astype("category")
+    names = normalize_description(descriptions.cat.categories).to_numpy(dtype=object)
+    # Missing descriptions (code -1) hash like an empty one.
+    name_hashes = pd.util.hash_array(np.append(names, ""))
+    cents = amount_cents(df).to_numpy(dtype=np.int64).view(np.uint64)
+    return _mix(name_hashes[descriptions.cat.codes.to_numpy()] ^ _mix(cents + _GOLDEN))
+
+
+def _days(df: pd.DataFrame) -> np.ndarray:
+    return df["date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def _fingerprints(base: np.ndarray, days: np.ndarray) -> np.ndarray:
+    return _mix(base + days.view(np.uint64) * _GOLDEN)
+
+
+def fingerprints(df: pd.DataFrame) -> np.ndarray:
+    """
+    Fingerprint of each cleaned transaction.
+    """
+    if df.empty:
+        return np.empty(0, dtype=np.uint64)
+    return _fingerprints(_base_hashes(df), _days(df))
+
+
+class FingerprintIndex:
+    """
+    Set of transaction fingerprints with a Bloom filter in front.
+    """
+
+    def __init__(self, keys: Optional[np.ndarray] = None, signature=None):
+        self.keys = np.unique(keys) if keys is not None else np.empty(0, dtype=np.uint64)
+        self.signature = signature
+        self._build_bloom()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, signature=None) -> "FingerprintIndex":
+        return cls(fingerprints(df), signature)
+
+    # -----------------------------
+    # Bloom filter
+    # -----------------------------
+    def _build_bloom(self):
+        # Sized with headroom so adds rarely force a rebuild.
+        bits = max(MIN_BLOOM_BITS, 2 * BLOOM_BITS_PER_KEY * len(self.keys))
+        self.bloom = np.zeros((bits + 7) // 8, dtype=np.uint8)
+        self._set_bits(self.keys)
+
+    def _positions(self, keys: np.ndarray) -> np.ndarray:
+        # Double hashing: bit i is (h1 + i * h2) mod m.
+        h1 = keys & np.uint64(0xFFFFFFFF)
+        h2 = (keys >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(BLOOM_HASHES, dtype=np.uint64)[:, None]
+        return (h1 + steps * h2) % np.uint64(len(self.bloom) * 8)
+
+    def _set_bits(self, keys: np.ndarray):
+        if not len(keys):
+            return
+        bits = np.zeros(len(self.bloom) * 8, dtype=bool)
+        bits[self._positions(keys).ravel()] = True
+        self.bloom |= np.packbits(bits, bitorder="little")
+
+    def _maybe_contains(self, keys: np.ndarray) -> np.ndarray:
+        positions = self._positions(keys)
+        bits = (self.bloom[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return bits.all(axis=0)
+
+    # -----------------------------
+    # Set operations
+    # -----------------------------
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Boolean mask of ``keys`` already in the index.
+        """
+        found = np.zeros(len(keys), dtype=bool)
+        if not len(keys) or not len(self.keys):
+            return found
+        maybe = np.flatnonzero(self._maybe_contains(keys))
+        if len(maybe):
+            candidates = keys[maybe]
+            slots = np.minimum(np.searchsorted(self.keys, candidates), len(self.keys) - 1)
+            found[maybe] = self.keys[slots] == candidates
+        return found
+
+    def add(self, keys: np.ndarray):
+        if not len(keys):
+            return
+        self.keys = np.union1d(self.keys, keys)
+        if len(self.keys) * BLOOM_BITS_PER_KEY > len(self.bloom) * 8:
+            self._build_bloom()
+        else:
+            self._set_bits(keys)
+
+    def add_frame(self, df: pd.DataFrame):
+        self.add(fingerprints(df))
+
+    def find_duplicates(self, df: pd.DataFrame, window_days: int = 0) -> np.ndarray:
+        """
+        Boolean mask of rows matching an indexed transaction with the
+        same amount and description within ``window_days`` days.
+        """
+        duplicate = np.zeros(len(df), dtype=bool)
+        if df.empty:
+            return duplicate
+        base, days = _base_hashes(df), _days(df)
+        for offset in range(-window_days, window_days + 1):
+            duplicate |= self.contains(_fingerprints(base, days + offset))
+        return duplicate
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        meta = {"version": INDEX_VERSION, "signature": self.signature}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=self.keys, bloom=self.bloom, meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FingerprintIndex":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != INDEX_VERSION:
+                raise ValueError(f"unsupported index version {meta.get('version')}")
+            index = cls.__new__(cls)
+            index.keys = data["keys"]
+            index.bloom = data["bloom"]
+            index.signature = meta.get("signature")
+        return index
+
+
+def index_path(data_path: str, index_dir: str = DEFAULT_INDEX_DIR) -> str:
+    """
+    Index file for a data file (named after it, plus a hash of its
+    absolute path so equal names in different folders do not clash).
+    """
+    digest = hashlib.sha1(os.path.abspath(data_path).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(index_dir, f"{os.path.basename(data_path)}-{digest}.npz")
+
+
+def data_signature(data_path: str) -> List[Optional[List[int]]]:
+    """
+    Size and modification time of the data file (and its SQLite WAL).
+    """
+    signature = []
+    for path in (data_path, f"{data_path}-wal"):
+        try:
+            stat = os.stat(path)
+            signature.append([stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            signature.append(None)
+    return signature
+
+
+def open_index(
+    store,
+    data_path: str,
+    signature=None,
+    index_dir: str = DEFAULT_INDEX_DIR
+) -> FingerprintIndex:
+    """
+    The saved index for ``data_path``, rebuilt from ``store`` if it is
+    missing or the data file changed since it was saved.
+
+    Pass the ``signature`` taken before opening the store: opening a
+    SQLite database creates its WAL file, which changes the signature.
+    """
+    path = index_path(data_path, index_dir)
+    signature = signature or data_signature(data_path)
+    if os.path.exists(path):
+        try:
+            index = FingerprintIndex.load(path)
+            if index.signature == signature:
+                return index
+        except (OSError, ValueError, KeyError) as error:
+            print(f"⚠ Ignoring unreadable duplicate index {path}: {error}")
+
+    if signature[0] is None:
+        return FingerprintIndex(signature=signature)
+    print(f"🔄 Building duplicate index for {data_path}")
+    return FingerprintIndex.from_frame(store.load(), signature)
+
+
+def drop_duplicates(
+    index: FingerprintIndex,
+    df: pd.DataFrame,
+    window_days: int = 0,
+    group_column: str = "source_file"
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Remove rows of ``df`` already in the index and add the rest to it.
+
+    Rows are checked one ``group_column`` group (source file) at a time,
+    so overlapping files are caught while repeats within a single file,
+    such as two identical purchases on one statement, are kept.
+
+    Returns (new rows, number of duplicates skipped).
+    """
+    if df.empty:
+        return df, 0
+
+    groups = df.groupby(group_column, sort=False, observed=True) if group_column in df.columns else [(None, df)]
+    kept = []
+    for _, group in groups:
+        new = group[~index.find_duplicates(group, window_days)]
+        index.add_frame(new)
+        kept.append(new)
+
+    new = pd.concat(kept) if len(kept) > 1 else kept[0]
+    return new, len(df) - len(new)
@@ -0,0 +1,207 @@
+"""
+heavy_hitters.py
+
+Bounded-memory vendor rankings for cost-driver analysis.
+
+SpaceSaving keeps at most ``capacity`` counters, whatever the number of
+distinct vendors, and tracks an error bound for each: a vendor's true
+spend lies in [estimate - error, estimate]. Vendors whose spend exceeds
+total / capacity are guaranteed to be tracked. Sketches are updated
+chunk by chunk and can be merged, so per-file or per-chunk results
+combine without revisiting rows.
+
+VendorRanking keeps one sketch per category; vendors are transaction
+descriptions. Only positive spend is counted (refunds are ignored).
+"""
+
+import heapq
+from operator import itemgetter
+from typing import Dict, Iterable, List, Tuple
+
+import pandas as pd
+
+from src.schema import CENTS_PER_DOLLAR, amount_cents
+
+DEFAULT_CAPACITY = 200
+DEFAULT_TOP_N = 3
+
+
+def top_k(totals: Dict[str, float], k: int) -> List[Tuple[str, float]]:
+    """
+    The ``k`` largest items, highest first, using a bounded heap
+    (O(n log k) instead of a full sort).
+    """
+    return heapq.nlargest(k, totals.items(), key=itemgetter(1))
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving sketch (Metwally et al.) over integer weights.
+
+    Counters live in a dict; a lazily cleaned min-heap finds the
+    smallest counter to replace when a new item arrives at capacity.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def _push(self, item: str):
+        heapq.heappush(self._heap, (self.counts[item], item))
+        # Stale heap entries pile up as counters grow; rebuild now and then.
+        if len(self._heap) > 4 * self.capacity + 64:
+            self._heap = [(count, key) for key, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _clean_top(self):
+        while self._heap and self.counts.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def min_count(self) -> int:
+        """
+        Smallest counter when full (the error bound for untracked
+        items), else 0.
+        """
+        if len(self.counts) < self.capacity:
+            return 0
+        self._clean_top()
+        return self._heap[0][0]
+
+    def update(self, item: str, weight: int = 1):
+        if weight <= 0:
+            return
+        if item in self.counts:
+            self.counts[item] += weight
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = weight
+            self.errors[item] = 0
+        else:
+            self._clean_top()
+            floor, victim = heapq.heappop(self._heap)
+            del self.counts[victim]
+            del self.errors[victim]
+            self.counts[item] = floor + weight
+            self.errors[item] = floor
+        self._push(item)
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Combine two sketches (Agarwal et al., mergeable summaries).
+        Items missing from one side are assumed to have up to that
+        side's minimum counter.
+        """
+        m1, m2 = self.min_count(), other.min_count()
+        merged = SpaceSaving(max(self.capacity, other.capacity))
+        combined = [
+            (item,
+             self.counts.get(item, m1) + other.counts.get(item, m2),
+             self.errors.get(item, m1) + other.errors.get(item, m2))
+            for item in set(self.counts) | set(other.counts)
+        ]
+        for item, count, error in heapq.nlargest(merged.capacity, combined, key=itemgetter(1)):
+            merged.counts[item] = count
+            merged.errors[item] = error
+        merged._heap = [(count, item) for item, count in merged.counts.items()]
+        heapq.heapify(merged._heap)
+        return merged
+
+    def top(self, k: int) -> List[Tuple[str, int, int]]:
+        """
+        (item, estimate, error) for the ``k`` largest counters.
+        """
+        return [
+            (item, count, self.errors[item])
+            for item, count in heapq.nlargest(k, self.counts.items(), key=itemgetter(1))
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "counters": [[item, count, self.errors[item]] for item, count in self.counts.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpaceSaving":
+        sketch = cls(data["capacity"])
+        for item, count, error in data["counters"]:
+            sketch.counts[item] = int(count)
+            sketch.errors[item] = int(error)
+        sketch._heap = [(count, item) for item, count in sketch.counts.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
+
+
+class VendorRanking:
+    """
+    Top vendors per category, one SpaceSaving sketch per category.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.sketches: Dict[str, SpaceSaving] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, capacity: int = DEFAULT_CAPACITY) -> "VendorRanking":
+        ranking = cls(capacity)
+        ranking.update_frame(df)
+        return ranking
+
+    def update_frame(self, df: pd.DataFrame, vendor_column: str = "description"):
+        """
+        Fold in a chunk of cleaned, categorized transactions.
+
+        Spend is summed per (category, vendor) first, so each distinct
+        pair in the chunk costs one sketch update.
+        """
+        if df.empty:
+            return
+        grouped = amount_cents(df).groupby([df["category"], df[vendor_column]], observed=True).sum()
+        self.update_totals((category, vendor, cents) for (category, vendor), cents in grouped.items())
+
+    def update_totals(self, rows: Iterable[Tuple[str, str, int]]):
+        """
+        Fold in pre-aggregated (category, vendor, cents) rows.
+        """
+        for category, vendor, cents in rows:
+            sketch = self.sketches.get(category)
+            if sketch is None:
+                sketch = self.sketches[category] = SpaceSaving(self.capacity)
+            sketch.update(str(vendor), int(cents))
+
+    def merge(self, other: "VendorRanking") -> "VendorRanking":
+        merged = VendorRanking(max(self.capacity, other.capacity))
+        for category in set(self.sketches) | set(other.sketches):
+            mine, theirs = self.sketches.get(category), other.sketches.get(category)
+            merged.sketches[category] = (
+                mine.merge(theirs) if mine and theirs else mine or theirs
+            )
+        return merged
+
+    def top(self, n: int = DEFAULT_TOP_N) -> Dict[str, List[Tuple[str, float, float]]]:
+        """
+        Category → [(vendor, spend, error)] in dollars, largest first.
+        Spend is an upper estimate; the true value is at least
+        spend - error (error is 0 while a category has fewer than
+        ``capacity`` distinct vendors).
+        """
+        return {
+            category: [
+                (vendor, count / CENTS_PER_DOLLAR, error / CENTS_PER_DOLLAR)
+                for vendor, count, error in sketch.top(n)
+            ]
+            for category, sketch in sorted(self.sketches.items())
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "categories": {c: s.to_dict() for c, s in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VendorRanking":
+        ranking = cls(data["capacity"])
+        ranking.sketches = {c: SpaceSaving.from_dict(s) for c, s in data["categories"].items()}
+        return ranking
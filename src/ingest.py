@@ -1,8 +1,17 @@
+import glob
 import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
 import pandas as pd
 
+from src.schema import READ_DTYPES, assign_ids, concat_frames
+
 REQUIRED_COLUMNS = {"date", "description", "amount"}
 
+# Rows sampled to estimate in-memory size when sizing chunks by memory.
+SIZE_SAMPLE_ROWS = 1000
+
 
 def load_transactions(path: str = "data/transactions.csv") -> pd.DataFrame:
     """
@@ -12,6 +21,7 @@ def load_transactions(path: str = "data/transactions.csv") -> pd.DataFrame:
     - Check file existence
     - Load CSV into DataFrame
     - Validate required columns
+    - Index rows by transaction ID (stored 'id' column, else row number)
     - Return raw data for preprocessing
 
     Returns an empty DataFrame if loading fails.
@@ -22,7 +32,7 @@ def load_transactions(path: str = "data/transactions.csv") -> pd.DataFrame:
         return pd.DataFrame()
 
     try:
-        df = pd.read_csv(path)
+        df = pd.read_csv(path, dtype=READ_DTYPES)
 
         missing_columns = REQUIRED_COLUMNS - set(df.columns)
         if missing_columns:
@@ -30,8 +40,154 @@ def load_transactions(path: str = "data/transactions.csv") -> pd.DataFrame:
             return pd.DataFrame()
 
         print(f"✅ Loaded {len(df)} raw transaction(s)")
-        return df
+        return assign_ids(df)
 
     except Exception as error:
         print(f"⚠ Failed to load transactions: {error}")
         return pd.DataFrame()
+
+
+def estimate_chunk_rows(path: str, memory_limit_mb: float) -> int:
+    """
+    Estimate how many rows fit in ``memory_limit_mb`` once loaded.
+
+    A small sample is read to measure the deep memory usage per row.
+    """
+    sample = pd.read_csv(path, nrows=SIZE_SAMPLE_ROWS, dtype=READ_DTYPES)
+    if sample.empty:
+        return SIZE_SAMPLE_ROWS
+
+    bytes_per_row = sample.memory_usage(deep=True).sum() / len(sample)
+    return max(1, int(memory_limit_mb * 1024 * 1024 / bytes_per_row))
+
+
+def iter_transaction_chunks(
+    path: str = "data/transactions.csv",
+    chunk_rows: int = 100_000
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield raw transaction data from a CSV file in bounded chunks.
+
+    Performs the same existence and column checks as load_transactions,
+    but never holds more than ``chunk_rows`` raw rows in memory.
+    Yields nothing if the file is missing or invalid.
+    """
+    if not os.path.exists(path):
+        print("⚠ Transaction file not found.")
+        return
+
+    try:
+        reader = pd.read_csv(path, chunksize=chunk_rows, dtype=READ_DTYPES)
+        for chunk in reader:
+            missing_columns = REQUIRED_COLUMNS - set(chunk.columns)
+            if missing_columns:
+                print(f"⚠ Missing required columns: {', '.join(missing_columns)}")
+                return
+            yield chunk
+
+    except Exception as error:
+        print(f"⚠ Failed to load transactions: {error}")
+
+
+def resolve_sources(source: str) -> List[str]:
+    """
+    Expand a file, directory or glob pattern into a sorted list of CSVs.
+    """
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "*.csv")))
+    if glob.has_magic(source):
+        return sorted(p for p in glob.glob(source) if os.path.isfile(p))
+    return [source] if os.path.exists(source) else []
+
+
+def _prepare_file(path, matcher, predicate_rules, rejects_dir):
+    """
+    Worker: load, clean and categorize one file.
+
+    Returns (path, DataFrame, None) on success or (path, None, error).
+    """
+    from src.categorize import auto_categorize
+    from src.preprocess import validate_and_clean
+
+    try:
+        df = pd.read_csv(path, dtype=READ_DTYPES)
+
+        missing_columns = REQUIRED_COLUMNS - set(df.columns)
+        if missing_columns:
+            raise ValueError(f"missing required columns: {', '.join(sorted(missing_columns))}")
+
+        rejects_path = None
+        if rejects_dir:
+            name = os.path.splitext(os.path.basename(path))[0]
+            rejects_path = os.path.join(rejects_dir, f"{name}.rejects.csv")
+
+        df = validate_and_clean(df, verbose=False, rejects_path=rejects_path)
+        df = auto_categorize(df, matcher=matcher, predicate_rules=predicate_rules)
+
+        # Provenance: originating file and 0-based data row within it.
+        df["source_row"] = df.index.astype("int64")
+        df["source_file"] = pd.Categorical([path] * len(df))
+        return path, df.reset_index(drop=True), None
+
+    except Exception as error:
+        return path, None, str(error)
+
+
+def load_transaction_files(
+    source: str,
+    rules_path: str = "config/rules.yml",
+    workers: Optional[int] = None,
+    rejects_dir: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Load, clean and categorize every CSV in a directory or glob.
+
+    Files are processed in parallel worker processes and combined in
+    path order, with 'source_file' and 'source_row' provenance columns.
+    A file that fails to load is reported and skipped.
+
+    Parameters
+    ----------
+    source : str
+        A CSV file, a directory of CSVs, or a glob such as
+        "data/exports/*-2025-*.csv".
+    rules_path : str
+        Path to YAML rules file.
+    workers : int, optional
+        Worker processes. Defaults to the CPU count; 1 runs in-process.
+    rejects_dir : str, optional
+        Directory for per-file rejected-row reports.
+
+    Returns
+    -------
+    pd.DataFrame
+        Cleaned and categorized transactions (empty if nothing loaded).
+    """
+    from src.categorize import load_compiled_rules
+
+    paths = resolve_sources(source)
+    if not paths:
+        print(f"⚠ No transaction files found for {source}")
+        return pd.DataFrame()
+
+    # Compile rules once; workers receive the compiled objects.
+    matcher, predicate_rules = load_compiled_rules(rules_path)
+    jobs = [(path, matcher, predicate_rules, rejects_dir) for path in paths]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) == 1:
+        results = [_prepare_file(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            results = list(pool.map(_prepare_file, *zip(*jobs)))
+
+    frames = []
+    for path, df, error in results:
+        if error is not None:
+            print(f"⚠ Skipped {path}: {error}")
+        else:
+            frames.append(df)
+
+    df = concat_frames(frames)
+    print(f"✅ Loaded {len(df)} transaction(s) from {len(frames)} of {len(paths)} file(s)")
+    return df
@@ -0,0 +1,187 @@
+"""
+instrumentation.py
+
+Per-stage timing and memory instrumentation for the pipeline.
+
+    profiler = StageProfiler(enabled=True, profile_stage="categorize")
+    with profiler.stage("clean", rows_in=len(df)) as stage:
+        df = validate_and_clean(df)
+        stage.rows_out = len(df)
+    profiler.log()
+
+Each stage records wall time, rows in/out and the growth of the process
+peak RSS. For one chosen stage, cProfile and tracemalloc can also be
+captured. When disabled, stage() hands back a shared no-op object, so
+the overhead is a single attribute check.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_kb() -> Optional[int]:
+    """
+    Peak resident set size of this process in KB (None if unavailable).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes.
+    return peak // 1024 if os.uname().sysname == "Darwin" else peak
+
+
+class StageRecord:
+    """
+    Measurements for one pipeline stage.
+    """
+
+    def __init__(self, name: str, rows_in: Optional[int] = None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self.seconds = 0.0
+        self.peak_rss_delta_kb: Optional[int] = None
+        self.traced_peak_kb: Optional[int] = None
+        self.profile: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "seconds": round(self.seconds, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "peak_rss_delta_kb": self.peak_rss_delta_kb,
+            "traced_peak_kb": self.traced_peak_kb,
+        }
+
+
+class _NullStage:
+    """
+    Stand-in returned when instrumentation is disabled.
+    """
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _ActiveStage:
+    def __init__(self, profiler: "StageProfiler", record: StageRecord, detailed: bool):
+        self._profiler = profiler
+        self._record = record
+        self._detailed = detailed
+        self._cprofile = None
+
+    @property
+    def rows_out(self):
+        return self._record.rows_out
+
+    @rows_out.setter
+    def rows_out(self, value):
+        self._record.rows_out = value
+
+    def __enter__(self):
+        self._rss_before = _peak_rss_kb()
+        if self._detailed:
+            tracemalloc.start()
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record = self._record
+        record.seconds = time.perf_counter() - self._start
+
+        if self._detailed:
+            self._cprofile.disable()
+            record.traced_peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+
+            stream = io.StringIO()
+            pstats.Stats(self._cprofile, stream=stream).sort_stats("cumulative").print_stats(
+                self._profiler.profile_limit
+            )
+            record.profile = stream.getvalue()
+
+        rss_after = _peak_rss_kb()
+        if self._rss_before is not None and rss_after is not None:
+            record.peak_rss_delta_kb = rss_after - self._rss_before
+
+        self._profiler.records.append(record)
+        return False
+
+
+class StageProfiler:
+    """
+    Collects StageRecords for one pipeline run.
+
+    Args:
+        enabled (bool): Record anything at all
+        profile_stage (str): Stage to also run under cProfile/tracemalloc
+        profile_limit (int): Functions listed in the cProfile report
+    """
+
+    def __init__(self, enabled: bool = False, profile_stage: Optional[str] = None, profile_limit: int = 25):
+        self.enabled = enabled
+        self.profile_stage = profile_stage
+        self.profile_limit = profile_limit
+        self.records: List[StageRecord] = []
+
+    def stage(self, name: str, rows_in: Optional[int] = None):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _ActiveStage(self, StageRecord(name, rows_in), name == self.profile_stage)
+
+    def summary(self) -> str:
+        lines = ["⏱ Stage Timings", "-" * 15]
+        for r in self.records:
+            rows = f"{r.rows_in if r.rows_in is not None else '-'} → {r.rows_out if r.rows_out is not None else '-'}"
+            mem = f"{r.peak_rss_delta_kb:+,} KB" if r.peak_rss_delta_kb is not None else "n/a"
+            lines.append(f"{r.name:<12} {r.seconds * 1000:>10.1f} ms  rows {rows:<18} peak mem {mem}")
+        return "\n".join(lines)
+
+    def log(self, log_path: str = "output/audit_logs/stages.jsonl"):
+        """
+        Write stage records (and any captured profile) to the audit log.
+        """
+        if not self.enabled or not self.records:
+            return
+
+        from src.audit_logger import get_sink, run_timestamp
+
+        timestamp = datetime.now().isoformat()
+        get_sink(log_path, fmt="jsonl").write_many(
+            [dict(r.as_dict(), timestamp=timestamp) for r in self.records]
+        )
+
+        for r in self.records:
+            if r.profile:
+                log_dir = os.path.dirname(log_path) or "."
+                os.makedirs(log_dir, exist_ok=True)
+                profile_path = os.path.join(
+                    log_dir,
+                    f"profile_{r.name}_{run_timestamp():%Y%m%d_%H%M%S}.txt"
+                )
+                with open(profile_path, "w", encoding="utf-8") as f:
+                    f.write(r.profile)
@@ -2,11 +2,38 @@
 interactive.py
 
 Provides simple CLI-based interaction for modifying expense data.
+
+Transactions are addressed by their persistent ID. Instead of printing
+the whole table, edit and delete accept an ID directly or open a paged,
+filtered listing to find one.
 """
 
+import csv
+import math
+import os
+
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+from src.dedup import drop_duplicates
+from src.schema import (
+    AMOUNT_COLUMN,
+    READ_DTYPES,
+    TOMBSTONE_COLUMN,
+    append_rows,
+    assign_ids,
+    concat_frames,
+    get_amount,
+    is_live,
+    mark_deleted,
+    next_id,
+    set_value,
+    to_storage_frame
+)
+
+PAGE_SIZE = 20
+
 DEFAULT_DESCRIPTIONS = {
     "Fuel": "Fuel expense",
     "Food": "Food purchase",
@@ -23,16 +50,25 @@ def show_menu() -> str:
     print("2. Edit Transaction")
     print("3. Delete Transaction")
     print("4. Continue to Analysis")
-    print("5. Exit")
+    print("5. Bulk Add (paste lines or import a receipts CSV)")
+    print("6. Exit")
 
-    return input("Enter your choice (1–5): ").strip()
+    return input("Enter your choice (1–6): ").strip()
 
 
-def add_transaction(df):
+def add_transaction(df, journal=None, totals=None, index=None):
     print("\n➕ Add a New Transaction")
 
     category = input("Category: ").strip()
-    date = input("Date (YYYY-MM-DD): ").strip()
+
+    # Safe date input
+    while True:
+        date = input("Date (YYYY-MM-DD): ").strip()
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+            break
+        except ValueError:
+            print("❌ Invalid date. Please use YYYY-MM-DD (e.g., 2025-12-31).")
 
     # Safe amount input
     while True:
@@ -50,47 +86,269 @@ def add_transaction(df):
     description = DEFAULT_DESCRIPTIONS.get(category, f"{category} expense")
 
     new_row = {
+        "id": journal.next_id(df) if journal is not None else next_id(df),
         "date": date,
         "category": category,
         "amount": amount,
         "description": description
     }
 
-    df = df._append(new_row, ignore_index=True)
+    if index is not None:
+        row = pd.DataFrame({"date": [pd.Timestamp(date)], "description": [description], "amount": [amount]})
+        if index.find_duplicates(row).any():
+            print("⚠ A transaction with the same date, amount and description already exists.")
+            if input("Add it anyway? (y/n): ").strip().lower() != "y":
+                print("❌ Transaction not added.\n")
+                return df
+        index.add_frame(row)
+
+    df = append_rows(df, [new_row])
+    if journal is not None:
+        journal.record_add(new_row)
+    if totals is not None:
+        totals.add(category, amount)
     print("✅ Transaction added successfully\n")  # Blank line for readability
 
     return df
 
 
-def edit_transaction(df: pd.DataFrame) -> pd.DataFrame:
-    print("\n✏️ Edit Transaction")
+def parse_bulk_lines(lines):
+    """
+    Parse pasted "date,description,amount" lines into raw row dicts.
+
+    Returns (rows, errors) where errors are (line number, message).
+    Dates and amounts are validated later, with the rest of the batch.
+    """
+    rows, errors = [], []
+    for number, fields in enumerate(csv.reader(lines), start=1):
+        if not fields or not "".join(fields).strip():
+            continue
+        if len(fields) != 3:
+            errors.append((number, "expected date,description,amount"))
+            continue
+        date, description, amount = (f.strip() for f in fields)
+        rows.append({"date": date, "description": description, "amount": amount})
+    return rows, errors
+
+
+def _read_pasted_lines():
+    print("Paste one transaction per line as date,description,amount (blank line to finish):")
+    lines = []
+    while True:
+        try:
+            line = input()
+        except EOFError:
+            break
+        if not line.strip():
+            break
+        lines.append(line)
+    return lines
+
+
+def prepare_batch(raw: pd.DataFrame, rules_path="config/rules.yml", rejects_path=None) -> pd.DataFrame:
+    """
+    Clean and categorize a batch of new rows in one pass, using the
+    same rules as a full load.
+    """
+    from src.categorize import auto_categorize
+    from src.preprocess import validate_and_clean
+
+    if raw.empty:
+        return raw
+    batch = validate_and_clean(raw.reset_index(drop=True), verbose=False, rejects_path=rejects_path)
+    rejected = len(raw) - len(batch)
+    if rejected:
+        print(f"⚠ Skipped {rejected} row(s) with an invalid date or amount")
+    batch = batch[batch[AMOUNT_COLUMN] > 0]
+    if len(batch) < len(raw) - rejected:
+        print(f"⚠ Skipped {len(raw) - rejected - len(batch)} row(s) with a non-positive amount")
+    return auto_categorize(batch, rules_path)
+
+
+def bulk_add_transactions(df, journal=None, totals=None, rules_path="config/rules.yml", index=None):
+    """
+    Add many transactions at once.
 
-    print(df[["date", "category", "description", "amount"]])
-    try:
-        idx = int(input("Enter row index to edit: "))
-    except ValueError:
-        print("❌ Invalid index input.")
+    New rows are collected in a plain list (or read from a receipts
+    CSV), cleaned and categorized as one batch, appended with a single
+    concat and recorded with a single journal write. With a
+    FingerprintIndex, rows already recorded are skipped.
+    """
+    print("\n📥 Bulk Add Transactions")
+    path = input("Receipts CSV path (leave blank to paste lines): ").strip()
+
+    if path:
+        if not os.path.exists(path):
+            print(f"❌ File not found: {path}")
+            return df
+        try:
+            raw = pd.read_csv(path, dtype=READ_DTYPES)
+        except Exception as error:
+            print(f"❌ Could not read {path}: {error}")
+            return df
+        missing = {"date", "description", "amount"} - set(raw.columns)
+        if missing:
+            print(f"❌ Missing required columns: {', '.join(sorted(missing))}")
+            return df
+        raw = raw[["date", "description", "amount"]]
+    else:
+        rows, errors = parse_bulk_lines(_read_pasted_lines())
+        for number, message in errors:
+            print(f"⚠ Line {number}: {message}")
+        raw = pd.DataFrame(rows, columns=["date", "description", "amount"])
+
+    batch = prepare_batch(raw, rules_path)
+    if index is not None:
+        batch, skipped = drop_duplicates(index, batch)
+        if skipped:
+            print(f"♻ Skipped {skipped} duplicate transaction(s) already recorded")
+    if batch.empty:
+        print("❌ No valid transactions to add.")
         return df
 
-    if idx not in df.index:
-        print("❌ Invalid index.")
+    start = journal.next_id(df) if journal is not None else next_id(df)
+    batch = assign_ids(batch, start=start)
+    if TOMBSTONE_COLUMN in df.columns:
+        batch[TOMBSTONE_COLUMN] = False
+    df = concat_frames([df, batch], ignore_index=False)
+
+    if journal is not None:
+        journal.record_add_many(to_storage_frame(batch).to_dict("records"))
+    if totals is not None:
+        totals.add_frame(batch)
+    print(f"✅ Added {len(batch)} transaction(s)\n")
+
+    return df
+
+
+def filter_transactions(
+    df: pd.DataFrame,
+    start=None,
+    end=None,
+    category: str = None,
+    search: str = None
+) -> pd.DataFrame:
+    """
+    Live transactions matching an inclusive date range, a category
+    (case-insensitive) and a description substring. Empty filters are
+    ignored.
+    """
+    mask = pd.Series(True, index=df.index)
+    if TOMBSTONE_COLUMN in df.columns:
+        mask &= ~df[TOMBSTONE_COLUMN]
+    if start:
+        mask &= df["date"] >= pd.Timestamp(start)
+    if end:
+        mask &= df["date"] < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+    if category:
+        mask &= df["category"].astype(str).str.lower() == category.lower()
+    if search:
+        # Match each distinct description once.
+        descriptions = df["description"].astype("category")
+        hits = np.append(descriptions.cat.categories.str.contains(search, case=False, regex=False), False)
+        mask &= hits[descriptions.cat.codes.to_numpy()]
+    return df[mask]
+
+
+def _input_date(prompt: str):
+    while True:
+        value = input(prompt).strip()
+        if not value:
+            return None
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+            return value
+        except ValueError:
+            print("❌ Invalid date. Please use YYYY-MM-DD (e.g., 2025-12-31).")
+
+
+def browse_transactions(df: pd.DataFrame, page_size: int = PAGE_SIZE):
+    """
+    Filter and page through transactions.
+
+    Returns the transaction ID the user picks, or None.
+    """
+    print("\n🔎 Filter transactions (leave blank to skip)")
+    start = _input_date("From date (YYYY-MM-DD): ")
+    end = _input_date("To date (YYYY-MM-DD): ")
+    category = input("Category: ").strip()
+    search = input("Description contains: ").strip()
+
+    matches = filter_transactions(df, start, end, category, search)
+    if matches.empty:
+        print("No matching transactions.")
+        return None
+
+    pages = math.ceil(len(matches) / page_size)
+    page = 0
+    while True:
+        rows = to_storage_frame(matches.iloc[page * page_size:(page + 1) * page_size])
+        print(f"\nPage {page + 1} of {pages} ({len(matches)} match(es))")
+        print(rows[["id", "date", "category", "description", "amount"]].to_string(index=False))
+
+        choice = input("Transaction ID, [n]ext, [p]rev or [q]uit: ").strip().lower()
+        if choice == "n":
+            page = min(page + 1, pages - 1)
+        elif choice == "p":
+            page = max(page - 1, 0)
+        elif choice in ("q", ""):
+            return None
+        else:
+            try:
+                return int(choice)
+            except ValueError:
+                print("❌ Invalid choice.")
+
+
+def select_transaction(df: pd.DataFrame, action: str):
+    """
+    Ask for a transaction ID (or 'l' to list and filter first).
+
+    Returns a live transaction ID or None.
+    """
+    choice = input(f"Enter transaction ID to {action} (or 'l' to list): ").strip().lower()
+    if choice == "l":
+        transaction_id = browse_transactions(df)
+        if transaction_id is None:
+            return None
+    else:
+        try:
+            transaction_id = int(choice)
+        except ValueError:
+            print("❌ Invalid ID input.")
+            return None
+
+    if not is_live(df, transaction_id):
+        print("❌ No transaction with that ID.")
+        return None
+    return transaction_id
+
+
+def edit_transaction(df: pd.DataFrame, journal=None, totals=None) -> pd.DataFrame:
+    print("\n✏️ Edit Transaction")
+
+    idx = select_transaction(df, "edit")
+    if idx is None:
         return df
 
+    old_category = df.at[idx, "category"]
+    old_amount = get_amount(df, idx)
+
     # Edit Category
     new_category = input(f"New Category (current: {df.at[idx, 'category']}): ").strip()
     if new_category:
-        df.at[idx, "category"] = new_category
+        set_value(df, idx, "category", new_category)
         # Only set default description if the user leaves description blank
         new_description = input(f"New Description (leave blank to use default for {new_category}): ").strip()
         if new_description:
-            df.at[idx, "description"] = new_description
+            set_value(df, idx, "description", new_description)
         else:
             # Auto-fill based on category
-            df.at[idx, "description"] = DEFAULT_DESCRIPTIONS.get(new_category, f"{new_category} expense")
+            set_value(df, idx, "description", DEFAULT_DESCRIPTIONS.get(new_category, f"{new_category} expense"))
 
     # Edit Amount
     while True:
-        new_amount_input = input(f"New Amount (current: {df.at[idx, 'amount']}): ").strip()
+        new_amount_input = input(f"New Amount (current: {get_amount(df, idx)}): ").strip()
         if not new_amount_input:
             break  # Keep existing
         try:
@@ -98,26 +356,38 @@ def edit_transaction(df: pd.DataFrame) -> pd.DataFrame:
             if new_amount <= 0:
                 print("❌ Amount must be greater than zero.")
                 continue
-            df.at[idx, "amount"] = new_amount
+            set_value(df, idx, "amount", new_amount)
             break
         except ValueError:
             print("❌ Invalid amount. Please enter a numeric value (e.g., 25.50).")
 
+    if journal is not None:
+        journal.record_edit(idx, {
+            "category": df.at[idx, "category"],
+            "description": df.at[idx, "description"],
+            "amount": get_amount(df, idx)
+        })
+    if totals is not None:
+        totals.update(old_category, old_amount, df.at[idx, "category"], get_amount(df, idx))
+
     print("✅ Transaction updated successfully\n")  # Blank line for readability
     return df
 
 
-def delete_transaction(df: pd.DataFrame) -> pd.DataFrame:
+def delete_transaction(df: pd.DataFrame, journal=None, totals=None) -> pd.DataFrame:
     print("\n🗑 Delete Transaction")
 
-    print(df[["date", "category", "description", "amount"]])
-    idx = int(input("Enter row index to delete: "))
-
-    if idx not in df.index:
-        print("❌ Invalid index.")
+    idx = select_transaction(df, "delete")
+    if idx is None:
         return df
 
-    df = df.drop(index=idx).reset_index(drop=True)
+    if totals is not None:
+        totals.remove(df.at[idx, "category"], get_amount(df, idx))
+
+    # Tombstone the row; it is dropped when the data is saved.
+    mark_deleted(df, idx)
+    if journal is not None:
+        journal.record_delete(idx)
     print("✅ Transaction deleted.")
 
     return df
\ No newline at end of file
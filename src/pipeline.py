@@ -0,0 +1,179 @@
+"""
+pipeline.py
+
+Runs the analysis stages (anomalies, budget variances and alerts,
+scoring, ranking) on already-aggregated totals, so the interactive
+menu, the batch CLI and the streaming path share one implementation.
+Entity × category budgets are evaluated on the transactions themselves
+(analyze_entities).
+"""
+
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.aggregates import PartialAggregate
+from src.analysis import rank_cost_drivers
+from src.anomalies import (
+    DEFAULT_QUANTILE,
+    OutlierScan,
+    detect_current_anomalies,
+    format_outlier_alerts,
+    load_quantile_state,
+    source_state_path
+)
+from src.budget import (
+    entity_category_totals,
+    evaluate_entity_variances,
+    evaluate_variances,
+    generate_budget_alerts,
+    generate_entity_alerts
+)
+from src.instrumentation import StageProfiler
+from src.scoring import efficiency_score
+
+
+def analyze_totals(
+    total_spend: float,
+    category_totals: Dict[str, float],
+    budgets: Dict[str, float],
+    history=None,
+    baselines_path: Optional[str] = "output/baselines.json",
+    profiler: Optional[StageProfiler] = None,
+    outliers: Optional[OutlierScan] = None,
+    quantiles_path: Optional[str] = "output/quantiles.json",
+    outlier_quantile: float = DEFAULT_QUANTILE,
+    source=None
+) -> dict:
+    """
+    Evaluate totals against budgets and score them.
+
+    Parameters
+    ----------
+    total_spend : float
+    category_totals : Dict[str, float]
+    budgets : Dict[str, float]
+    history : pd.DataFrame or RollupCube, optional
+        Transaction history used for anomaly baselines. Anomaly
+        detection is skipped when omitted.
+    baselines_path : str, optional
+        Where anomaly baselines are stored. When None, baselines are
+        built from ``history`` alone and not saved.
+    profiler : StageProfiler, optional
+        Records the anomalies, budget and scoring stages.
+    outliers : OutlierScan, optional
+        Scan already fed while streaming. When omitted and ``history``
+        is a DataFrame, its rows are scanned here.
+    quantiles_path : str, optional
+        Where per-category quantile sketches are stored.
+    outlier_quantile : float
+        Transactions above this per-category quantile are flagged.
+    source : str or list of str, optional
+        Data path(s) the history comes from. The baselines and quantile
+        sketches are stored per source (see source_state_path).
+
+    Returns
+    -------
+    dict
+        total_spend, category_totals, variances, alerts, anomalies,
+        outliers, score, score_reason, ranked_costs and total_budget.
+    """
+    profiler = profiler or StageProfiler()
+    baselines_path = source_state_path(baselines_path, source)
+    quantiles_path = source_state_path(quantiles_path, source)
+
+    anomalies = []
+    if history is not None:
+        with profiler.stage("anomalies") as stage:
+            anomalies = detect_current_anomalies(history, baselines_path)
+            stage.rows_out = len(anomalies)
+
+    outlier_alerts = []
+    if outliers is not None or (isinstance(history, pd.DataFrame) and quantiles_path):
+        with profiler.stage("outliers") as stage:
+            if outliers is None:
+                outliers = OutlierScan(load_quantile_state(quantiles_path), outlier_quantile)
+                outliers.update(history)
+            outlier_alerts = format_outlier_alerts(outliers.finish(quantiles_path), outliers.quantile)
+            stage.rows_out = len(outlier_alerts)
+
+    with profiler.stage("budget", rows_in=len(category_totals)) as stage:
+        variances = evaluate_variances(category_totals, budgets)
+        alerts = generate_budget_alerts(category_totals, budgets)
+        stage.rows_out = len(alerts)
+
+    with profiler.stage("scoring"):
+        total_budget = float(sum(budgets.values()))
+        score, score_reason = efficiency_score(
+            total_spend=total_spend,
+            total_budget=total_budget,
+            category_variances=variances
+        )
+
+    return {
+        "total_spend": float(total_spend),
+        "total_budget": total_budget,
+        "category_totals": {k: float(v) for k, v in category_totals.items()},
+        "variances": {k: float(v) for k, v in variances.items()},
+        "alerts": alerts,
+        "anomalies": anomalies,
+        "outliers": outlier_alerts,
+        "score": int(score),
+        "score_reason": score_reason,
+        "ranked_costs": [(k, float(v)) for k, v in rank_cost_drivers(category_totals)],
+    }
+
+
+def analyze_aggregate(
+    aggregate: PartialAggregate,
+    budgets: Dict[str, float],
+    baselines_path: Optional[str] = "output/baselines.json",
+    profiler: Optional[StageProfiler] = None,
+    source=None
+) -> dict:
+    """
+    Run analyze_totals on a (merged) PartialAggregate.
+
+    Monthly aggregates also provide the anomaly history, stored per
+    ``source`` (e.g. the aggregate file paths).
+    """
+    total_spend, category_totals = aggregate.totals()
+    return analyze_totals(
+        total_spend,
+        category_totals,
+        budgets,
+        history=aggregate if aggregate.freq == "M" and aggregate.cells else None,
+        baselines_path=baselines_path,
+        profiler=profiler,
+        source=source
+    )
+
+
+def analyze_entities(
+    history: pd.DataFrame,
+    entity_budgets: pd.DataFrame,
+    entity_col: str = "entity",
+    profiler: Optional[StageProfiler] = None
+) -> List[dict]:
+    """
+    Evaluate entity × category budgets against the transactions.
+
+    Budgets with a 'period' column are matched per month (e.g. 2025-01).
+
+    Returns
+    -------
+    list of dict
+        Over-budget entries (entity, category, [period,] actual, budget,
+        variance, severity), most severe first.
+    """
+    profiler = profiler or StageProfiler()
+    period = "M" if "period" in entity_budgets.columns else None
+
+    with profiler.stage("entity_budgets", rows_in=len(history)) as stage:
+        actuals = entity_category_totals(history, entity_col, period)
+        alerts = generate_entity_alerts(evaluate_entity_variances(actuals, entity_budgets))
+        stage.rows_out = len(alerts)
+
+    columns = [c for c in ("entity", "category", "period") if c in alerts.columns]
+    alerts = alerts[columns + ["actual", "budget", "variance", "severity"]]
+    return alerts.round({"actual": 2, "budget": 2, "variance": 2}).to_dict("records")
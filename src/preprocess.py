@@ -1,13 +1,119 @@
+import os
+
+import numpy as np
 import pandas as pd
 
+from src.schema import apply_compact_schema, memory_per_row
+
 REQUIRED_COLUMNS = {"date", "description", "amount"}
 
-def validate_and_clean(df):
+# Candidate formats tried when detecting a file's date format.
+DATE_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+    "%d/%m/%Y",
+    "%d.%m.%Y",
+    "%m/%d/%y",
+    "%Y-%m-%dT%H:%M:%S",
+    "%b %d, %Y",
+    "%d %b %Y",
+]
+
+DATE_SAMPLE_SIZE = 200
+
+# Currency symbols, thousands separators and whitespace stripped from amounts.
+AMOUNT_NOISE = r"[$€£¥,\s]"
+
+
+def detect_date_format(dates: pd.Series):
+    """
+    Detect the date format of a column from a sample of distinct values.
+
+    Each candidate in DATE_FORMATS is tried on the sample and the one
+    that parses the most values wins. Returns None if none match.
+    """
+    sample = pd.Series(dates.dropna().astype(str).unique()[:DATE_SAMPLE_SIZE])
+    if sample.empty:
+        return None
+
+    best_format, best_hits = None, 0
+    for fmt in DATE_FORMATS:
+        hits = pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum()
+        if hits > best_hits:
+            best_format, best_hits = fmt, hits
+            if hits == len(sample):
+                break
+
+    return best_format
+
+
+def parse_dates(dates: pd.Series, date_format=None) -> pd.Series:
+    """
+    Parse a date column with one fixed format.
+
+    Each distinct date string is parsed once and broadcast back to the
+    rows that share it. Values that do not match become NaT.
+    """
+    codes, uniques = pd.factorize(dates)
+    parsed = pd.to_datetime(
+        pd.Series(uniques, dtype=object).astype(str),
+        format=date_format,
+        errors="coerce"
+    ).to_numpy()
+
+    values = np.full(len(dates), np.datetime64("NaT"), dtype=parsed.dtype)
+    present = codes >= 0
+    values[present] = parsed[codes[present]]
+    return pd.Series(values, index=dates.index)
+
+
+def parse_amounts(amounts: pd.Series) -> pd.Series:
+    """
+    Parse amounts, stripping currency symbols and thousands separators.
+
+    Accounting-style negatives such as "(12.50)" are also handled.
+    """
+    if pd.api.types.is_numeric_dtype(amounts):
+        return amounts.astype(float)
+
+    text = amounts.astype(str).str.replace(AMOUNT_NOISE, "", regex=True)
+    negative = text.str.match(r"^\(.*\)$")
+    text = text.str.strip("()")
+
+    values = pd.to_numeric(text, errors="coerce")
+    return values.where(~negative, -values)
+
+
+def write_rejects(rejects: pd.DataFrame, path: str, append: bool = False):
+    """
+    Write rejected rows, with a 'reject_reason' column, to a side file.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    write_header = not (append and os.path.isfile(path))
+    rejects.to_csv(path, mode="a" if append else "w", header=write_header, index=False)
+
+
+def validate_and_clean(df, verbose=True, date_format=None, rejects_path=None, append_rejects=False):
     """
     Validate and clean the transaction DataFrame.
     Converts 'date' and 'amount' to proper types,
-    drops rows with invalid or missing values, and
-    fills missing categories.
+    drops rows with invalid or missing values,
+    fills missing categories, and converts the result
+    to the compact schema (see schema.py).
+
+    The date format is detected once (unless ``date_format`` is given)
+    and every row is parsed with it. Rejected rows, with the reason for
+    each, are written to ``rejects_path`` when provided.
+
+    Set ``verbose=False`` to skip the summary line (e.g. per chunk).
+    Pass ``date_format`` to parse every chunk of a file the same way,
+    and ``append_rejects=True`` to add to an existing rejects file.
     """
     missing_cols = REQUIRED_COLUMNS - set(df.columns)
     if missing_cols:
@@ -16,12 +122,40 @@ def validate_and_clean(df):
     # Count rows before cleaning
     initial_rows = len(df)
 
+    if date_format is None:
+        date_format = detect_date_format(df["date"])
+
     # Convert types (invalid parsing becomes NaN)
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
+    dates = parse_dates(df["date"], date_format)
+    amounts = parse_amounts(df["amount"])
+
+    # Record why each invalid row is rejected
+    reasons = np.select(
+        [
+            df["date"].isna().to_numpy(),
+            dates.isna().to_numpy(),
+            df["amount"].isna().to_numpy(),
+            amounts.isna().to_numpy(),
+        ],
+        [
+            "missing date",
+            f"date does not match format {date_format}",
+            "missing amount",
+            "amount is not numeric",
+        ],
+        default=""
+    )
+    invalid = reasons != ""
+
+    if rejects_path and (invalid.any() or not append_rejects):
+        rejects = df.loc[invalid].copy()
+        rejects["reject_reason"] = reasons[invalid]
+        write_rejects(rejects, rejects_path, append=append_rejects)
 
     # Drop rows with invalid date or amount
-    df = df.dropna(subset=["date", "amount"]).copy()
+    df = df.loc[~invalid].copy()
+    df["date"] = dates[~invalid]
+    df["amount"] = amounts[~invalid]
 
     # Count invalid rows removed
     removed_rows = initial_rows - len(df)
@@ -30,11 +164,13 @@ def validate_and_clean(df):
     if "category" not in df.columns:
         df["category"] = "Uncategorized"
 
+    df = apply_compact_schema(df)
+
     # Print preprocessing summary
-    print(f"🧹 Preprocessing complete: {len(df)} valid row(s), {removed_rows} invalid row(s) removed")
+    if verbose:
+        print(f"🧹 Preprocessing complete: {len(df)} valid row(s), {removed_rows} invalid row(s) removed")
+        print(f"📦 Memory per row (compact schema): {memory_per_row(df):,.0f} bytes")
+        if removed_rows and rejects_path:
+            print(f"📝 Rejected rows written to {rejects_path}")
 
     return df
-
-
-
-
@@ -0,0 +1,183 @@
+"""
+quantiles.py
+
+Mergeable quantile sketches for per-category amount distributions.
+
+TDigest (Dunning) summarizes values as a few hundred weighted centroids
+whatever their number. Centroids are small near the tails and large in
+the middle (the arcsine scale function), so extreme quantiles such as
+p99 stay accurate, which is what flagging unusual amounts needs.
+Digests merge by pooling centroids, so chunks, files and earlier runs
+combine without revisiting rows. Values are integer cents.
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from src.schema import amount_cents
+
+DEFAULT_COMPRESSION = 200
+
+
+class TDigest:
+    """
+    Merging t-digest over numeric values.
+
+    Attributes
+    ----------
+    compression : int
+        Accuracy parameter; at most about compression / 2 centroids
+        are kept.
+    n : int
+        Number of values seen.
+    means, weights : np.ndarray
+        Centroids, sorted by mean.
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.n = 0
+        self.min = None
+        self.max = None
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    def update_many(self, values):
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+        self.n += len(values)
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))])
+        )
+
+    def update(self, value):
+        self.update_many([value])
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        """
+        Merge centroids whose rank midpoints fall in the same unit of
+        the scale function k(q) = compression / (2π) · asin(2q − 1).
+        """
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        scale = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+
+        # Scale is non-decreasing, so each bucket is a contiguous run.
+        starts = np.flatnonzero(np.r_[True, scale[1:] != scale[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """
+        Digest of both inputs' values; neither input is modified.
+        """
+        merged = TDigest(max(self.compression, other.compression))
+        merged.n = self.n + other.n
+        bounds = [v for v in (self.min, other.min) if v is not None]
+        merged.min = min(bounds) if bounds else None
+        bounds = [v for v in (self.max, other.max) if v is not None]
+        merged.max = max(bounds) if bounds else None
+        if merged.n:
+            merged._compress(
+                np.concatenate([self.means, other.means]),
+                np.concatenate([self.weights, other.weights])
+            )
+        return merged
+
+    def quantile(self, q: float):
+        """
+        Estimated value at quantile ``q`` (0-1), or None when empty.
+
+        Interpolates between centroid midpoints, and between the
+        outermost centroids and the exact minimum and maximum.
+        """
+        if not self.n:
+            return None
+        cumulative = np.cumsum(self.weights)
+        midpoints = cumulative - self.weights / 2
+        return float(np.interp(
+            q * cumulative[-1],
+            np.r_[0.0, midpoints, cumulative[-1]],
+            np.r_[self.min, self.means, self.max]
+        ))
+
+    def to_dict(self) -> dict:
+        return {
+            "compression": self.compression,
+            "n": self.n,
+            "min": self.min,
+            "max": self.max,
+            "centroids": [[float(m), float(w)] for m, w in zip(self.means, self.weights)],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TDigest":
+        digest = cls(data.get("compression", DEFAULT_COMPRESSION))
+        digest.n = int(data.get("n", 0))
+        digest.min = data.get("min")
+        digest.max = data.get("max")
+        centroids = np.asarray(data.get("centroids", []), dtype=float).reshape(-1, 2)
+        digest.means, digest.weights = centroids[:, 0], centroids[:, 1]
+        return digest
+
+
+class QuantileSketches:
+    """
+    One TDigest of transaction amounts (cents) per category.
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.sketches: Dict[str, TDigest] = {}
+
+    def update_frame(self, df: pd.DataFrame):
+        """
+        Fold in a chunk of cleaned, categorized transactions.
+        """
+        if df.empty:
+            return
+        for category, cents in amount_cents(df).groupby(df["category"], observed=True):
+            sketch = self.sketches.get(category)
+            if sketch is None:
+                sketch = self.sketches[category] = TDigest(self.compression)
+            sketch.update_many(cents.to_numpy())
+
+    def merge(self, other: "QuantileSketches") -> "QuantileSketches":
+        merged = QuantileSketches(max(self.compression, other.compression))
+        for category in set(self.sketches) | set(other.sketches):
+            mine, theirs = self.sketches.get(category), other.sketches.get(category)
+            merged.sketches[category] = mine.merge(theirs) if mine and theirs else mine or theirs
+        return merged
+
+    def thresholds(self, q: float, min_count: int = 1) -> Dict[str, float]:
+        """
+        Category → value (cents) at quantile ``q``, for categories with
+        at least ``min_count`` values.
+        """
+        return {
+            category: sketch.quantile(q)
+            for category, sketch in sorted(self.sketches.items())
+            if sketch.n >= min_count
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "compression": self.compression,
+            "categories": {c: s.to_dict() for c, s in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketches":
+        sketches = cls(data.get("compression", DEFAULT_COMPRESSION))
+        sketches.sketches = {c: TDigest.from_dict(s) for c, s in data.get("categories", {}).items()}
+        return sketches
@@ -1,3 +1,9 @@
+# Large-transaction and entity budget alerts printed before the rest
+# are summarized.
+MAX_OUTLIER_ALERTS = 10
+MAX_ENTITY_ALERTS = 10
+
+
 def generate_summary(
     total_spend: float,
     score: int,
@@ -38,12 +44,15 @@ def generate_summary(
 
 
 
-def print_rankings(ranked_costs):
+def print_rankings(ranked_costs, top_vendors=None):
     """
     Print ranked cost drivers.
 
     Args:
         ranked_costs (list): List of (category, amount) tuples
+        top_vendors (dict, optional): Category → [(vendor, amount, error)]
+            from VendorRanking.top; shown under each category. A nonzero
+            error means the amount is an upper estimate within ±error.
     """
     print("\n📊 Organized Spending Summary by Category (Top Cost Drivers):")
     print("-------------------------------------------------------------")
@@ -52,3 +61,83 @@ def print_rankings(ranked_costs):
 
     for i, (category, amount) in enumerate(ranked_costs, start=1):
         print(f"{i}. {category:<15} ${amount:,.2f}")
+        for vendor, vendor_amount, error in (top_vendors or {}).get(category, []):
+            bound = f" (±${error:,.2f})" if error else ""
+            print(f"     - {vendor:<24} ${vendor_amount:,.2f}{bound}")
+
+
+def print_live_status(live_totals, budgets):
+    """
+    Print a one-line status of running totals during the edit menu.
+
+    Args:
+        live_totals (RunningTotals): Totals kept up to date by the menu
+        budgets (dict): Category → budget
+    """
+    total_spend, _ = live_totals.totals()
+    over_budget = [cat for cat, diff in live_totals.variances(budgets).items() if diff > 0]
+
+    status = f"📈 Running total: ${total_spend:,.2f}"
+    if over_budget:
+        status += f" | Over budget: {', '.join(over_budget)}"
+    print(status)
+
+
+def print_analysis(results: dict):
+    """
+    Print the full analysis report.
+
+    Args:
+        results (dict): Output of pipeline.analyze_totals (or the
+            cached summary written by the batch CLI)
+    """
+    print("\n📉 Budget Variance Report")
+    print("------------------------")
+    for category, diff in results["variances"].items():
+        status = "OVER budget" if diff > 0 else "UNDER budget"
+        print(f"{category:<15} ${diff:>8.2f} ({status})")
+
+    if results["alerts"]:
+        print("\n🚨 Budget Alerts")
+        print("----------------")
+        for alert in results["alerts"]:
+            print(alert)
+            print()  # blank line between alerts
+    else:
+        print("\n✅ No budget overruns detected")
+
+    if results["anomalies"]:
+        print("\n🚨 Unusual Spending Alerts")
+        print("--------------------------")
+        for alert in results["anomalies"]:
+            print(alert)
+            print()  # blank line for readability
+
+    outliers = results.get("outliers") or []
+    if outliers:
+        print("\n🚨 Unusually Large Transactions")
+        print("-------------------------------")
+        for alert in outliers[:MAX_OUTLIER_ALERTS]:
+            print(alert)
+            print()
+        if len(outliers) > MAX_OUTLIER_ALERTS:
+            print(f"... and {len(outliers) - MAX_OUTLIER_ALERTS} more (see the JSON summary)")
+
+    entity_alerts = results.get("entity_alerts") or []
+    if entity_alerts:
+        print("\n🚨 Entity Budget Alerts")
+        print("-----------------------")
+        for alert in entity_alerts[:MAX_ENTITY_ALERTS]:
+            period = f" ({alert['period']})" if alert.get("period") else ""
+            print(f"[{alert['severity']}] {alert['entity']} / {alert['category']}{period}: "
+                  f"${alert['actual']:,.2f} vs budget ${alert['budget']:,.2f} (+${alert['variance']:,.2f})")
+        if len(entity_alerts) > MAX_ENTITY_ALERTS:
+            print(f"... and {len(entity_alerts) - MAX_ENTITY_ALERTS} more (see the JSON summary)")
+
+    print("\n📊 Efficiency Score")
+    print("-------------------")
+    print(f"Overall Efficiency Score: {results['score']}/100")
+    print(f"Reason: {results['score_reason']}")
+
+    print(generate_summary(results["total_spend"], results["score"], results["alerts"]))
+    print_rankings(results["ranked_costs"], results.get("top_vendors"))
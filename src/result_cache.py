@@ -0,0 +1,220 @@
+"""
+result_cache.py
+
+On-disk memoization keyed by the content of the inputs.
+
+A key is a hash of the input files' contents (transactions, rules,
+budgets, ...) plus a cache version, so any edit to an input produces a
+new key and stale entries are simply never read again. File digests are
+remembered by (size, mtime) so unchanged files are not re-hashed on
+every run.
+
+Two kinds of entries are stored:
+- frames  : the cleaned, categorized transactions (pickle, keeps dtypes)
+- results : analysis results (JSON)
+
+The directory is kept under ``max_bytes`` by evicting the least
+recently used entries. Any cache error is treated as a miss.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+# Bump when cleaning, categorization or analysis output changes shape
+# so entries written by older code are not reused.
+CACHE_VERSION = 3
+
+DEFAULT_CACHE_DIR = "output/cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+INDEX_FILE = "digests.json"
+HASH_BLOCK = 1024 * 1024
+
+
+class ResultCache:
+    """
+    Content-addressed cache of frames and analysis results.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        enabled: bool = True
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._digests: Optional[Dict[str, dict]] = None
+
+    # -----------------------------
+    # Keys
+    # -----------------------------
+    def _load_digests(self) -> Dict[str, dict]:
+        if self._digests is None:
+            try:
+                with open(os.path.join(self.cache_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+                    self._digests = json.load(f)
+            except (OSError, ValueError):
+                self._digests = {}
+        return self._digests
+
+    def _save_digests(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = os.path.join(self.cache_dir, INDEX_FILE)
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(self._digests, f)
+            os.replace(f"{path}.tmp", path)
+        except OSError:
+            pass
+
+    def file_digest(self, path: str) -> str:
+        """
+        SHA-256 of a file's content ("missing" if it does not exist).
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return "missing"
+
+        digests = self._load_digests()
+        key = os.path.abspath(path)
+        known = digests.get(key)
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["digest"]
+
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                sha.update(block)
+
+        digests[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": sha.hexdigest()}
+        self._save_digests()
+        return digests[key]["digest"]
+
+    def key(self, paths: Iterable[str], *extra) -> str:
+        """
+        Cache key for the contents of ``paths`` plus any extra values
+        (e.g. a stage name or option) that affect the result.
+        """
+        parts = [f"v{CACHE_VERSION}", pd.__version__]
+        parts += [self.file_digest(path) for path in paths]
+        parts += [str(value) for value in extra]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:32]
+
+    # -----------------------------
+    # Entries
+    # -----------------------------
+    def _path(self, key: str, kind: str) -> str:
+        suffix = "pkl" if kind == "frame" else "json"
+        return os.path.join(self.cache_dir, f"{key}.{kind}.{suffix}")
+
+    def _touch(self, path: str):
+        # Entry mtime doubles as last-used time for eviction.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def get_frame(self, key: str) -> Optional[pd.DataFrame]:
+        path = self._path(key, "frame")
+        if not self.enabled or not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_pickle(path)
+        except Exception as error:
+            print(f"⚠ Ignoring unreadable cache entry {path}: {error}")
+            return None
+        self._touch(path)
+        return df
+
+    def put_frame(self, key: str, df: pd.DataFrame):
+        self._put(key, "frame", lambda tmp: df.to_pickle(tmp))
+
+    def get_results(self, key: str) -> Optional[dict]:
+        path = self._path(key, "results")
+        if not self.enabled or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                results = json.load(f)
+        except (OSError, ValueError) as error:
+            print(f"⚠ Ignoring unreadable cache entry {path}: {error}")
+            return None
+        self._touch(path)
+        return results
+
+    def put_results(self, key: str, results: dict):
+        def write(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(results, f)
+        self._put(key, "results", write)
+
+    def _put(self, key: str, kind: str, write):
+        if not self.enabled:
+            return
+        path = self._path(key, kind)
+        tmp = f"{path}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            write(tmp)
+            os.replace(tmp, path)
+        except Exception as error:
+            print(f"⚠ Could not write cache entry: {error}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.evict()
+
+    # -----------------------------
+    # Maintenance
+    # -----------------------------
+    def _entries(self):
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if name == INDEX_FILE or name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits in
+        ``max_bytes``. Returns the number of entries removed.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
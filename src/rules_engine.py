@@ -0,0 +1,254 @@
+"""
+rules_engine.py
+
+Vectorized predicate rules for categorization.
+
+Keyword rules only look for substrings in the description. Predicate
+rules combine a description regex, an amount range, a date window and
+weekdays, and carry an explicit priority. They are declared in rules.yml
+under ``predicate_rules``:
+
+    predicate_rules:
+      - name: weekend_fuel_card
+        category: Fuel
+        priority: 10
+        description_regex: "shell|pilot|love's"
+        min_amount: 50
+        max_amount: 2000
+        start_date: 2025-01-01
+        end_date: 2025-12-31
+        weekdays: [sat, sun]
+
+Every condition is optional, but a rule needs at least one. Each rule is
+compiled once and evaluated as a boolean mask over the whole DataFrame.
+When several rules match a row, the highest priority wins; ties go to the
+rule declared first.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config_cache import get_config, read_yaml
+from src.schema import AMOUNT_COLUMN, amount_dollars
+
+WEEKDAYS = {
+    "mon": 0, "tue": 1, "wed": 2, "thu": 3,
+    "fri": 4, "sat": 5, "sun": 6
+}
+
+CONDITION_KEYS = (
+    "description_regex", "min_amount", "max_amount",
+    "start_date", "end_date", "weekdays"
+)
+
+
+@dataclass
+class PredicateRule:
+    """
+    A single compiled predicate rule.
+    """
+    name: str
+    category: str
+    priority: int = 0
+    description_regex: Optional[re.Pattern] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    start_date: Optional[pd.Timestamp] = None
+    end_date: Optional[pd.Timestamp] = None
+    weekdays: Optional[FrozenSet[int]] = None
+
+    def mask(self, context: "RuleContext") -> np.ndarray:
+        """
+        Evaluate the rule against every row at once.
+        """
+        mask = np.ones(context.size, dtype=bool)
+
+        if self.description_regex is not None:
+            mask &= context.description_matches(self.description_regex)
+        if self.min_amount is not None:
+            mask &= context.amount >= self.min_amount
+        if self.max_amount is not None:
+            mask &= context.amount <= self.max_amount
+        if self.start_date is not None:
+            mask &= context.dates >= self.start_date.to_datetime64()
+        if self.end_date is not None:
+            mask &= context.dates <= self.end_date.to_datetime64()
+        if self.weekdays is not None:
+            mask &= np.isin(context.weekdays, list(self.weekdays))
+
+        return mask
+
+
+class RuleContext:
+    """
+    Column views shared by every rule during one evaluation.
+
+    Descriptions are factorized once so each regex only runs over the
+    distinct values; weekday numbers and dates are derived lazily.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.size = len(df)
+        self._codes = None
+        self._uniques = None
+        self._amount = None
+        self._dates = None
+        self._weekdays = None
+
+    def description_matches(self, pattern: re.Pattern) -> np.ndarray:
+        if "description" not in self.df.columns:
+            return np.zeros(self.size, dtype=bool)
+
+        if self._codes is None:
+            self._codes, uniques = pd.factorize(
+                self.df["description"], use_na_sentinel=False
+            )
+            self._uniques = pd.Series(uniques, dtype=object).astype(str)
+
+        hits = self._uniques.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        return hits[self._codes]
+
+    @property
+    def amount(self) -> np.ndarray:
+        if self._amount is None:
+            if "amount" in self.df.columns or AMOUNT_COLUMN in self.df.columns:
+                values = amount_dollars(self.df)
+                self._amount = values.to_numpy(dtype=float, na_value=np.nan)
+            else:
+                self._amount = np.full(self.size, np.nan)
+        return self._amount
+
+    @property
+    def dates(self) -> np.ndarray:
+        if self._dates is None:
+            if "date" in self.df.columns:
+                values = pd.to_datetime(self.df["date"], errors="coerce")
+            else:
+                values = pd.Series(pd.NaT, index=self.df.index)
+            self._dates = values.to_numpy(dtype="datetime64[ns]")
+        return self._dates
+
+    @property
+    def weekdays(self) -> np.ndarray:
+        if self._weekdays is None:
+            days = self.dates.astype("datetime64[D]").astype("int64")
+            # 1970-01-01 was a Thursday (weekday 3).
+            weekdays = (days + 3) % 7
+            weekdays[np.isnat(self.dates)] = -1
+            self._weekdays = weekdays
+        return self._weekdays
+
+
+def load_predicate_rules(path="config/rules.yml") -> list:
+    """
+    Load raw predicate rule definitions from a YAML file.
+
+    Returns
+    -------
+    list
+        List of rule dictionaries (empty if none are defined).
+    """
+    try:
+        return get_config(path, _read_predicate_rules)
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        print(f"⚠ Error loading predicate rules: {e}")
+        return []
+
+
+def _read_predicate_rules(path):
+    return read_yaml(path).get("predicate_rules") or []
+
+
+def _compile_rule(spec: dict, position: int) -> PredicateRule:
+    name = str(spec.get("name", f"rule_{position + 1}"))
+
+    if not spec.get("category"):
+        raise ValueError(f"rule '{name}' has no category")
+    if not any(spec.get(key) is not None for key in CONDITION_KEYS):
+        raise ValueError(f"rule '{name}' has no conditions")
+
+    rule = PredicateRule(
+        name=name,
+        category=str(spec["category"]),
+        priority=int(spec.get("priority", 0))
+    )
+
+    if spec.get("description_regex") is not None:
+        flags = 0 if spec.get("case_sensitive") else re.IGNORECASE
+        rule.description_regex = re.compile(str(spec["description_regex"]), flags)
+    if spec.get("min_amount") is not None:
+        rule.min_amount = float(spec["min_amount"])
+    if spec.get("max_amount") is not None:
+        rule.max_amount = float(spec["max_amount"])
+    if spec.get("start_date") is not None:
+        rule.start_date = pd.Timestamp(spec["start_date"])
+    if spec.get("end_date") is not None:
+        # An end date without a time covers the whole day.
+        end = pd.Timestamp(spec["end_date"])
+        if end == end.normalize():
+            end = end + pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+        rule.end_date = end
+    if spec.get("weekdays") is not None:
+        days = set()
+        for day in spec["weekdays"]:
+            key = str(day).strip().lower()[:3]
+            if key not in WEEKDAYS:
+                raise ValueError(f"rule '{name}' has unknown weekday '{day}'")
+            days.add(WEEKDAYS[key])
+        rule.weekdays = frozenset(days)
+
+    return rule
+
+
+def compile_predicate_rules(specs: list) -> List[PredicateRule]:
+    """
+    Compile rule definitions into evaluation order.
+
+    Invalid rules are reported and skipped. The result is sorted by
+    descending priority, keeping declaration order for ties.
+    """
+    compiled = []
+
+    for position, spec in enumerate(specs):
+        try:
+            compiled.append((position, _compile_rule(spec, position)))
+        except (ValueError, TypeError, re.error) as e:
+            print(f"⚠ Skipping predicate rule: {e}")
+
+    compiled.sort(key=lambda item: (-item[1].priority, item[0]))
+    return [rule for _, rule in compiled]
+
+
+def apply_predicate_rules(
+    df: pd.DataFrame,
+    rules: List[PredicateRule]
+) -> pd.DataFrame:
+    """
+    Override 'category' wherever a predicate rule matches.
+
+    Rows matched by no rule keep their existing category.
+    """
+    if df.empty or not rules:
+        return df
+
+    context = RuleContext(df)
+    assigned = np.zeros(len(df), dtype=bool)
+    categories = df["category"].to_numpy(dtype=object, copy=True)
+
+    for rule in rules:
+        hits = rule.mask(context) & ~assigned
+        if hits.any():
+            categories[hits] = rule.category
+            assigned |= hits
+        if assigned.all():
+            break
+
+    df["category"] = pd.Series(categories, index=df.index, dtype="category")
+    return df
@@ -0,0 +1,246 @@
+"""
+schema.py
+
+Compact in-memory schema for transactions.
+
+After cleaning, transactions are held as:
+- amount_cents : int64 integer cents (replaces the float 'amount')
+- date         : datetime64 at a fixed one-second resolution
+- description, category : pandas 'category' dtype
+
+Files on disk keep the original layout with a dollar 'amount' column;
+to_storage_frame converts back when saving or displaying.
+
+Rows are indexed by a persistent transaction ID (the 'id' index, saved
+as the first column). Lookups by ID go through the pandas index hash
+table. Deleting marks a row in a 'deleted' tombstone column instead of
+dropping it and renumbering; tombstoned rows are dropped in one pass
+when the frame is saved or handed to analysis (live_rows).
+"""
+
+from typing import Iterable, List
+
+import numpy as np
+import pandas as pd
+
+AMOUNT_COLUMN = "amount_cents"
+CENTS_PER_DOLLAR = 100
+DATE_DTYPE = "datetime64[s]"
+CATEGORICAL_COLUMNS = ("description", "category")
+ID_COLUMN = "id"
+TOMBSTONE_COLUMN = "deleted"
+
+# dtypes applied while parsing the CSV, before cleaning.
+READ_DTYPES = {"description": "category", "category": "category"}
+
+
+def to_cents(values) -> np.ndarray:
+    """
+    Convert dollar amounts to int64 cents, rounding half away from zero.
+    """
+    # Round away binary representation noise (0.285 * 100 = 28.4999...)
+    # before rounding to whole cents.
+    dollars = np.asarray(values, dtype=float)
+    scaled = np.round(np.abs(dollars) * CENTS_PER_DOLLAR, 6)
+    return (np.sign(dollars) * np.floor(scaled + 0.5)).astype("int64")
+
+
+def amount_cents(df: pd.DataFrame) -> pd.Series:
+    """
+    Return amounts as int64 cents, whichever schema the frame uses.
+    """
+    if AMOUNT_COLUMN in df.columns:
+        return df[AMOUNT_COLUMN]
+    return pd.Series(to_cents(df["amount"]), index=df.index)
+
+
+def amount_dollars(df: pd.DataFrame) -> pd.Series:
+    """
+    Return amounts as float dollars, whichever schema the frame uses.
+    """
+    if AMOUNT_COLUMN in df.columns:
+        return df[AMOUNT_COLUMN] / CENTS_PER_DOLLAR
+    return pd.to_numeric(df["amount"], errors="coerce")
+
+
+def apply_compact_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a cleaned frame (valid dates and numeric amounts) to the
+    compact schema. Frames already in the compact schema pass through.
+    """
+    if "amount" in df.columns:
+        df[AMOUNT_COLUMN] = to_cents(df["amount"])
+        df = df.drop(columns="amount")
+
+    df["date"] = pd.to_datetime(df["date"]).astype(DATE_DTYPE)
+
+    for column in CATEGORICAL_COLUMNS:
+        if column not in df.columns:
+            continue
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].cat.remove_unused_categories()
+        else:
+            df[column] = df[column].astype("category")
+
+    return df
+
+
+def to_storage_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return a copy in the on-disk layout: live rows only, the transaction
+    ID as the first column and a dollar 'amount' column.
+    """
+    df = live_rows(df)
+    if df.index.name == ID_COLUMN:
+        df = df.reset_index()
+
+    if AMOUNT_COLUMN not in df.columns:
+        return df.copy()
+
+    out = df.drop(columns=AMOUNT_COLUMN)
+    position = list(out.columns).index("description") + 1 if "description" in out.columns else len(out.columns)
+    out.insert(position, "amount", df[AMOUNT_COLUMN].to_numpy() / CENTS_PER_DOLLAR)
+    return out
+
+
+# -----------------------------
+# Transaction IDs and tombstones
+# -----------------------------
+def assign_ids(df: pd.DataFrame, start: int = 0) -> pd.DataFrame:
+    """
+    Index rows by transaction ID.
+
+    A stored 'id' column is used when it is complete and unique;
+    otherwise rows are numbered from ``start``.
+    """
+    if ID_COLUMN in df.columns:
+        ids = pd.to_numeric(df[ID_COLUMN], errors="coerce")
+        df = df.drop(columns=ID_COLUMN)
+        if ids.notna().all() and ids.is_unique:
+            df.index = pd.Index(ids.astype("int64").to_numpy(), name=ID_COLUMN)
+            return df
+        print("⚠ Stored transaction IDs are incomplete or duplicated; renumbering.")
+
+    df.index = pd.RangeIndex(start, start + len(df), name=ID_COLUMN)
+    return df
+
+
+def next_id(df: pd.DataFrame) -> int:
+    """
+    First unused transaction ID (tombstoned IDs are not reused).
+    """
+    if df.index.name != ID_COLUMN or len(df) == 0:
+        return 0
+    return int(df.index.max()) + 1
+
+
+def is_live(df: pd.DataFrame, transaction_id) -> bool:
+    """
+    True if the ID exists and has not been deleted.
+    """
+    if transaction_id not in df.index:
+        return False
+    return TOMBSTONE_COLUMN not in df.columns or not df.at[transaction_id, TOMBSTONE_COLUMN]
+
+
+def mark_deleted(df: pd.DataFrame, transaction_id):
+    """
+    Tombstone one row in place.
+    """
+    if TOMBSTONE_COLUMN not in df.columns:
+        df[TOMBSTONE_COLUMN] = False
+    df.at[transaction_id, TOMBSTONE_COLUMN] = True
+
+
+def live_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop tombstoned rows and the tombstone column.
+    """
+    if TOMBSTONE_COLUMN not in df.columns:
+        return df
+    return df.loc[~df[TOMBSTONE_COLUMN].to_numpy()].drop(columns=TOMBSTONE_COLUMN)
+
+
+def memory_per_row(df: pd.DataFrame) -> float:
+    """
+    Deep memory usage in bytes per row.
+    """
+    if len(df) == 0:
+        return 0.0
+    return float(df.memory_usage(deep=True, index=False).sum()) / len(df)
+
+
+def concat_frames(frames: Iterable[pd.DataFrame], ignore_index: bool = True) -> pd.DataFrame:
+    """
+    Concatenate compact frames, keeping categorical columns categorical.
+
+    pd.concat falls back to object dtype when categories differ, so the
+    categories are unioned first. Pass ``ignore_index=False`` to keep
+    transaction IDs.
+    """
+    frames: List[pd.DataFrame] = [f for f in frames if f is not None]
+    if not frames:
+        return pd.DataFrame()
+
+    columns = list(CATEGORICAL_COLUMNS) + [
+        c for c in frames[0].columns
+        if isinstance(frames[0][c].dtype, pd.CategoricalDtype) and c not in CATEGORICAL_COLUMNS
+    ]
+
+    for column in columns:
+        if not all(column in f.columns for f in frames):
+            continue
+        categories = pd.Index([])
+        for f in frames:
+            values = f[column]
+            categories = categories.union(
+                values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype)
+                else pd.Index(values.dropna().unique())
+            )
+        dtype = pd.CategoricalDtype(categories)
+        frames = [f.assign(**{column: f[column].astype(dtype)}) for f in frames]
+
+    out = pd.concat(frames, ignore_index=ignore_index)
+    if not ignore_index:
+        out.index.name = frames[0].index.name
+    return out
+
+
+def append_rows(df: pd.DataFrame, rows: List[dict]) -> pd.DataFrame:
+    """
+    Append rows given in the on-disk layout (dollar 'amount').
+
+    Rows keep an 'id' they carry; others get the next unused IDs.
+    """
+    if not rows:
+        return df
+
+    new = assign_ids(pd.DataFrame(rows), start=next_id(df))
+    if AMOUNT_COLUMN in df.columns:
+        new = apply_compact_schema(new)
+    if TOMBSTONE_COLUMN in df.columns:
+        new[TOMBSTONE_COLUMN] = False
+    return concat_frames([df, new], ignore_index=df.index.name != ID_COLUMN)
+
+
+def set_value(df: pd.DataFrame, idx, column: str, value):
+    """
+    Set one cell, converting dollar amounts and extending categories.
+    """
+    if column == "amount" and AMOUNT_COLUMN in df.columns:
+        df.at[idx, AMOUNT_COLUMN] = int(to_cents([value])[0])
+        return
+
+    if isinstance(df[column].dtype, pd.CategoricalDtype) and value not in df[column].cat.categories:
+        df[column] = df[column].cat.add_categories([value])
+
+    df.at[idx, column] = value
+
+
+def get_amount(df: pd.DataFrame, idx) -> float:
+    """
+    Dollar amount of a single row.
+    """
+    if AMOUNT_COLUMN in df.columns:
+        return df.at[idx, AMOUNT_COLUMN] / CENTS_PER_DOLLAR
+    return float(df.at[idx, "amount"])
@@ -0,0 +1,257 @@
+"""
+sqlite_store.py
+
+SQLite storage backend.
+
+Transactions live in a single indexed table, already cleaned and
+categorized, with amounts in integer cents and dates as Unix seconds.
+Totals and day × category cubes are computed by SQL GROUP BY queries,
+so analysis reads aggregates instead of the full history. Interactive
+add/edit/delete are written in their own transactions as they happen.
+"""
+
+import os
+import sqlite3
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.cube import RollupCube
+from src.schema import (
+    AMOUNT_COLUMN,
+    CENTS_PER_DOLLAR,
+    DATE_DTYPE,
+    ID_COLUMN,
+    amount_cents,
+    next_id,
+    to_cents
+)
+from src.storage import TransactionStore
+
+SECONDS_PER_DAY = 86_400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    date         INTEGER NOT NULL,
+    description  TEXT,
+    amount_cents INTEGER NOT NULL,
+    category     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS idx_transactions_category_date ON transactions (category, date);
+"""
+
+EDITABLE_COLUMNS = ("date", "description", "category", AMOUNT_COLUMN)
+
+# Floor division that also rounds pre-1970 dates down to their day.
+DAY_EXPR = f"(date - ((date % {SECONDS_PER_DAY}) + {SECONDS_PER_DAY}) % {SECONDS_PER_DAY}) / {SECONDS_PER_DAY}"
+
+
+def _epoch(value) -> int:
+    return int(pd.Timestamp(value).timestamp())
+
+
+def _where(start=None, end=None, categories=None) -> Tuple[str, list]:
+    """
+    Build a WHERE clause for an inclusive date range and category set.
+    """
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("date >= ?")
+        params.append(_epoch(start))
+    if end is not None:
+        clauses.append("date < ?")
+        params.append(_epoch(pd.Timestamp(end).normalize() + pd.Timedelta(days=1)))
+    if categories is not None:
+        categories = [str(c) for c in categories]
+        clauses.append(f"category IN ({', '.join('?' * len(categories))})")
+        params.extend(categories)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class SQLiteStore(TransactionStore):
+    """
+    Transactions in a SQLite database.
+
+    Rows keep their INTEGER PRIMARY KEY for life; it is the transaction
+    ID used as the index of loaded frames and by the change recorder.
+    """
+
+    def __init__(self, path: str = "data/transactions.db"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.pending = 0
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def load(self, start=None, end=None, categories=None) -> pd.DataFrame:
+        where, params = _where(start, end, categories)
+        rows = self._conn.execute(
+            f"SELECT id, date, description, category, amount_cents FROM transactions{where} ORDER BY id",
+            params
+        ).fetchall()
+
+        df = pd.DataFrame({
+            "date": pd.to_datetime(np.array([r[1] for r in rows], dtype=np.int64), unit="s").astype(DATE_DTYPE),
+            "description": pd.Categorical([r[2] for r in rows]),
+            "category": pd.Categorical([r[3] for r in rows]),
+            AMOUNT_COLUMN: np.array([r[4] for r in rows], dtype=np.int64),
+        }, index=pd.Index(np.array([r[0] for r in rows], dtype=np.int64), name=ID_COLUMN))
+        print(f"✅ Loaded {len(df)} transaction(s) from {self.path}")
+        return df
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def category_totals(self, start=None, end=None) -> Tuple[float, Dict[str, float]]:
+        where, params = _where(start, end)
+        rows = self._conn.execute(
+            f"SELECT category, SUM(amount_cents) FROM transactions{where} "
+            "GROUP BY category ORDER BY category",
+            params
+        ).fetchall()
+
+        category_totals = {category: int(cents) / CENTS_PER_DOLLAR for category, cents in rows}
+        return sum(int(cents) for _, cents in rows) / CENTS_PER_DOLLAR, category_totals
+
+    def cube(self, start=None, end=None) -> RollupCube:
+        where, params = _where(start, end)
+        rows = self._conn.execute(
+            f"SELECT {DAY_EXPR} AS day, category, SUM(amount_cents), COUNT(*), "
+            f"MIN(amount_cents), MAX(amount_cents) FROM transactions{where} "
+            "GROUP BY day, category",
+            params
+        ).fetchall()
+        if not rows:
+            return RollupCube.empty()
+
+        columns = list(zip(*rows))
+        days = np.array(columns[0], dtype="int64").astype("datetime64[D]")
+        return RollupCube.from_cells(days, columns[1], *columns[2:])
+
+    def vendor_totals(self, start=None, end=None):
+        """
+        (category, description, cents) for every pair, summed in SQL.
+        """
+        where, params = _where(start, end)
+        return self._conn.execute(
+            f"SELECT category, COALESCE(description, ''), SUM(amount_cents) FROM transactions{where} "
+            "GROUP BY category, description",
+            params
+        )
+
+    # -----------------------------
+    # Bulk import
+    # -----------------------------
+    def import_frame(self, df: pd.DataFrame) -> int:
+        if df.empty:
+            return 0
+
+        dates = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[s]").astype(np.int64)
+        descriptions = df["description"].astype(object).where(df["description"].notna(), None)
+        rows = zip(
+            dates.tolist(),
+            descriptions.tolist(),
+            amount_cents(df).astype(np.int64).tolist(),
+            df["category"].astype(str).tolist()
+        )
+
+        # New rows always get new ids; any 'id' carried by the frame is ignored.
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO transactions (date, description, amount_cents, category) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        return len(df)
+
+    # -----------------------------
+    # Interactive changes (TransactionJournal interface)
+    # -----------------------------
+    def journal(self) -> "SQLiteStore":
+        return self
+
+    def next_id(self, df: pd.DataFrame = None) -> int:
+        """
+        ID for the next added row. Ids of deleted rows are never reused.
+        """
+        row = self._conn.execute(
+            "SELECT MAX(seq) FROM (SELECT seq FROM sqlite_sequence WHERE name = 'transactions' "
+            "UNION ALL SELECT MAX(id) FROM transactions)"
+        ).fetchone()
+        return max(int(row[0] or 0) + 1, next_id(df) if df is not None else 0)
+
+    def record_add(self, row: dict):
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO transactions (id, date, description, amount_cents, category) VALUES (?, ?, ?, ?, ?)",
+                (row.get("id"), _epoch(row["date"]), row.get("description"),
+                 int(to_cents([row["amount"]])[0]), str(row["category"]))
+            )
+        self.pending += 1
+
+    def record_add_many(self, rows):
+        """
+        Insert a batch of added rows in one transaction.
+        """
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO transactions (id, date, description, amount_cents, category) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (row.get("id"), _epoch(row["date"]), row.get("description"),
+                     int(to_cents([row["amount"]])[0]), str(row["category"]))
+                    for row in rows
+                ]
+            )
+        self.pending += len(rows)
+
+    def record_edit(self, transaction_id, values: dict):
+        columns, params = [], []
+        for column, value in values.items():
+            if column == "amount":
+                column, value = AMOUNT_COLUMN, int(to_cents([value])[0])
+            elif column == "date":
+                value = _epoch(value)
+            elif column in EDITABLE_COLUMNS:
+                value = None if pd.isna(value) else str(value)
+            else:
+                continue
+            columns.append(f"{column} = ?")
+            params.append(value)
+
+        with self._conn:
+            self._conn.execute(
+                f"UPDATE transactions SET {', '.join(columns)} WHERE id = ?",
+                params + [int(transaction_id)]
+            )
+        self.pending += 1
+
+    def record_delete(self, transaction_id):
+        with self._conn:
+            self._conn.execute("DELETE FROM transactions WHERE id = ?", (int(transaction_id),))
+        self.pending += 1
+
+    def replay(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Every change is committed as it is made; nothing to recover.
+        return df
+
+    def maybe_compact(self, df: pd.DataFrame):
+        pass
+
+    def compact(self, df: pd.DataFrame):
+        if self.pending:
+            self._conn.execute("PRAGMA optimize")
+            print("💾 Changes saved successfully.")
+        self.pending = 0
+
+    def close(self):
+        self._conn.close()
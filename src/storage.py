@@ -1,8 +1,362 @@
+"""
+storage.py
+
+Persists transactions to disk.
+
+save_transactions rewrites the whole CSV. For interactive sessions,
+TransactionJournal appends each add/edit/delete to a small log next to
+the CSV instead, replays it over the base file on the next load, and
+folds it back into the CSV when compacted.
+
+TransactionStore is the interface shared by storage backends: CsvStore
+(the flat CSV file above) and SQLiteStore (src/sqlite_store.py).
+open_store picks one from the file extension.
+"""
+
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 
+from src.cube import RollupCube, build_cube
+from src.schema import (
+    ID_COLUMN,
+    append_rows,
+    assign_ids,
+    concat_frames,
+    is_live,
+    mark_deleted,
+    next_id,
+    set_value,
+    to_storage_frame
+)
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
 def save_transactions(df, file_path="data/transactions.csv"):
     """
-    Persist transactions to CSV.
+    Persist transactions to CSV (dollar amounts, on-disk layout).
+
+    The file is written to a temporary path first and swapped in, so an
+    interrupted save never leaves a truncated CSV behind.
     """
-    df.to_csv(file_path, index=False)
-    print("💾 Changes saved successfully.")
\ No newline at end of file
+    tmp_path = f"{file_path}.tmp"
+    to_storage_frame(df).to_csv(tmp_path, index=False)
+    os.replace(tmp_path, file_path)
+    print("💾 Changes saved successfully.")
+
+
+def _to_json_value(value):
+    """
+    Convert pandas/numpy scalars into JSON-friendly values.
+    """
+    if isinstance(value, pd.Timestamp):
+        return str(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+
+class TransactionJournal:
+    """
+    Append-only change log for a transactions CSV.
+
+    Each change is one JSON line, so recording an edit costs O(1) I/O
+    regardless of file size. The first line identifies the base file
+    (size and modification time); if the base file changes underneath
+    the journal, the journal is set aside instead of being replayed onto
+    the wrong data.
+    """
+
+    def __init__(
+        self,
+        file_path="data/transactions.csv",
+        journal_path=None,
+        compact_every=200,
+        durable=False
+    ):
+        self.file_path = file_path
+        self.journal_path = journal_path or f"{file_path}.journal"
+        self.compact_every = compact_every
+        self.durable = durable
+        self.pending = 0
+        self._handle = None
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+    def _base_signature(self):
+        if not os.path.exists(self.file_path):
+            return {"size": 0, "mtime_ns": 0}
+        stat = os.stat(self.file_path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _write(self, record):
+        self._write_many([record])
+
+    def _write_many(self, records):
+        if self._handle is None:
+            is_new = not os.path.exists(self.journal_path)
+            self._handle = open(self.journal_path, "a", encoding="utf-8")
+            if is_new:
+                header = {"op": "base", **self._base_signature()}
+                self._handle.write(json.dumps(header) + "\n")
+
+        self._handle.write("".join(json.dumps(record) + "\n" for record in records))
+        self._handle.flush()
+        if self.durable:
+            os.fsync(self._handle.fileno())
+        self.pending += len(records)
+
+    def next_id(self, df: pd.DataFrame) -> int:
+        """
+        ID for the next added row.
+        """
+        return next_id(df)
+
+    def record_add(self, row: dict):
+        self._write({
+            "op": "add",
+            "row": {k: _to_json_value(v) for k, v in row.items()}
+        })
+
+    def record_add_many(self, rows):
+        """
+        Record a batch of added rows with a single write.
+        """
+        self._write_many([
+            {"op": "add", "row": {k: _to_json_value(v) for k, v in row.items()}}
+            for row in rows
+        ])
+
+    def record_edit(self, transaction_id, values: dict):
+        self._write({
+            "op": "edit",
+            "id": _to_json_value(transaction_id),
+            "values": {k: _to_json_value(v) for k, v in values.items()}
+        })
+
+    def record_delete(self, transaction_id):
+        self._write({"op": "delete", "id": _to_json_value(transaction_id)})
+
+    # -----------------------------
+    # Replay and compaction
+    # -----------------------------
+    def _read_records(self):
+        records = []
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write.
+                    break
+        return records
+
+    def replay(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply any journaled changes left over from a previous session.
+
+        ``df`` must be the base file after the same load/clean/categorize
+        steps the journal was recorded against.
+        """
+        if not os.path.exists(self.journal_path):
+            return df
+
+        records = self._read_records()
+        if not records:
+            return df
+
+        header, changes = records[0], records[1:]
+        base = self._base_signature()
+        if header.get("op") != "base" or any(header.get(k) != v for k, v in base.items()):
+            orphan_path = f"{self.journal_path}.orphaned"
+            os.replace(self.journal_path, orphan_path)
+            print(f"⚠ Transaction file changed since journal was written; moved it to {orphan_path}")
+            return df
+
+        added = []
+        for record in changes:
+            op = record.get("op")
+            if op == "add":
+                added.append(record["row"])
+                continue
+            if added:
+                df = append_rows(df, added)
+                added = []
+            if op == "edit" and is_live(df, record.get("id")):
+                for column, value in record["values"].items():
+                    set_value(df, record["id"], column, value)
+            elif op == "delete" and is_live(df, record.get("id")):
+                mark_deleted(df, record["id"])
+        df = append_rows(df, added)
+
+        self.pending = len(changes)
+        print(f"♻ Recovered {len(changes)} journaled change(s)")
+        return df
+
+    def maybe_compact(self, df: pd.DataFrame):
+        """
+        Compact once enough changes have accumulated.
+        """
+        if self.pending >= self.compact_every:
+            self.compact(df)
+
+    def compact(self, df: pd.DataFrame):
+        """
+        Fold the journal into the base CSV and start a fresh journal.
+        """
+        self.close()
+        if self.pending == 0 and not os.path.exists(self.journal_path):
+            return
+
+        save_transactions(df, self.file_path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.pending = 0
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+# -----------------------------
+# Storage backends
+# -----------------------------
+class TransactionStore:
+    """
+    Interface for transaction storage backends.
+
+    ``load`` returns cleaned, categorized transactions in the compact
+    schema, optionally restricted to an inclusive date range and a set
+    of categories. The aggregate queries default to loading and
+    reducing in pandas; backends that can aggregate natively override
+    them so callers never need the full history in memory.
+    """
+
+    path: str
+
+    def load(self, start=None, end=None, categories=None) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        return len(self.load())
+
+    def category_totals(self, start=None, end=None) -> Tuple[float, Dict[str, float]]:
+        """
+        Same result shape as analysis.calculate_totals.
+        """
+        return self.cube(start, end).totals()
+
+    def cube(self, start=None, end=None) -> RollupCube:
+        """
+        Day × category aggregates over an inclusive date range.
+        """
+        return build_cube(self.load(start, end))
+
+    def period_totals(self, freq: str = "M", start=None, end=None) -> pd.DataFrame:
+        """
+        Period × category spend in dollars (see RollupCube.rollup).
+        """
+        return self.cube(start, end).rollup(freq)
+
+    def journal(self):
+        """
+        Change recorder for interactive add/edit/delete, with the
+        TransactionJournal interface.
+        """
+        raise NotImplementedError
+
+    def import_frame(self, df: pd.DataFrame) -> int:
+        """
+        Append cleaned, categorized transactions. Returns rows written.
+        """
+        raise NotImplementedError
+
+    def export_csv(self, path: str):
+        """
+        Write every transaction to a CSV in the on-disk layout.
+        """
+        save_transactions(self.load(), path)
+
+    def close(self):
+        pass
+
+
+def _filter_frame(df: pd.DataFrame, start=None, end=None, categories=None) -> pd.DataFrame:
+    if df.empty:
+        return df
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df["date"] >= pd.Timestamp(start)
+    if end is not None:
+        # Inclusive of the whole end day.
+        mask &= df["date"] < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+    if categories is not None:
+        mask &= df["category"].isin(list(categories))
+    return df[mask] if not mask.all() else df
+
+
+class CsvStore(TransactionStore):
+    """
+    The flat CSV file: loaded, cleaned and categorized in full on every
+    query, with interactive changes kept in a TransactionJournal.
+    """
+
+    def __init__(
+        self,
+        path="data/transactions.csv",
+        rules_path="config/rules.yml",
+        rejects_path: Optional[str] = None
+    ):
+        self.path = path
+        self.rules_path = rules_path
+        self.rejects_path = rejects_path
+
+    def load(self, start=None, end=None, categories=None) -> pd.DataFrame:
+        from src.categorize import auto_categorize
+        from src.ingest import load_transactions
+        from src.preprocess import validate_and_clean
+
+        df = load_transactions(self.path)
+        if df.empty:
+            return df
+        df = validate_and_clean(df, rejects_path=self.rejects_path)
+        df = auto_categorize(df, self.rules_path)
+        return _filter_frame(df, start, end, categories)
+
+    def journal(self) -> TransactionJournal:
+        return TransactionJournal(self.path)
+
+    def import_frame(self, df: pd.DataFrame) -> int:
+        existing = self.load() if os.path.exists(self.path) else pd.DataFrame()
+        if existing.empty:
+            save_transactions(assign_ids(df.drop(columns=ID_COLUMN, errors="ignore")), self.path)
+            return len(df)
+
+        # Imported rows get new IDs after the existing ones.
+        new = assign_ids(df.drop(columns=ID_COLUMN, errors="ignore"), start=next_id(existing))
+        save_transactions(concat_frames([existing, new], ignore_index=False), self.path)
+        return len(df)
+
+
+def is_sqlite_path(path: str) -> bool:
+    return str(path).lower().endswith(SQLITE_SUFFIXES)
+
+
+def open_store(path: str = "data/transactions.csv", rules_path="config/rules.yml", rejects_path=None):
+    """
+    Open the storage backend for ``path``: SQLite for .db/.sqlite files,
+    the flat CSV otherwise.
+    """
+    if is_sqlite_path(path):
+        from src.sqlite_store import SQLiteStore
+
+        return SQLiteStore(path)
+    return CsvStore(path, rules_path, rejects_path)
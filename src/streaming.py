@@ -0,0 +1,132 @@
+"""
+streaming.py
+
+Chunked pipeline for transaction files that do not fit in memory.
+
+Each chunk is cleaned, categorized and rolled up into a day × category
+cube on its own; only the merged cube is kept. stream_category_totals
+returns the same shape as calculate_totals, so budget, scoring and
+reporting stages can consume it unchanged.
+"""
+
+from typing import Dict, Optional, Tuple
+
+from src.analysis import calculate_totals
+from src.anomalies import OutlierScan
+from src.categorize import auto_categorize, load_compiled_rules
+from src.cube import RollupCube, build_cube
+from src.heavy_hitters import VendorRanking
+from src.ingest import estimate_chunk_rows, iter_transaction_chunks
+from src.preprocess import detect_date_format, validate_and_clean
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def stream_cube(
+    path: str = "data/transactions.csv",
+    rules_path: str = "config/rules.yml",
+    chunk_rows: Optional[int] = None,
+    memory_limit_mb: Optional[float] = None,
+    rejects_path: Optional[str] = None,
+    vendors: Optional[VendorRanking] = None,
+    outliers: Optional[OutlierScan] = None
+) -> Tuple[RollupCube, int]:
+    """
+    Run clean → categorize → aggregate over a CSV file chunk by chunk.
+
+    Each chunk is rolled up into a day × category cube and merged, so
+    only the cube outlives a chunk.
+
+    Parameters
+    ----------
+    path : str
+        Transaction CSV file.
+    rules_path : str
+        Path to YAML rules file.
+    chunk_rows : int, optional
+        Rows per chunk. Defaults to DEFAULT_CHUNK_ROWS.
+    memory_limit_mb : float, optional
+        Approximate memory budget for one raw chunk. When given, the
+        chunk size is derived from a sample of the file instead.
+    rejects_path : str, optional
+        Side file collecting rejected rows from every chunk.
+    vendors : VendorRanking, optional
+        Per-category vendor sketches, updated with each chunk.
+    outliers : OutlierScan, optional
+        Large-transaction scan, fed with each chunk.
+
+    Returns
+    -------
+    Tuple[RollupCube, int]
+        (cube, valid_row_count)
+    """
+    if memory_limit_mb is not None:
+        chunk_rows = estimate_chunk_rows(path, memory_limit_mb)
+    elif chunk_rows is None:
+        chunk_rows = DEFAULT_CHUNK_ROWS
+
+    # Compile rules once for the whole file rather than once per chunk.
+    matcher, predicate_rules = load_compiled_rules(rules_path)
+
+    cube = RollupCube.empty()
+    raw_rows = 0
+    valid_rows = 0
+    date_format = None
+
+    for chunk in iter_transaction_chunks(path, chunk_rows):
+        raw_rows += len(chunk)
+
+        # Detect the date format once from the first chunk so every
+        # chunk of the file is parsed the same way.
+        if date_format is None:
+            date_format = detect_date_format(chunk["date"])
+
+        chunk = validate_and_clean(
+            chunk,
+            verbose=False,
+            date_format=date_format,
+            rejects_path=rejects_path,
+            append_rejects=raw_rows > len(chunk)
+        )
+        chunk = auto_categorize(
+            chunk,
+            rules_path,
+            matcher=matcher,
+            predicate_rules=predicate_rules
+        )
+
+        cube = cube.merge(build_cube(chunk))
+        if vendors is not None:
+            vendors.update_frame(chunk)
+        if outliers is not None:
+            outliers.update(chunk)
+        valid_rows += len(chunk)
+
+    print(
+        f"🧹 Streamed {raw_rows} raw row(s) in chunks of {chunk_rows}: "
+        f"{valid_rows} valid, {raw_rows - valid_rows} invalid row(s) removed"
+    )
+
+    return cube, valid_rows
+
+
+def stream_category_totals(
+    path: str = "data/transactions.csv",
+    rules_path: str = "config/rules.yml",
+    chunk_rows: Optional[int] = None,
+    memory_limit_mb: Optional[float] = None,
+    rejects_path: Optional[str] = None
+) -> Tuple[float, Dict[str, float], int]:
+    """
+    Streaming equivalent of load → clean → categorize → calculate_totals.
+
+    See stream_cube for the parameters.
+
+    Returns
+    -------
+    Tuple[float, Dict[str, float], int]
+        (total_spend, category_totals, valid_row_count)
+    """
+    cube, valid_rows = stream_cube(path, rules_path, chunk_rows, memory_limit_mb, rejects_path)
+    total_spend, category_totals = calculate_totals(cube)
+    return total_spend, category_totals, valid_rows